@@ -1,8 +1,18 @@
 ﻿import requests
 
+from analysis.bubble import intrinsic_gram18
+from analysis.journal import FLAG_STALE, default_store
+from config import QUOTE_JOURNAL_DIR
+
+def _journal(code, price):
+    # مقدارهای ثابت هم ثبت می‌شوند (با پرچم stale) تا دفتر قیمت‌ها از همه‌ی فراخوانی‌ها پر شود
+    if QUOTE_JOURNAL_DIR:
+        default_store().append(code, price, source='stub', flags=FLAG_STALE)
+    return price
+
 def get_gold_ounce_price_usd(api_key):
     price_usd = 4000
-    return price_usd
+    return _journal("ounce_usd", price_usd)
 
 
     # # مثال برای Metals-API
@@ -17,7 +27,7 @@ def get_gold_ounce_price_usd(api_key):
 
 def get_usd_to_irr_rate(api_key):
     rate = 108400
-    return rate
+    return _journal("usd_irr", rate)
     # # مثال برای CurrencyAPI
     # url = f"https://api.currencyapi.com/v3/latest?apikey={api_key}&base=USD&symbols=IRR"
     # resp = requests.get(url)
@@ -27,11 +37,8 @@ def get_usd_to_irr_rate(api_key):
     # return rate
 
 def calculate_gold_bubble(ounce_price_usd, usd_to_irr, market_price_per_gram_toman):
-    OUNCE_TO_GRAM = 31.103431
-    PURITY_18K = 0.75
-
-    # قیمت ذاتی هر گرم طلا ۱۸ عیار
-    intrinsic_price_toman = (ounce_price_usd / OUNCE_TO_GRAM) * PURITY_18K * usd_to_irr
+    # قیمت ذاتی هر گرم طلا ۱۸ عیار (برای سری زمانی: analysis.bubble.bubble_series)
+    intrinsic_price_toman = intrinsic_gram18(ounce_price_usd, usd_to_irr)
 
     bubble_toman = market_price_per_gram_toman - intrinsic_price_toman
 
@@ -0,0 +1,302 @@
+# analysis/alerts.py
+# موتور هشدار: سناریوها به قانون‌های قیمتی (شکست سقف، بسته شدن زیر کف، برخورد به حد ضرر/هدف) تبدیل
+# و برای هر نماد بر اساس سطح قیمت در فهرست مرتب نگه داشته می‌شوند؛ هر قیمت تازه فقط قانون‌های
+# بازه‌ی بین قیمت قبلی و قیمت جدید را با bisect پیدا می‌کند.
+import bisect
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+ABOVE, BELOW = 'above', 'below'   # جهت عبور از سطح
+TICK, CLOSE = 'tick', 'close'     # قیمت لحظه‌ای یا Close کندل بسته‌شده
+
+_ids = itertools.count(1)
+
+
+class Rule:
+    """قانون یک‌باره: وقتی قیمت (یا Close) از level در جهت direction عبور کند یا به آن برسد"""
+
+    __slots__ = ('id', 'symbol', 'name', 'side', 'direction', 'level', 'on', 'once', 'active')
+
+    def __init__(self, symbol, name, side, direction, level, on=TICK, once=True):
+        self.id = next(_ids)
+        self.symbol = symbol
+        self.name = name
+        self.side = side
+        self.direction = direction
+        self.level = float(level)
+        self.on = on
+        self.once = once
+        self.active = True
+
+    def __repr__(self):
+        return f"Rule({self.symbol} {self.name} {self.direction} {self.level:.4f} on {self.on})"
+
+
+def rules_from_scenarios(symbol, scenarios) -> list:
+    """
+    قانون‌های ساختاریافته‌ی یک خروجی generate_scenarios:
+    breakout (عبور قیمت از recent_high)، breakdown (Close زیر recent_low)،
+    و برخورد قیمت به حد ضرر و هدف‌های هر دو سناریو.
+    """
+    levels, bull, bear = scenarios['levels'], scenarios['bullish'], scenarios['bearish']
+    rules = [
+        Rule(symbol, 'breakout', 'bullish', ABOVE, levels['recent_high']),
+        Rule(symbol, 'breakdown', 'bearish', BELOW, levels['recent_low'], on=CLOSE),
+        Rule(symbol, 'stop_loss', 'bullish', BELOW, bull['stop_loss']),
+        Rule(symbol, 'stop_loss', 'bearish', ABOVE, bear['stop_loss']),
+    ]
+    rules += [Rule(symbol, f'target_{k}', 'bullish', ABOVE, t) for k, t in enumerate(bull['targets'], 1)]
+    rules += [Rule(symbol, f'target_{k}', 'bearish', BELOW, t) for k, t in enumerate(bear['targets'], 1)]
+    return [r for r in rules if r.level == r.level]
+
+
+class _Side:
+    """قانون‌های یک جهت به ترتیب سطح (دو فهرست موازی برای bisect)"""
+
+    __slots__ = ('levels', 'rules')
+
+    def __init__(self):
+        self.levels = []
+        self.rules = []
+
+    def add(self, rule):
+        k = bisect.bisect_right(self.levels, rule.level)
+        self.levels.insert(k, rule.level)
+        self.rules.insert(k, rule)
+
+    def remove(self, rule):
+        k = bisect.bisect_left(self.levels, rule.level)
+        while self.rules[k] is not rule:
+            k += 1
+        del self.levels[k]
+        del self.rules[k]
+
+    def crossed_up(self, old, new):
+        """قانون‌های با old < level <= new به ترتیب عبور قیمت (سطح پایین‌تر اول)"""
+        return self.rules[bisect.bisect_right(self.levels, old):bisect.bisect_right(self.levels, new)]
+
+    def crossed_down(self, old, new):
+        """قانون‌های با new <= level < old به ترتیب عبور قیمت (سطح بالاتر اول)"""
+        return self.rules[bisect.bisect_left(self.levels, new):bisect.bisect_left(self.levels, old)][::-1]
+
+
+class _Book:
+    """قانون‌ها و آخرین قیمت‌های یک نماد؛ قانون‌های tick و close جدا نگه داشته می‌شوند"""
+
+    __slots__ = ('sides', 'last', 'count')
+
+    def __init__(self):
+        self.sides = {(on, d): _Side() for on in (TICK, CLOSE) for d in (ABOVE, BELOW)}
+        self.last = {TICK: None, CLOSE: None}
+        self.count = 0
+
+
+class AlertEngine:
+    """
+    engine = AlertEngine([LogSink(), FileSink('alerts.ndjson')])
+    engine.set_rules('GC=F', rules_from_scenarios('GC=F', scenarios), price=scenarios['price'])
+    engine.on_prices({'GC=F': 2401.5, ...})      # هر تیک
+    engine.on_close('GC=F', 2399.0)              # بسته شدن کندل
+    رویدادها (dict) به همه‌ی sink ها داده می‌شوند؛ خطای یک sink بقیه را متوقف نمی‌کند.
+    """
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+        self.books = {}
+        self.stats = {'ticks': 0, 'events': 0, 'sink_errors': 0}
+        self._lock = threading.Lock()
+
+    # ---------- قانون‌ها ----------
+    def _book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = _Book()
+        return book
+
+    def add_rule(self, rule):
+        with self._lock:
+            book = self._book(rule.symbol)
+            book.sides[(rule.on, rule.direction)].add(rule)
+            book.count += 1
+        return rule
+
+    def remove_rule(self, rule):
+        with self._lock:
+            self._remove(rule)
+
+    def _remove(self, rule):
+        book = self.books[rule.symbol]
+        book.sides[(rule.on, rule.direction)].remove(rule)
+        book.count -= 1
+        rule.active = False
+
+    def set_rules(self, symbol, rules, price=None):
+        """
+        جایگزینی همه‌ی قانون‌های symbol؛ price قیمت مرجع (مثلاً قیمت زمان ساخت سناریو) برای اولین عبور.
+        بدون price آخرین قیمت‌های دیده‌شده‌ی نماد حفظ می‌شوند.
+        """
+        with self._lock:
+            old = self.books.get(symbol)
+            book = self.books[symbol] = _Book()
+            for rule in rules:
+                book.sides[(rule.on, rule.direction)].add(rule)
+            book.count = len(rules)
+            if price is not None:
+                book.last[TICK] = book.last[CLOSE] = float(price)
+            elif old is not None:
+                book.last = old.last
+
+    def rules(self, symbol=None) -> list:
+        books = [self.books[symbol]] if symbol is not None else self.books.values()
+        return [r for book in books for side in book.sides.values() for r in side.rules]
+
+    def __len__(self):
+        return sum(book.count for book in self.books.values())
+
+    # ---------- قیمت‌ها ----------
+    def _update(self, symbol, price, on, ts):
+        book = self.books.get(symbol)
+        if book is None:
+            return []
+        old = book.last[on]
+        book.last[on] = price
+        if old is None or price == old:
+            return []
+        if price > old:
+            hits = book.sides[(on, ABOVE)].crossed_up(old, price)
+        else:
+            hits = book.sides[(on, BELOW)].crossed_down(old, price)
+        if not hits:
+            return []
+        events = []
+        for rule in hits:
+            events.append({
+                'time': ts, 'symbol': symbol, 'rule': rule.id, 'name': rule.name, 'side': rule.side,
+                'direction': rule.direction, 'on': on, 'level': rule.level, 'price': price,
+            })
+            if rule.once:
+                self._remove(rule)
+        return events
+
+    def on_price(self, symbol, price, ts=None) -> list:
+        return self.on_prices({symbol: price}, ts)
+
+    def on_prices(self, prices: dict, ts=None) -> list:
+        """قیمت لحظه‌ای چند نماد؛ خروجی رویدادهای ایجادشده"""
+        ts = time.time() if ts is None else ts
+        events = []
+        with self._lock:
+            self.stats['ticks'] += len(prices)
+            for symbol, price in prices.items():
+                events += self._update(symbol, float(price), TICK, ts)
+        self._emit(events)
+        return events
+
+    def on_close(self, symbol, close, ts=None) -> list:
+        """Close کندل بسته‌شده: قانون‌های close (و مثل یک تیک، قانون‌های tick)"""
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            events = self._update(symbol, float(close), CLOSE, ts) + self._update(symbol, float(close), TICK, ts)
+        self._emit(events)
+        return events
+
+    def _emit(self, events):
+        if not events:
+            return
+        with self._lock:
+            self.stats['events'] += len(events)
+        for sink in self.sinks:
+            for event in events:
+                try:
+                    sink(event)
+                except Exception:
+                    with self._lock:
+                        self.stats['sink_errors'] += 1
+                    log.exception("alert sink %r failed", sink)
+
+
+# ---------------- sink ها ----------------
+def format_event(event) -> str:
+    ts = event['time']
+    when = pd.Timestamp(ts, unit='s', tz='UTC') if isinstance(ts, (int, float)) else ts
+    return (f"{when} {event['symbol']} {event['side']} {event['name']}: "
+            f"{event['price']:.4f} {event['direction']} {event['level']:.4f} ({event['on']})")
+
+
+class MemorySink:
+    """آخرین maxlen رویداد در حافظه (برای نمایش در داشبورد)"""
+
+    def __init__(self, maxlen=200):
+        self.events = deque(maxlen=maxlen)
+
+    def __call__(self, event):
+        self.events.append(event)
+
+
+class LogSink:
+    def __init__(self, logger=log, level=logging.INFO):
+        self.logger = logger
+        self.level = level
+
+    def __call__(self, event):
+        self.logger.log(self.level, format_event(event))
+
+
+class FileSink:
+    """هر رویداد یک خط JSON (NDJSON) که بلافاصله flush می‌شود"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class WebhookSink:
+    """
+    ارسال رویداد به یک webhook با POST JSON در یک نخ جدا تا مسیر تیک منتظر شبکه نماند.
+    post قابل جایگزینی است (مثلاً در تست بدون شبکه)؛ پیش‌فرض requests.Session().post
+    """
+
+    def __init__(self, url, timeout=5, post=None):
+        self.url = url
+        self.timeout = timeout
+        if post is None:
+            import requests
+            post = requests.Session().post
+        self.post = post
+        self.sent = 0
+        self.failed = 0
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-webhook")
+
+    def _send(self, event):
+        try:
+            self.post(self.url, data=json.dumps(event, ensure_ascii=False, default=str).encode('utf-8'),
+                      headers={'Content-Type': 'application/json'}, timeout=self.timeout)
+            self.sent += 1
+        except Exception:
+            self.failed += 1
+            log.exception("webhook %s failed", self.url)
+
+    def __call__(self, event):
+        self._pool.submit(self._send, event)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
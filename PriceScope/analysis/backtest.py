@@ -0,0 +1,179 @@
+# analysis/backtest.py
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from config import DEFAULT_LOOKBACK, MA_FAST, MA_SLOW, ATR_PERIOD
+from analysis.indicators import add_indicators, support_resistance_levels
+from analysis.scenarios import scenario_arrays, generate_scenarios
+
+MAX_HOLD = 50
+CHUNK_ROWS = 4096
+
+
+def rolling_levels(df, lookback=DEFAULT_LOOKBACK):
+    """recent_high/recent_low برای همه‌ی کندل‌ها (معادل df.iloc[:i+1].tail(lookback))"""
+    recent_high = df['High'].rolling(lookback, min_periods=1).max().to_numpy(float)
+    recent_low = df['Low'].rolling(lookback, min_periods=1).min().to_numpy(float)
+    return recent_high, recent_low
+
+
+def frame_arrays(df, lookback=DEFAULT_LOOKBACK, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD):
+    """اندیکاتورها و شرایط سناریو برای همه‌ی کندل‌ها یک‌جا"""
+    df = add_indicators(df[['High', 'Low', 'Close']].copy(), fast, slow, atr_period)
+    atr_vals = df['ATR'].to_numpy(float)
+    recent_high, recent_low = rolling_levels(df, lookback)
+    arrays = scenario_arrays(df['Close'], df['MA_fast'], df['MA_slow'], atr_vals, recent_high, recent_low)
+    arrays['atr'] = atr_vals
+    arrays['ma_fast'] = df['MA_fast'].to_numpy(float)
+    arrays['ma_slow'] = df['MA_slow'].to_numpy(float)
+    return arrays
+
+
+def _forward_windows(x, horizon):
+    """پنجره‌ی horizon کندل بعد از هر کندل: windows[i] = x[i+1 : i+1+horizon]"""
+    padded = np.concatenate([x[1:], np.full(horizon, np.nan)])
+    return sliding_window_view(padded, horizon)
+
+
+def first_hit(high, low, level, rows, up, max_hold=MAX_HOLD):
+    """
+    برای هر کندل rows: اندیس (0..max_hold-1) اولین کندل بعدی که high به level رسیده (up) یا low به آن
+    رسیده (not up)؛ max_hold یعنی در مهلت برخوردی نبود.
+    """
+    win = _forward_windows(high if up else low, max_hold)
+    out = np.empty(len(rows), dtype=np.int64)
+    for s in range(0, len(rows), CHUNK_ROWS):
+        r = rows[s:s + CHUNK_ROWS]
+        hit = win[r] >= level[r, None] if up else win[r] <= level[r, None]
+        out[s:s + len(r)] = np.where(hit.any(1), hit.argmax(1), max_hold)
+    return out
+
+
+def simulate(high, low, close, signal, stop, target, side='long', max_hold=MAX_HOLD):
+    """
+    نتیجه‌ی ورود در close هر کندلی که signal دارد (به صورت برداری).
+    اگر حد ضرر و هدف در یک کندل لمس شوند، حد ضرر حساب می‌شود.
+    خروجی: dict از آرایه‌ها (entry, exit, r, outcome: 1 هدف، -1 حد ضرر، 0 پایان مهلت)
+    """
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    idx = np.flatnonzero(np.asarray(signal) & entry_mask(close, stop, target, side))
+    long = side == 'long'
+    stop_at = first_hit(high, low, stop, idx, not long, max_hold)
+    target_at = first_hit(high, low, target, idx, long, max_hold)
+    return resolve_trades(close, idx, stop, target, stop_at, target_at, side, max_hold)
+
+
+def entry_mask(close, stop, target, side='long'):
+    """کندل‌هایی که ریسک و سود هر دو مثبت‌اند"""
+    if side == 'long':
+        return (close - stop > 0) & (target - close > 0)
+    return (stop - close > 0) & (close - target > 0)
+
+
+def resolve_trades(close, idx, stop, target, stop_at, target_at, side='long', max_hold=MAX_HOLD):
+    """خروجی simulate از اولین برخورد به حد ضرر/هدف (stop_at/target_at خروجی first_hit برای idx)"""
+    n = len(close)
+    long = side == 'long'
+    risk = close[idx] - stop[idx] if long else stop[idx] - close[idx]
+    stopped = (stop_at < max_hold) & (stop_at <= target_at)
+    hit = (target_at < max_hold) & ~stopped
+    timeout_at = np.minimum(idx + max_hold, n - 1)
+    exit_idx = np.where(stopped, idx + 1 + stop_at, np.where(hit, idx + 1 + target_at, timeout_at))
+    exit_price = np.where(stopped, stop[idx], np.where(hit, target[idx], close[timeout_at]))
+    pnl = exit_price - close[idx] if long else close[idx] - exit_price
+    return {
+        'entry': idx,
+        'exit': exit_idx,
+        'r': pnl / risk,
+        'outcome': np.where(stopped, -1, np.where(hit, 1, 0)).astype(np.int8),
+    }
+
+
+def non_overlapping(trades):
+    """حذف ورودهایی که قبل از خروج معامله‌ی قبلی هستند (یک معامله‌ی باز در هر لحظه)"""
+    # برای هر معامله، اولین ورود بعد از خروجش یک‌جا با searchsorted پیدا می‌شود
+    # و حلقه فقط روی معاملات پذیرفته‌شده می‌چرخد
+    following = np.searchsorted(trades['entry'], trades['exit'], side='left').tolist()
+    keep = []
+    k = 0
+    while k < len(following):
+        keep.append(k)
+        k = max(following[k], k + 1)
+    return {key: val[keep] for key, val in trades.items()}
+
+
+def trade_stats(trades) -> dict:
+    r = trades['r']
+    if len(r) == 0:
+        return {'trades': 0, 'hit_rate': None, 'avg_r': None, 'total_r': 0.0,
+                'max_drawdown_r': 0.0, 'timeouts': 0, 'avg_bars': None}
+    equity = np.cumsum(r)
+    drawdown = np.maximum.accumulate(np.concatenate([[0.0], equity]))[1:] - equity
+    return {
+        'trades': int(len(r)),
+        'hit_rate': float((trades['outcome'] == 1).mean()),
+        'avg_r': float(r.mean()),
+        'total_r': float(equity[-1]),
+        'max_drawdown_r': float(drawdown.max()),
+        'timeouts': int((trades['outcome'] == 0).sum()),
+        'avg_bars': float((trades['exit'] - trades['entry']).mean()),
+    }
+
+
+def backtest(df, lookback=DEFAULT_LOOKBACK, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD,
+             max_hold=MAX_HOLD, target=1, overlap=False, arrays=None):
+    """
+    بک‌تست تاریخی سناریوها روی همه‌ی کندل‌ها.
+    ورود صعودی وقتی سناریوی روند صعودی فعال است (price_above_slow_ma و ma_fast_above_slow)
+    و ورود نزولی برعکس آن؛ حد ضرر همان stop_loss سناریو و هدف targets[target] است.
+    """
+    if arrays is None:
+        arrays = frame_arrays(df, lookback, fast, slow, atr_period)
+    high, low, close = (df[c].to_numpy(float) for c in ('High', 'Low', 'Close'))
+    return backtest_arrays(high, low, close, arrays, max_hold, target, overlap)
+
+
+def backtest_arrays(high, low, close, arrays, max_hold=MAX_HOLD, target=1, overlap=False):
+    """هسته‌ی backtest روی آرایه‌های آماده (خروجی scenario_arrays)"""
+    trades = [simulate(high, low, close, signal, stop, targets[target], side, max_hold)
+              for side, signal, stop, targets in (
+                  ('long', arrays['bull_trend'], arrays['bull_stop'], (arrays['recent_high'], arrays['resistance_2'])),
+                  ('short', arrays['bear_trend'], arrays['bear_stop'], (arrays['recent_low'], arrays['support_2'])))]
+    return merge_sides(*trades, overlap=overlap)
+
+
+def merge_sides(long_trades, short_trades, overlap=False):
+    """آمار هر سمت و مجموع هر دو (به ترتیب ورود)"""
+    results = {}
+    for side, trades in (('long', long_trades), ('short', short_trades)):
+        if not overlap:
+            trades = non_overlapping(trades)
+        results[side] = trade_stats(trades)
+        results[side + '_trades'] = trades
+    both = {k: np.concatenate([results['long_trades'][k], results['short_trades'][k]]) for k in results['long_trades']}
+    order = np.argsort(both['entry'], kind='stable')
+    results['all'] = trade_stats({k: v[order] for k, v in both.items()})
+    return results
+
+
+def check_against_scalar(df, lookback=DEFAULT_LOOKBACK, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD,
+                         samples=200, seed=0):
+    """
+    مقایسه‌ی scenario_arrays با generate_scenarios روی کندل‌های تصادفی؛ خروجی: اندیس کندل‌های ناسازگار
+    """
+    arrays = frame_arrays(df, lookback, fast, slow, atr_period)
+    full = add_indicators(df.copy(), fast, slow, atr_period)
+    rows = np.random.default_rng(seed).choice(len(df), size=min(samples, len(df)), replace=False)
+    bad = []
+    for i in sorted(rows.tolist()):
+        part = full.iloc[:i + 1]
+        scn = generate_scenarios(part, support_resistance_levels(part, lookback), {})
+        flags = {**scn['bullish_conditions'], **scn['bearish_conditions']}
+        ok = all(bool(arrays[k][i]) == v for k, v in flags.items())
+        ok &= scn['bullish']['stop_loss'] == arrays['bull_stop'][i]
+        ok &= scn['bearish']['stop_loss'] == arrays['bear_stop'][i]
+        ok &= scn['bullish']['targets'] == [arrays['recent_high'][i], arrays['resistance_2'][i]]
+        ok &= scn['bearish']['targets'] == [arrays['recent_low'][i], arrays['support_2'][i]]
+        if not ok:
+            bad.append(i)
+    return bad
@@ -0,0 +1,226 @@
+# analysis/bar_store.py
+import json
+import os
+import threading
+import time
+from urllib.parse import quote
+
+import pandas as pd
+
+from config import BAR_STORE_DIR, BAR_REFRESH_SECONDS, INTERVAL_SECONDS, SESSION_STARTS
+from analysis.cache import LRUCache
+from analysis.resample import DERIVE_FROM, NATIVE_INTERVALS, resample_ohlcv
+
+try:
+    import pyarrow  # noqa: F401
+    FILE_FORMAT = "parquet"
+except ImportError:
+    FILE_FORMAT = "pickle"
+
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+DAY_SECONDS = INTERVAL_SECONDS["1d"]
+
+
+def period_start(end, period):
+    """شروع بازه‌ی period نسبت به زمان end (None یعنی کل تاریخچه)"""
+    if period == "max":
+        return None
+    if period == "ytd":
+        return pd.Timestamp(year=end.year, month=1, day=1, tz=end.tz)
+    return end - PERIOD_OFFSETS[period]
+
+
+def merge_bars(old, new):
+    """الحاق کندل‌های جدید؛ کندل‌های هم‌پوشان (مثل آخرین کندل نیمه‌کاره) با نسخه‌ی جدید جایگزین می‌شوند"""
+    if old is None or old.empty:
+        return new
+    if new is None or new.empty:
+        return old
+    return pd.concat([old.loc[old.index < new.index[0]], new])
+
+
+class BarStore:
+    """
+    انبار محلی کندل‌ها به ازای (symbol, interval) در فایل ستونی (parquet).
+    در هر درخواست فقط کندل‌های بعد از آخرین زمان ذخیره‌شده دانلود می‌شوند.
+    بازه‌های درشت‌تر (2h, 4h و اگر کندل ریزتر کل period را داشته باشد 1d و 1wk) بدون دانلود
+    از کندل‌های ذخیره‌شده ساخته و در حافظه کش می‌شوند. 1d از کندل ساعتی فقط برای نمادهای session_starts
+    ساخته می‌شود (روز از شروع جلسه)؛ برش نیمه‌شب با کندل روزانه‌ی yfinance یکی نیست.
+
+    downloader(symbol, interval, period=None, start=None) -> DataFrame
+    """
+
+    def __init__(self, root=BAR_STORE_DIR, downloader=None, refresh_after=None, session_starts=None):
+        self.root = root
+        self.downloader = downloader
+        self.refresh_after = refresh_after
+        self.session_starts = SESSION_STARTS if session_starts is None else session_starts
+        self.stats = {
+            "hits": 0,            # بدون هیچ درخواست شبکه
+            "refreshes": 0,       # فقط دنباله‌ی جدید دانلود شد
+            "misses": 0,          # دانلود کامل period
+            "derived": 0,         # ساخته‌شده از بازه‌ی ریزتر (analysis/resample.py)
+            "rows_fetched": 0,
+            "bytes_fetched": 0,   # حجم کندل‌های دانلودشده در حافظه
+            "fetch_seconds": 0.0,
+        }
+        self._frames = {}
+        self._meta = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._derived = LRUCache(maxsize=64)
+
+    # ---------- فایل‌ها ----------
+    def _path(self, symbol, interval, ext):
+        return os.path.join(self.root, f"{quote(symbol, safe='')}_{interval}.{ext}")
+
+    def _read(self, symbol, interval):
+        path = self._path(symbol, interval, FILE_FORMAT)
+        if not os.path.exists(path):
+            return None, {}
+        if FILE_FORMAT == "parquet":
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_pickle(path)
+        meta = {}
+        meta_path = self._path(symbol, interval, "json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        return df, meta
+
+    def _write(self, symbol, interval, df, meta):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(symbol, interval, FILE_FORMAT)
+        tmp = path + ".tmp"
+        if FILE_FORMAT == "parquet":
+            df.to_parquet(tmp)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, path)
+        with open(self._path(symbol, interval, "json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def load(self, symbol, interval):
+        """کندل‌های ذخیره‌شده (از حافظه یا دیسک)"""
+        key = (symbol, interval)
+        if key not in self._frames:
+            self._frames[key], self._meta[key] = self._read(symbol, interval)
+        return self._frames[key]
+
+    # ---------- دانلود ----------
+    def _download(self, symbol, interval, period=None, start=None):
+        t0 = time.perf_counter()
+        df = self.downloader(symbol, interval, period=period, start=start)
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self.stats["rows_fetched"] += len(df)
+            self.stats["bytes_fetched"] += int(df.memory_usage(index=True).sum())
+            self.stats["fetch_seconds"] += elapsed
+        return df
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _refresh_seconds(self, interval):
+        if self.refresh_after is not None:
+            return self.refresh_after
+        return min(INTERVAL_SECONDS.get(interval, 60), BAR_REFRESH_SECONDS)
+
+    def covers(self, symbol, period, interval):
+        """کندل‌های ذخیره‌شده‌ی interval کل period را دارند (بدون دانلود کامل جواب داده می‌شود)"""
+        stored = self.load(symbol, interval)
+        covered = (self._meta.get((symbol, interval)) or {}).get("covered_from")
+        if stored is None or stored.empty or covered is None:
+            return False
+        if covered == "max":
+            return True
+        wanted = period_start(stored.index[-1], period)
+        return wanted is not None and wanted >= pd.Timestamp(covered)
+
+    def _derivable(self, symbol, period, interval):
+        """interval بدون دانلود کامل از کندل‌های ریزتر ساخته می‌شود (مثل 1wk از 1d از 1h)"""
+        base = DERIVE_FROM.get(interval)
+        if base is None:
+            return False
+        if interval not in NATIVE_INTERVALS:
+            return True
+        if INTERVAL_SECONDS[base] < DAY_SECONDS <= INTERVAL_SECONDS[interval] and symbol not in self.session_starts:
+            return False   # مرز روز معاملاتی این نماد معلوم نیست
+        if self.covers(symbol, period, interval):
+            return False   # کندل‌های اصلی خود interval ذخیره شده‌اند
+        return self.covers(symbol, period, base) or self._derivable(symbol, period, base)
+
+    def _derive(self, symbol, period, interval, base):
+        bars = self.get(symbol, period, base)
+        if bars.empty:
+            return bars
+        # آخرین کندل پایه ممکن است نیمه‌کاره باشد و با همان زمان به‌روز شود
+        session = self.session_starts.get(symbol)
+        key = (symbol, period, interval, base, session, len(bars), bars.index[-1], tuple(bars.iloc[-1]))
+        derived, _ = self._derived.get_or_compute(key, lambda: resample_ohlcv(bars, interval, session))
+        self._count("derived")
+        return derived.copy()
+
+    # ---------- API ----------
+    def get(self, symbol, period="6mo", interval="1d"):
+        """کندل‌های period اخیر؛ فقط بخش جاافتاده از شبکه گرفته می‌شود"""
+        if self._derivable(symbol, period, interval):
+            return self._derive(symbol, period, interval, DERIVE_FROM[interval])
+        key = (symbol, interval)
+        with self._key_lock(key):
+            stored = self.load(symbol, interval)
+            meta = self._meta.get(key) or {}
+            now = time.time()
+
+            covered = meta.get("covered_from")
+            wanted = None
+            if stored is not None and not stored.empty:
+                wanted = period_start(stored.index[-1], period)
+
+            if stored is None or stored.empty or covered is None or (
+                    covered != "max" and (wanted is None or wanted < pd.Timestamp(covered))):
+                fresh = self._download(symbol, interval, period=period)
+                merged = merge_bars(stored, fresh)
+                if not merged.empty:
+                    start = period_start(merged.index[-1], period)
+                    if covered is None or start is None or covered == "max" or start < pd.Timestamp(covered):
+                        covered = "max" if start is None else start.isoformat()
+                self._count("misses")
+            elif now - meta.get("checked_at", 0) < self._refresh_seconds(interval):
+                self._count("hits")
+                return self._slice(stored, period)
+            else:
+                tail = self._download(symbol, interval, start=stored.index[-1])
+                merged = merge_bars(stored, tail)
+                self._count("refreshes")
+
+            meta = {"covered_from": covered, "checked_at": now}
+            if not merged.empty:
+                self._write(symbol, interval, merged, meta)
+            self._frames[key], self._meta[key] = merged, meta
+            return self._slice(merged, period)
+
+    @staticmethod
+    def _slice(df, period):
+        if df.empty:
+            return df.copy()
+        start = period_start(df.index[-1], period)
+        if start is None:
+            return df.copy()
+        return df.loc[df.index >= start].copy()
@@ -0,0 +1,113 @@
+# analysis/bars.py
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+OHLCV = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class BarSeries:
+    """
+    سری کندل سبک بر پایه‌ی آرایه‌های پیوسته‌ی NumPy (فقط OHLCV و زمان‌ها).
+    مثل DataFrame با bars['Close'] خوانده و با bars['ATR'] = ... نوشته می‌شود،
+    ولی سربار pandas و ستون‌های بی‌استفاده (Adj Close و ...) را ندارد.
+    dtype می‌تواند float32 باشد (نصف حافظه؛ اعداد دیگر بیت‌به‌بیت برابر pandas نیستند).
+    """
+
+    __slots__ = ('index', 'tz', 'columns', 'dtype')
+
+    def __init__(self, index, open, high, low, close, volume=None, dtype=np.float64, tz=None):
+        self.dtype = np.dtype(dtype)
+        self.index = np.asarray(index, dtype='datetime64[ns]')
+        self.tz = tz
+        self.columns = {}
+        for name, values in zip(OHLCV, (open, high, low, close, volume)):
+            if values is not None:
+                self.columns[name] = np.ascontiguousarray(values, dtype=self.dtype)
+
+    @classmethod
+    def from_frame(cls, df, dtype=np.float64):
+        """ساخت از DataFrame خروجی fetch_data"""
+        index = df.index
+        tz = None
+        if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+            tz = str(index.tz)
+            index = index.tz_convert('UTC').tz_localize(None)
+        return cls(index.to_numpy('datetime64[ns]'), df['Open'].to_numpy(), df['High'].to_numpy(),
+                   df['Low'].to_numpy(), df['Close'].to_numpy(),
+                   df['Volume'].to_numpy() if 'Volume' in df else None, dtype=dtype, tz=tz)
+
+    def to_frame(self) -> pd.DataFrame:
+        """آداپتور DataFrame برای نمایش در Streamlit"""
+        index = pd.DatetimeIndex(self.index)
+        if self.tz is not None:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        return pd.DataFrame(self.columns, index=index)
+
+    # ---------- دسترسی شبیه DataFrame ----------
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def empty(self):
+        return len(self.index) == 0
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __setitem__(self, name, values):
+        values = np.asarray(values, dtype=self.dtype)
+        if values.shape != self.index.shape:
+            raise ValueError(f"{name}: طول {len(values)} با {len(self.index)} کندل برابر نیست")
+        self.columns[name] = values
+
+    def _view(self, sl):
+        out = BarSeries.__new__(BarSeries)
+        out.dtype, out.tz = self.dtype, self.tz
+        out.index = self.index[sl]
+        out.columns = {k: v[sl] for k, v in self.columns.items()}
+        return out
+
+    def copy(self):
+        """کپی سطحی: آرایه‌ها مشترک‌اند ولی ستون‌های جدید روی نسخه‌ی اصلی نوشته نمی‌شوند"""
+        return self._view(slice(None))
+
+    def tail(self, n):
+        return self._view(slice(max(len(self) - n, 0), None))
+
+    def head(self, n):
+        return self._view(slice(0, n))
+
+    def last_row(self) -> dict:
+        """معادل df.iloc[-1] به صورت dict"""
+        return {k: v[-1].item() for k, v in self.columns.items()}
+
+    @property
+    def nbytes(self):
+        return self.index.nbytes + sum(v.nbytes for v in self.columns.values())
+
+    # ---------- ذخیره / memory-map ----------
+    def save(self, path):
+        """هر ستون در یک فایل .npy؛ با load(mmap=True) بدون کپی خوانده می‌شود"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'index.npy'), self.index.view('int64'))
+        for name, values in self.columns.items():
+            np.save(os.path.join(path, f'{name}.npy'), values)
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'tz': self.tz, 'dtype': self.dtype.str, 'columns': list(self.columns)}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        mode = 'r' if mmap else None
+        out = cls.__new__(cls)
+        out.dtype, out.tz = np.dtype(meta['dtype']), meta['tz']
+        out.index = np.load(os.path.join(path, 'index.npy'), mmap_mode=mode).view('datetime64[ns]')
+        out.columns = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode) for name in meta['columns']}
+        return out
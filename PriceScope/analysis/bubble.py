@@ -0,0 +1,174 @@
+# analysis/bubble.py
+import numpy as np
+import pandas as pd
+
+from config import BUBBLE_MAX_AGE, BUBBLE_WINDOW
+
+OUNCE_TO_GRAM = 31.103431
+PURITY_18K = 0.75
+SOURCES = ('ounce', 'usd', 'gram18')
+COLUMNS = SOURCES + ('intrinsic', 'bubble')
+
+
+def intrinsic_gram18(ounce_usd, usd_rate):
+    """ارزش ذاتی هر گرم ۱۸ عیار به واحد usd_rate (ریال یا تومان)؛ روی اسکالر و آرایه کار می‌کند"""
+    return np.divide(ounce_usd, OUNCE_TO_GRAM) * PURITY_18K * usd_rate
+
+
+def _utc_series(s, name):
+    s = pd.Series(s, dtype=float, name=name).dropna()
+    index = pd.DatetimeIndex(s.index)
+    index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+    s.index = index.as_unit('ns')
+    return s[~s.index.duplicated(keep='last')].sort_index()
+
+
+def align_quotes(series: dict, max_age=None, index=None) -> pd.DataFrame:
+    """
+    هم‌ترازی چند سری قیمت روی یک ساعت مشترک (as-of join: آخرین قیمت تا آن لحظه).
+    قیمتی که از max_age[name] ثانیه قدیمی‌تر باشد NaN می‌شود.
+    index پیش‌فرض اجتماع زمان‌های همه‌ی سری‌هاست.
+    """
+    max_age = {**BUBBLE_MAX_AGE, **(max_age or {})}
+    series = {name: _utc_series(s, name) for name, s in series.items()}
+    if index is None:
+        index = pd.DatetimeIndex(np.unique(np.concatenate([s.index.asi8 for s in series.values()])), tz='UTC')
+    index = pd.DatetimeIndex(index)
+    index = (index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')).as_unit('ns')
+    out = pd.DataFrame(index=index)
+    left = pd.DataFrame({'ts': index})
+    for name, s in series.items():
+        right = pd.DataFrame({'ts': s.index, name: s.to_numpy()})
+        tolerance = pd.Timedelta(seconds=max_age[name]) if name in max_age else None
+        merged = pd.merge_asof(left, right, on='ts', direction='backward', tolerance=tolerance)
+        out[name] = merged[name].to_numpy()
+    return out
+
+
+def bubble_series(ounce, usd, gram18, max_age=None, index=None) -> pd.DataFrame:
+    """
+    حباب گرم ۱۸ عیار روی کل تاریخچه (برداری).
+    ounce: قیمت اونس به دلار (مثلاً Close کندل‌های GC=F)، usd و gram18: قیمت‌های بازار آزاد با یک واحد.
+    ستون‌ها: ounce, usd, gram18, intrinsic, bubble, bubble_pct (NaN جایی که یکی از قیمت‌ها کهنه است)
+    """
+    df = align_quotes({'ounce': ounce, 'usd': usd, 'gram18': gram18}, max_age, index)
+    df['intrinsic'] = intrinsic_gram18(df['ounce'].to_numpy(), df['usd'].to_numpy())
+    df['bubble'] = df['gram18'] - df['intrinsic']
+    df['bubble_pct'] = df['bubble'] / df['intrinsic'] * 100
+    return df
+
+
+def rolling_stats(bubble, window=BUBBLE_WINDOW) -> pd.DataFrame:
+    """z-score و صدک (0..1) هر نقطه نسبت به window نقطه‌ی اخیر"""
+    s = pd.Series(bubble, dtype=float)
+    roll = s.rolling(window, min_periods=2)
+    return pd.DataFrame({
+        'zscore': (s - roll.mean()) / roll.std(),
+        'percentile': roll.rank(pct=True),
+    }, index=s.index)
+
+
+def _to_ns(ts):
+    ts = pd.Timestamp(ts)
+    return (ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')).value
+
+
+class BubbleTracker:
+    """
+    همان bubble_series به صورت افزایشی: هر قیمت تازه با update() ثبت می‌شود و اگر هر سه منبع
+    تازه باشند یک نقطه‌ی حباب اضافه (یا نقطه‌ی همان لحظه به‌روز) می‌شود.
+    داده‌ها در آرایه‌های NumPy با ظرفیت دوبرابرشونده نگه داشته می‌شوند (۴۸ بایت برای هر نقطه).
+    """
+
+    def __init__(self, max_age=None, window=BUBBLE_WINDOW, capacity=4096):
+        max_age = {**BUBBLE_MAX_AGE, **(max_age or {})}
+        self.max_age = {name: int(max_age[name] * 1e9) for name in SOURCES}
+        self.window = window
+        self.n = 0
+        self._ts = np.empty(capacity, dtype=np.int64)
+        self._cols = {name: np.empty(capacity) for name in COLUMNS}
+        self._last = {name: (None, np.nan) for name in SOURCES}
+
+    @classmethod
+    def from_frame(cls, df, max_age=None, window=BUBBLE_WINDOW):
+        """شروع از خروجی bubble_series (ردیف‌های ناقص کنار گذاشته می‌شوند)"""
+        df = df.dropna(subset=list(COLUMNS))
+        tracker = cls(max_age, window, capacity=max(4096, 2 * len(df)))
+        n = len(df)
+        tracker._ts[:n] = df.index.asi8
+        for name in COLUMNS:
+            tracker._cols[name][:n] = df[name].to_numpy()
+        tracker.n = n
+        if n:
+            for name in SOURCES:
+                tracker._last[name] = (int(tracker._ts[n - 1]), float(tracker._cols[name][n - 1]))
+        return tracker
+
+    def _grow(self):
+        size = 2 * len(self._ts)
+        self._ts = np.resize(self._ts, size)
+        self._cols = {name: np.resize(values, size) for name, values in self._cols.items()}
+
+    def update(self, source, ts, price):
+        """
+        ثبت قیمت تازه‌ی source ('ounce'، 'usd' یا 'gram18').
+        خروجی: dict نقطه‌ی حباب ثبت‌شده، یا None اگر منبعی کهنه/خالی بود یا قیمت از آخرین نقطه قدیمی‌تر بود.
+        """
+        ts = _to_ns(ts)
+        last_ts = self._last[source][0]
+        if last_ts is None or ts >= last_ts:
+            self._last[source] = (ts, float(price))
+        if self.n and ts < self._ts[self.n - 1]:
+            return None
+        values = {}
+        for name in SOURCES:
+            seen, value = self._last[name]
+            if seen is None or ts - seen > self.max_age[name] or value != value:
+                return None
+            values[name] = value
+        values['intrinsic'] = float(intrinsic_gram18(values['ounce'], values['usd']))
+        values['bubble'] = values['gram18'] - values['intrinsic']
+
+        if not (self.n and self._ts[self.n - 1] == ts):
+            if self.n == len(self._ts):
+                self._grow()
+            self.n += 1
+        i = self.n - 1
+        self._ts[i] = ts
+        for name, value in values.items():
+            self._cols[name][i] = value
+        return values
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, name):
+        return self._cols[name][:self.n]
+
+    @property
+    def index(self):
+        return pd.DatetimeIndex(self._ts[:self.n], tz='UTC')
+
+    def to_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame({name: self[name] for name in COLUMNS}, index=self.index)
+        df['bubble_pct'] = df['bubble'] / df['intrinsic'] * 100
+        return df
+
+    def stats(self) -> dict:
+        """آخرین حباب با z-score و صدک آن در window نقطه‌ی اخیر (همان تعریف rolling_stats)"""
+        if self.n == 0:
+            return {}
+        w = self['bubble'][-self.window:]
+        last = float(w[-1])
+        less = np.count_nonzero(w < last)
+        equal = np.count_nonzero(w == last)
+        std = w.std(ddof=1) if len(w) > 1 else np.nan
+        return {
+            'time': pd.Timestamp(int(self._ts[self.n - 1]), tz='UTC'),
+            'bubble': last,
+            'bubble_pct': last / float(self['intrinsic'][-1]) * 100,
+            'intrinsic': float(self['intrinsic'][-1]),
+            'zscore': float((last - w.mean()) / std) if std == std and std > 0 else np.nan,
+            'percentile': float(less + (equal + 1) / 2) / len(w) if len(w) > 1 else np.nan,
+            'points': self.n,
+        }
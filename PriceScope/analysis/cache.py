@@ -0,0 +1,61 @@
+# analysis/cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from config import BAR_REFRESH_SECONDS, INTERVAL_SECONDS
+
+_MISSING = object()
+
+
+def interval_ttl(interval):
+    """عمر کندل‌های کش‌شده: یک کندل از همان interval، حداکثر BAR_REFRESH_SECONDS"""
+    return min(INTERVAL_SECONDS.get(interval, 60), BAR_REFRESH_SECONDS)
+
+
+class LRUCache:
+    """کش LRU با اندازه‌ی محدود و TTL اختیاری برای هر مقدار (امن برای چند نخ)"""
+
+    def __init__(self, maxsize=32, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and (item[0] is None or item[0] > time.monotonic()):
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not _MISSING:
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (None if ttl is None else time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute, ttl=None):
+        """خروجی: (value, hit)"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value, True
+        value = compute()
+        self.put(key, value, ttl)
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
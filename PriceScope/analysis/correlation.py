@@ -0,0 +1,246 @@
+# analysis/correlation.py
+# همبستگی، بتا و نسبت قیمت (مثل طلا/نقره) بین نمادهای یک واچ‌لیست.
+# Close همه‌ی نمادها در یک آرایه‌ی دوبعدی (زمان × نماد) کنار هم قرار می‌گیرد و جمع‌های پنجره‌ای لازم برای
+# کوواریانس همه‌ی جفت‌ها یک‌جا (cumsum برای سری زمانی، ضرب ماتریسی برای آخرین کندل) حساب می‌شوند.
+# بازده‌ها لگاریتمی‌اند؛ هر جفت فقط روی کندل‌هایی که هر دو نماد داده دارند مقایسه می‌شود.
+import numpy as np
+import pandas as pd
+
+from config import CORR_WINDOW, DEFAULT_PERIOD, INTERVAL_SECONDS
+from analysis.data_fetcher import fetch_data
+from analysis.pipeline import fetch_many
+
+CHUNK_PAIRS = 256   # تعداد جفت‌ها در هر گذر rolling_pairs (آرایه‌های موقت زمان × CHUNK_PAIRS)
+
+
+def align_closes(frames: dict, interval="1d") -> pd.DataFrame:
+    """
+    ستون Close هر نماد روی یک index مشترک (اجتماع زمان‌ها؛ جای خالی NaN).
+    برای interval روزانه و درشت‌تر تاریخ تقویمی ملاک است تا بورس‌های با منطقه‌ی زمانی متفاوت هم‌تراز شوند.
+    """
+    series = {}
+    for symbol, df in frames.items():
+        s = df['Close'].astype(float)
+        index = pd.DatetimeIndex(s.index)
+        if INTERVAL_SECONDS.get(interval, 86400) >= 86400:
+            index = (index.tz_localize(None) if index.tz is not None else index).normalize()
+        elif index.tz is None:
+            index = index.tz_localize('UTC')
+        s.index = index
+        series[symbol] = s[~s.index.duplicated(keep='last')]
+    return pd.concat(series, axis=1).sort_index()
+
+
+def fetch_closes(symbols, period=DEFAULT_PERIOD, interval="1d", source=fetch_data):
+    """دانلود هم‌زمان نمادها با همان مسیر fetch_many؛ خروجی (closes, errors)"""
+    frames, errors = fetch_many(symbols, period, interval, source=source)
+    closes = align_closes({s: frames[s] for s in symbols if s in frames}, interval)
+    return closes, errors
+
+
+def log_returns(closes) -> np.ndarray:
+    """بازده لگاریتمی هر ستون نسبت به آخرین قیمت موجود همان نماد (NaN جایی که قیمت نیست)"""
+    logp = np.log(np.asarray(closes, dtype=np.float64))
+    filled = pd.DataFrame(logp).ffill().to_numpy()
+    out = np.full_like(logp, np.nan)
+    out[1:] = logp[1:] - filled[:-1]
+    return out
+
+
+def _window_sums(a, window):
+    """جمع window ردیف اخیر برای هر ستون (ردیف‌های ابتدایی: جمع همه‌ی ردیف‌های قبلی)"""
+    c = np.cumsum(a, axis=0)
+    out = np.empty_like(c)
+    out[:window] = c[:window]
+    np.subtract(c[window:], c[:-window], out=out[window:])
+    return out
+
+
+def _stats(n, sx, sy, sxx, syy, sxy, min_periods):
+    """(corr, beta) از جمع‌های جفتی؛ beta شیب رگرسیون اولی روی دومی است"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = (sxy - sx * sy / n) / (n - 1)
+        vx = (sxx - sx * sx / n) / (n - 1)
+        vy = (syy - sy * sy / n) / (n - 1)
+        corr = cov / np.sqrt(vx * vy)
+        beta = cov / vy
+    bad = n < max(min_periods, 2)
+    corr[bad] = np.nan
+    beta[bad] = np.nan
+    return np.clip(corr, -1.0, 1.0), beta
+
+
+def pair_index(n):
+    """اندیس جفت‌های (i, j) با i < j"""
+    return np.triu_indices(n, k=1)
+
+
+def rolling_pairs(closes: pd.DataFrame, window=CORR_WINDOW, pairs=None, min_periods=None, dtype=np.float32) -> dict:
+    """
+    سری زمانی همبستگی و بتای بازده‌ها و نسبت قیمت برای جفت‌ها (پیش‌فرض همه‌ی N(N-1)/2 جفت).
+    pairs: فهرست (a, b) از نام ستون‌ها. خروجی: {'pairs', 'index', 'corr', 'beta', 'ratio'}
+    که سه آرایه‌ی آخر (زمان × جفت) هستند؛ beta یعنی بتای a نسبت به b و ratio یعنی a / b.
+    """
+    min_periods = window if min_periods is None else min_periods
+    names = list(closes.columns)
+    if pairs is None:
+        ii, jj = pair_index(len(names))
+    else:
+        pos = {name: k for k, name in enumerate(names)}
+        ii = np.array([pos[a] for a, _ in pairs], dtype=np.intp)
+        jj = np.array([pos[b] for _, b in pairs], dtype=np.intp)
+    prices = closes.to_numpy(np.float64)
+    returns = log_returns(prices)
+    valid = ~np.isnan(returns)
+    r0 = np.where(valid, returns, 0.0)
+    t, p = len(prices), len(ii)
+    out = {name: np.empty((t, p), dtype=dtype) for name in ('corr', 'beta', 'ratio')}
+
+    # نمادهای بدون جای خالی: جمع‌ها و واریانس هر نماد یک بار حساب می‌شود و برای جفت‌های آن‌ها
+    # فقط جمع حاصل‌ضرب بازده‌ها جفتی است. جفت‌های دارای NaN جمع‌های جفتی کامل لازم دارند.
+    clean = valid[1:].all(axis=0)
+    both = clean[ii] & clean[jj]
+    if both.any():
+        n = _window_sums(valid[:, clean.argmax()].astype(np.float64)[:, None], window)
+        sx = _window_sums(r0, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (_window_sums(r0 * r0, window) - sx * sx / n) / (n - 1)
+            sd = np.sqrt(var)
+        bad = (n < max(min_periods, 2))[:, 0]
+        cols = np.flatnonzero(both)
+        for lo in range(0, len(cols), CHUNK_PAIRS):
+            k = cols[lo:lo + CHUNK_PAIRS]
+            i, j = ii[k], jj[k]
+            cov = _window_sums(r0[:, i] * r0[:, j], window)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cov -= sx[:, i] * sx[:, j] / n
+                cov /= n - 1
+                beta = cov / var[:, j]
+                cov /= sd[:, i]
+                cov /= sd[:, j]
+            cov[bad] = np.nan
+            beta[bad] = np.nan
+            out['corr'][:, k] = np.clip(cov, -1.0, 1.0)
+            out['beta'][:, k] = beta
+
+    cols = np.flatnonzero(~both)
+    for lo in range(0, len(cols), CHUNK_PAIRS):
+        k = cols[lo:lo + CHUNK_PAIRS]
+        i, j = ii[k], jj[k]
+        m = (valid[:, i] & valid[:, j]).astype(np.float64)
+        x = r0[:, i] * m
+        y = r0[:, j] * m
+        sums = [_window_sums(a, window) for a in (m, x, y, x * x, y * y, x * y)]
+        out['corr'][:, k], out['beta'][:, k] = _stats(*sums, min_periods)
+
+    for lo in range(0, p, CHUNK_PAIRS):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out['ratio'][:, lo:lo + CHUNK_PAIRS] = prices[:, ii[lo:lo + CHUNK_PAIRS]] / prices[:, jj[lo:lo + CHUNK_PAIRS]]
+    out['pairs'] = [(names[a], names[b]) for a, b in zip(ii.tolist(), jj.tolist())]
+    out['index'] = closes.index
+    return out
+
+
+def pair_frame(result, a, b) -> pd.DataFrame:
+    """ستون‌های corr/beta/ratio یک جفت از خروجی rolling_pairs"""
+    k = result['pairs'].index((a, b))
+    return pd.DataFrame({name: result[name][:, k] for name in ('corr', 'beta', 'ratio')}, index=result['index'])
+
+
+class CorrelationTracker:
+    """
+    ماتریس‌های N×N همبستگی، بتا، نسبت قیمت و قدرت نسبی در آخرین کندل، با به‌روزرسانی افزایشی:
+    update() برای هر کندل جدید فقط ردیف تازه را اضافه و ردیف خارج‌شده از پنجره را کم می‌کند (O(N²)).
+    برای جلوگیری از انباشت خطای جمع و تفریق، هر window به‌روزرسانی جمع‌ها از نو ساخته می‌شوند.
+    """
+
+    def __init__(self, closes: pd.DataFrame, window=CORR_WINDOW, min_periods=None):
+        self.symbols = list(closes.columns)
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        prices = closes.to_numpy(np.float64)
+        returns = log_returns(prices)
+        logp = pd.DataFrame(np.log(prices)).ffill().to_numpy()
+        n = len(self.symbols)
+        # بافر حلقوی بازده‌ها (window ردیف) و لگاریتم قیمت (window+1 ردیف، با ffill)
+        self._returns = np.full((window, n), np.nan)
+        self._logp = np.full((window + 1, n), np.nan)
+        tail = returns[-window:]
+        self._returns[window - len(tail):] = tail
+        tail = logp[-(window + 1):]
+        self._logp[window + 1 - len(tail):] = tail
+        self._pos = 0              # جای ردیف بعدی (قدیمی‌ترین ردیف)
+        self.prices = prices[-1].copy() if len(prices) else np.full(n, np.nan)
+        self.index = closes.index[-1] if len(closes) else None
+        self.updates = 0
+        self._rebuild()
+
+    # ---------- جمع‌ها ----------
+    def _rebuild(self):
+        r = self._returns
+        m = (~np.isnan(r)).astype(np.float64)
+        x = np.where(m > 0, r, 0.0)
+        self._n = m.T @ m
+        self._sx = x.T @ m              # _sx[i, j]: جمع بازده i روی کندل‌هایی که j هم داده دارد
+        self._sxx = (x * x).T @ m
+        self._sxy = x.T @ x
+
+    def _apply(self, row, sign):
+        m = (~np.isnan(row)).astype(np.float64)
+        x = np.where(m > 0, row, 0.0)
+        self._n += sign * np.outer(m, m)
+        self._sx += sign * np.outer(x, m)
+        self._sxx += sign * np.outer(x * x, m)
+        self._sxy += sign * np.outer(x, x)
+
+    def update(self, prices, index=None):
+        """
+        کندل جدید: prices آرایه/‌dict قیمت Close هر نماد (NaN یا نبودن در dict یعنی بدون داده).
+        """
+        if isinstance(prices, dict):
+            prices = [prices.get(s, np.nan) for s in self.symbols]
+        prices = np.asarray(prices, dtype=np.float64)
+        logp = np.log(prices)
+        last = self._logp[(self._pos - 1) % (self.window + 1)]
+        row = logp - last
+        self._apply(self._returns[self._pos % self.window], -1.0)
+        self._apply(row, 1.0)
+        self._returns[self._pos % self.window] = row
+        self._logp[self._pos % (self.window + 1)] = np.where(np.isnan(logp), last, logp)
+        self._pos += 1
+        self.prices = np.where(np.isnan(prices), self.prices, prices)
+        self.index = index
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self._rebuild()
+
+    def _ordered(self, ring):
+        """ردیف‌های بافر حلقوی به ترتیب زمان"""
+        k = self._pos % len(ring)
+        return np.concatenate([ring[k:], ring[:k]])
+
+    # ---------- خروجی‌ها ----------
+    def _frame(self, values):
+        return pd.DataFrame(values, index=self.symbols, columns=self.symbols)
+
+    def matrices(self):
+        """(corr, beta) به صورت آرایه‌ی N×N؛ beta[i, j] بتای i نسبت به j"""
+        corr, beta = _stats(self._n, self._sx, self._sx.T, self._sxx, self._sxx.T, self._sxy, self.min_periods)
+        return corr, beta
+
+    def corr(self) -> pd.DataFrame:
+        return self._frame(self.matrices()[0])
+
+    def beta(self) -> pd.DataFrame:
+        return self._frame(self.matrices()[1])
+
+    def ratio(self) -> pd.DataFrame:
+        """نسبت آخرین قیمت‌ها: ratio[i, j] = price_i / price_j"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._frame(self.prices[:, None] / self.prices[None, :])
+
+    def relative_strength(self) -> pd.DataFrame:
+        """تفاوت بازده لگاریتمی window کندل اخیر: rs[i, j] > 0 یعنی i از j قوی‌تر بوده"""
+        logp = self._ordered(self._logp)
+        change = logp[-1] - logp[0]
+        return self._frame(change[:, None] - change[None, :])
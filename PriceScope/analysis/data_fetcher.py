@@ -1,11 +1,42 @@
 ﻿# analysis/data_fetcher.py
-import yfinance as yf
 import pandas as pd
 
-def fetch_data(symbol, period="6mo", interval="1d"):
-    """دانلود دیتا از yfinance و اصلاح MultiIndex"""
-    df = yf.download(symbol, period=period, interval=interval, progress=False)
+from config import BAR_STORE_DIR
+from analysis.bar_store import BarStore
+from analysis.profiling import span
+
+def clean_frame(df):
+    """حذف NaN و اصلاح MultiIndex ستون‌ها"""
     df.dropna(inplace=True)
     # اصلاح ستون‌ها اگر MultiIndex هستند
     df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
     return df
+
+def download(symbol, interval="1d", period=None, start=None):
+    """دانلود مستقیم از yfinance (بدون انبار محلی)"""
+    # import دیرهنگام: yfinance حدود 0.3 ثانیه زمان شروع دارد و وقتی دیتا از انبار می‌آید لازم نیست
+    import yfinance as yf
+    with span('fetch.download') as s:
+        if start is not None:
+            df = yf.download(symbol, start=start, interval=interval, progress=False)
+        else:
+            df = yf.download(symbol, period=period, interval=interval, progress=False)
+        s.rows = len(df)
+    with span('fetch.clean', rows=len(df)):
+        return clean_frame(df)
+
+_store = None
+
+def default_store():
+    global _store
+    if _store is None:
+        _store = BarStore(BAR_STORE_DIR, downloader=download)
+    return _store
+
+def fetch_data(symbol, period="6mo", interval="1d", store=None):
+    """دانلود دیتا از yfinance و اصلاح MultiIndex؛ با انبار محلی فقط کندل‌های جدید دانلود می‌شوند"""
+    store = store or default_store()
+    with span('fetch') as s:
+        df = store.get(symbol, period, interval)
+        s.rows = len(df)
+    return df
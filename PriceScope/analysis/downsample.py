@@ -0,0 +1,57 @@
+# analysis/downsample.py
+import numpy as np
+
+CHART_POINTS = 2000
+
+
+def lttb_indices(y, n_out=CHART_POINTS, x=None):
+    """
+    Largest-Triangle-Three-Buckets: اندیس n_out نقطه که شکل سری (قله‌ها و دره‌ها) را حفظ می‌کنند.
+    نقطه‌ی اول و آخر همیشه نگه داشته می‌شوند.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    # مرز سطل‌ها؛ سطل «بعدیِ» آخرین سطل فقط نقطه‌ی آخر است
+    edges = (np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges = np.append(edges, n)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi, nxt = edges[i], edges[i + 1], edges[i + 2]
+        avg_x = x[hi:nxt].mean()
+        avg_y = y[hi:nxt].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        out[i + 1] = a
+    return out
+
+
+def minmax_indices(y, n_out=CHART_POINTS):
+    """کمینه و بیشینه‌ی هر سطل (n_out/2 سطل)؛ کاملاً برداری و با حفظ همه‌ی قله‌ها"""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    buckets = max(n_out // 2, 1)
+    if n <= n_out:
+        return np.arange(n)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(buckets, size)
+    valid = ~np.isnan(blocks).all(axis=1)
+    starts = np.arange(buckets) * size
+    filled = np.where(np.isnan(blocks), 0.0, blocks)
+    lo = starts + np.where(np.isnan(blocks), np.inf, filled).argmin(axis=1)
+    hi = starts + np.where(np.isnan(blocks), -np.inf, filled).argmax(axis=1)
+    idx = np.concatenate([lo[valid], hi[valid], [0, n - 1]])
+    return np.unique(idx[idx < n])
+
+
+def downsample_frame(df, n_out=CHART_POINTS, column='Close', method='lttb'):
+    """ردیف‌های انتخاب‌شده بر اساس یک ستون؛ بقیه‌ی ستون‌ها (MA ها) با همان اندیس‌ها برداشته می‌شوند"""
+    pick = lttb_indices if method == 'lttb' else minmax_indices
+    return df.iloc[pick(df[column].to_numpy(float), n_out)]
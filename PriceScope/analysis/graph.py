@@ -0,0 +1,194 @@
+# analysis/graph.py
+# گراف اعلانی اندیکاتورها: هر خروجی (MA_fast، ATR، recent_high، ...) یک گره با وابستگی‌ها و پارامترهای
+# نام‌دار است. کلید هر گره از تابع، کلید وابستگی‌ها و مقدار پارامترهایش ساخته می‌شود، پس زیرعبارت‌های
+# مشترک (TR چند ATR، دو میانگین با یک پنجره، ...) یک‌بار حساب می‌شوند و نتیجه‌ی هر گره با
+# (اثر انگشت داده، کلید گره) کش می‌شود؛ تغییر یک پارامتر فقط گره‌های پایین‌دست آن را دوباره حساب می‌کند.
+import hashlib
+
+import numpy as np
+
+from config import MA_FAST, MA_SLOW, ATR_PERIOD, DEFAULT_LOOKBACK
+from analysis.cache import LRUCache
+from analysis.kernels import fused_indicators, true_range
+from analysis.scenarios import scenarios_from_values
+from analysis.swings import find_swings, structure_from_pivots
+
+SOURCES = ('High', 'Low', 'Close')
+
+DEFAULT_PARAMS = {
+    'fast': MA_FAST,
+    'slow': MA_SLOW,
+    'atr_period': ATR_PERIOD,
+    'lookback': DEFAULT_LOOKBACK,
+    'order': 1,
+    'min_prominence': 0.0,
+}
+
+
+class Node:
+    """fn(*deps, **{kwarg: params[name]}) برای هر (kwarg, name) در params"""
+
+    __slots__ = ('name', 'fn', 'deps', 'params')
+
+    def __init__(self, name, fn, deps=(), params=None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.params = dict(params or {})
+
+
+NODES = {}
+
+
+def node(name, *deps, **params):
+    """ثبت تابع به عنوان گره‌ی name:  @node('ATR', 'TR', n='atr_period')"""
+    def register(fn):
+        NODES[name] = Node(name, fn, deps, params)
+        return fn
+    return register
+
+
+# ---------------- گره‌ها ----------------
+node('TR', 'High', 'Low', 'Close')(true_range)
+
+
+def _window_mean(x, n):
+    # همان rolling(n, min_periods=1).mean() هسته‌ی kernels.py (با JIT برای سری‌های بلند)
+    return fused_indicators(x, x, x, fast=n)['MA_fast']
+
+
+node('ATR', 'TR', n='atr_period')(_window_mean)
+node('MA_fast', 'Close', n='fast')(_window_mean)
+node('MA_slow', 'Close', n='slow')(_window_mean)
+
+
+@node('recent_high', 'High', n='lookback')
+def _tail_max(x, n):
+    return float(np.nanmax(x[-n:]))
+
+
+@node('recent_low', 'Low', n='lookback')
+def _tail_min(x, n):
+    return float(np.nanmin(x[-n:]))
+
+
+@node('levels', 'recent_high', 'recent_low')
+def _levels(recent_high, recent_low):
+    rng = recent_high - recent_low
+    return {
+        'recent_high': recent_high,
+        'recent_low': recent_low,
+        'resistance_2': recent_high + 0.5*rng,
+        'support_2': recent_low - 0.5*rng
+    }
+
+
+@node('market_structure', 'High', 'Low', order='order', min_prominence='min_prominence')
+def _structure(high, low, order, min_prominence):
+    peaks, valleys = find_swings(high, low, order, min_prominence)
+    return structure_from_pivots(high[peaks], low[valleys])
+
+
+def _last(x):
+    return float(x[-1])
+
+
+node('price', 'Close')(_last)
+node('ma_fast', 'MA_fast')(_last)
+node('ma_slow', 'MA_slow')(_last)
+node('atr', 'ATR')(_last)
+
+
+@node('scenarios', 'price', 'ma_fast', 'ma_slow', 'atr', 'levels', 'market_structure')
+def _scenarios(price, ma_fast, ma_slow, atr, levels, struct):
+    return scenarios_from_values(price, ma_fast, ma_slow, atr, levels, struct)
+
+
+# ---------------- موتور ----------------
+def fingerprint(data) -> tuple:
+    """اثر انگشت ستون‌های High/Low/Close (طول و blake2b بایت‌ها)"""
+    h = hashlib.blake2b(digest_size=16)
+    for name in SOURCES:
+        h.update(np.ascontiguousarray(data[name], dtype=np.float64).tobytes())
+    return len(data), h.hexdigest()
+
+
+class IndicatorGraph:
+    """
+    graph = IndicatorGraph()
+    out = graph.evaluate(df, ['MA_fast', 'ATR', 'levels'], {'fast': 20, 'lookback': 30})
+    فقط گره‌های لازم برای outputs ارزیابی می‌شوند. key اثر انگشت داده است (پیش‌فرض fingerprint(data)؛
+    اگر فراخواننده نسخه‌ی داده را می‌داند همان را بدهد تا هش لازم نباشد، ولی key باید با هر تغییر محتوا عوض
+    شود: کندل نیمه‌کاره‌ی آخر با همان زمان به‌روز می‌شود، پس (symbol, len, آخرین زمان) کافی نیست؛
+    pipeline.bars_version محتوای آخرین کندل را هم دارد).
+    مقدارها بین فراخوانی‌ها مشترک‌اند؛ dict/آرایه‌های خروجی را تغییر ندهید (کپی بگیرید).
+    """
+
+    def __init__(self, nodes=None, maxsize=256):
+        self.nodes = NODES if nodes is None else nodes
+        self.memo = LRUCache(maxsize)
+
+    def plan(self, outputs, params=None):
+        """
+        (order, keys): order ترتیب ارزیابی [(کلید گره، Node، کلید وابستگی‌ها), ...] که گره‌های هم‌کلید
+        (زیرعبارت مشترک) در آن یک‌بار می‌آیند، و keys کلید هر نام در outputs. کلید منبع‌ها ('src', name) است.
+        """
+        params = {**DEFAULT_PARAMS, **(params or {})}
+        order, keys = [], {}
+        seen = set()
+
+        def visit(name):
+            if name in keys:
+                return keys[name]
+            if name in SOURCES:
+                keys[name] = ('src', name)
+                return keys[name]
+            nd = self.nodes[name]
+            dep_keys = tuple(visit(d) for d in nd.deps)
+            key = (nd.fn.__qualname__, dep_keys, tuple(sorted((k, params[p]) for k, p in nd.params.items())))
+            keys[name] = key
+            if key not in seen:
+                seen.add(key)
+                order.append((key, nd, dep_keys))
+            return key
+
+        for name in outputs:
+            visit(name)
+        return order, {name: keys[name] for name in outputs}
+
+    def evaluate(self, data, outputs, params=None, key=None, computed=None) -> dict:
+        """
+        {name: مقدار} برای هر نام در outputs. گره‌ای که در کش باشد وابستگی‌هایش را هم لازم ندارد.
+        computed (اختیاری) فهرستی است که نام گره‌های واقعاً محاسبه‌شده به آن اضافه می‌شود.
+        """
+        params = {**DEFAULT_PARAMS, **(params or {})}
+        order, out_keys = self.plan(outputs, params)
+        graph = {k: (nd, dep_keys) for k, nd, dep_keys in order}
+        fp = fingerprint(data) if key is None else key
+        values = {}
+
+        def get(k):
+            if k in values:
+                return values[k]
+            if k[0] == 'src':
+                value = np.ascontiguousarray(data[k[1]], dtype=np.float64)
+            else:
+                value = self.memo.get((fp, k))
+                if value is None:
+                    nd, dep_keys = graph[k]
+                    value = nd.fn(*[get(d) for d in dep_keys], **{kw: params[p] for kw, p in nd.params.items()})
+                    self.memo.put((fp, k), value)
+                    if computed is not None:
+                        computed.append(nd.name)
+            values[k] = value
+            return value
+
+        return {name: get(k) for name, k in out_keys.items()}
+
+
+_graph = IndicatorGraph()
+
+
+def evaluate(data, outputs, params=None, key=None, computed=None) -> dict:
+    """evaluate روی گراف مشترک ماژول"""
+    return _graph.evaluate(data, outputs, params, key, computed)
@@ -2,22 +2,45 @@
 import pandas as pd
 import numpy as np
 
+from analysis.bars import BarSeries
+from analysis.kernels import fused_indicators
+from analysis.profiling import profiled
+from analysis.swings import find_swings, structure_from_pivots
+
+def _rows(df, *args, **kwargs):
+    """تعداد کندل‌ها برای برچسب rows در profiled"""
+    return len(df)
+
+@profiled('indicators.atr', rows=_rows)
 def atr(df: pd.DataFrame, n:int=14) -> pd.Series:
-    high_low = df['High'] - df['Low']
-    high_close = (df['High'] - df['Close'].shift()).abs()
-    low_close = (df['Low'] - df['Close'].shift()).abs()
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    return tr.rolling(n, min_periods=1).mean()
+    values = fused_indicators(df['High'], df['Low'], df['Close'], atr_period=n)['ATR']
+    return values if isinstance(df, BarSeries) else pd.Series(values, index=df.index)
 
+@profiled('indicators.moving_averages', rows=_rows)
 def moving_averages(df: pd.DataFrame, fast=20, slow=50):
-    df['MA_fast'] = df['Close'].rolling(fast, min_periods=1).mean()
-    df['MA_slow'] = df['Close'].rolling(slow, min_periods=1).mean()
+    out = fused_indicators(df['Close'], df['Close'], df['Close'], fast=fast, slow=slow)
+    df['MA_fast'] = out['MA_fast']
+    df['MA_slow'] = out['MA_slow']
+    return df
+
+@profiled('indicators.add_indicators', rows=_rows)
+def add_indicators(df: pd.DataFrame, fast=20, slow=50, atr_period=14):
+    """moving_averages و atr با هم در یک گذر (analysis/kernels.py)؛ ستون‌های MA_fast، MA_slow و ATR"""
+    out = fused_indicators(df['High'], df['Low'], df['Close'], fast, slow, atr_period)
+    df['MA_fast'] = out['MA_fast']
+    df['MA_slow'] = out['MA_slow']
+    df['ATR'] = out['ATR']
     return df
 
+@profiled('indicators.levels', rows=_rows)
 def support_resistance_levels(df: pd.DataFrame, lookback:int=30) -> dict:
     last = df.tail(lookback)
-    recent_high = float(last['High'].max())
-    recent_low = float(last['Low'].min())
+    if isinstance(last, BarSeries):
+        recent_high = float(np.nanmax(last['High']))
+        recent_low = float(np.nanmin(last['Low']))
+    else:
+        recent_high = float(last['High'].max())
+        recent_low = float(last['Low'].min())
     rng = recent_high - recent_low
     return {
         'recent_high': recent_high,
@@ -26,16 +49,10 @@ def support_resistance_levels(df: pd.DataFrame, lookback:int=30) -> dict:
         'support_2': recent_low - 0.5*rng
     }
 
-def market_structure(df: pd.DataFrame) -> dict:
-    peaks = (df['High'] > df['High'].shift(1)) & (df['High'] > df['High'].shift(-1))
-    valleys = (df['Low'] < df['Low'].shift(1)) & (df['Low'] < df['Low'].shift(-1))
-    peak_vals = df['High'][peaks]
-    valley_vals = df['Low'][valleys]
-    last_peak = float(peak_vals.iloc[-1]) if len(peak_vals) > 0 else np.nan
-    prev_peak = float(peak_vals.iloc[-2]) if len(peak_vals) > 1 else np.nan
-    last_valley = float(valley_vals.iloc[-1]) if len(valley_vals) > 0 else np.nan
-    prev_valley = float(valley_vals.iloc[-2]) if len(valley_vals) > 1 else np.nan
-    return {
-        'higher_highs': None if np.isnan(last_peak) or np.isnan(prev_peak) else last_peak > prev_peak,
-        'higher_lows': None if np.isnan(last_valley) or np.isnan(prev_valley) else last_valley > prev_valley
-    }
+@profiled('indicators.market_structure', rows=_rows)
+def market_structure(df: pd.DataFrame, order:int=1, min_prominence:float=0.0, atr_mult:float=0.0) -> dict:
+    high = np.asarray(df['High'], dtype=float)
+    low = np.asarray(df['Low'], dtype=float)
+    atr_vals = np.asarray(df['ATR'], dtype=float) if atr_mult and 'ATR' in df else None
+    peaks, valleys = find_swings(high, low, order, min_prominence, atr_vals, atr_mult)
+    return structure_from_pivots(high[peaks], low[valleys])
@@ -0,0 +1,242 @@
+# analysis/journal.py
+# دفتر قیمت‌ها: برای هر نماد/کد یک فایل باینری فقط-افزودنی با رکوردهای ۲۴ بایتی
+# (زمان ns، قیمت، منبع، پرچم‌ها). نوشتن یک os.write روی فایل O_APPEND است (زیر قفل کوتاه هر دفتر تا
+# زمان‌ها بین چند نخ نویسنده هم عقب نروند) و خواندن بدون کپی از طریق np.memmap؛ رکورد ناقص انتهای فایل (قطع برق/کرش وسط نوشتن) هنگام باز کردن حذف می‌شود.
+import os
+import threading
+import time
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+
+from config import QUOTE_JOURNAL_DIR
+
+MAGIC = b"PSQJ"
+VERSION = 1
+RECORD = np.dtype([('ts', '<i8'), ('price', '<f8'), ('source', '<u4'), ('flags', '<u4')])
+HEADER_SIZE = RECORD.itemsize      # هم‌اندازه‌ی یک رکورد تا رکوردها هم‌تراز بمانند
+
+# منبع قیمت
+SOURCES = {'unknown': 0, 'scrape': 1, 'api': 2, 'manual': 3, 'stub': 4, 'yfinance': 5}
+SOURCE_NAMES = {v: k for k, v in SOURCES.items()}
+
+# پرچم‌ها (بیتی)
+FLAG_HEDGED = 1       # قیمت از پرسش پشتیبان (hedge) آمده
+FLAG_STALE = 2        # قیمت از کش یا مقدار ثابت است، نه دریافت تازه
+FLAG_RECOVERED = 4    # پس از بازیابی فایل نوشته شده (اولین رکورد بعد از دنباله‌ی ناقص)
+
+
+def _header():
+    return MAGIC + np.uint32(VERSION).tobytes() + bytes(HEADER_SIZE - 8)
+
+
+def _to_ns(ts):
+    if ts is None:
+        return None
+    if isinstance(ts, (int, np.integer)):
+        return int(ts)
+    ts = pd.Timestamp(ts, unit='s') if isinstance(ts, float) else pd.Timestamp(ts)
+    return (ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')).value
+
+
+class QuoteJournal:
+    """
+    دفتر یک کد قیمت.
+        j = QuoteJournal('.cache/quotes/geram18.qj')
+        j.append(price, source='scrape')
+        ts, price = j.arrays(start='2025-01-01')     # نماهای memmap، بدون کپی
+    رکوردها به ترتیب زمان نوشته می‌شوند (زمان عقب‌رفته به آخرین زمان گرد می‌شود) تا جست‌وجوی دودویی معتبر بماند؛
+    append/extend از چند نخ هم امن‌اند (TGJUClient مشترک بین session ها، poller زنده و سرویس).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.recovered = 0           # تعداد بایت‌های ناقص حذف‌شده هنگام باز کردن
+        self._map = None
+        self._lock = threading.Lock()         # نگاشت دوباره‌ی memmap
+        self._write_lock = threading.Lock()   # گرد کردن زمان به آخرین زمان و write باید با هم اتمی باشند
+        self._open()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0), 0o644)
+        size = os.fstat(fd).st_size
+        if size < HEADER_SIZE:
+            # فایل تازه یا سرآیند نیمه‌کاره
+            os.ftruncate(fd, 0)
+            os.write(fd, _header())
+            self.recovered += size
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            head = os.read(fd, HEADER_SIZE)
+            if head[:4] != MAGIC:
+                os.close(fd)
+                raise ValueError(f"{self.path} یک دفتر قیمت نیست")
+            torn = (size - HEADER_SIZE) % RECORD.itemsize
+            if torn:
+                os.ftruncate(fd, size - torn)
+                self.recovered += torn
+        self._fd = fd
+        last = self._tail(1)
+        self._last_ts = int(last['ts'][0]) if len(last) else None
+        self._flags = FLAG_RECOVERED if self.recovered else 0
+
+    def close(self):
+        os.close(self._fd)
+        self._map = None
+
+    def __len__(self):
+        return (os.fstat(self._fd).st_size - HEADER_SIZE) // RECORD.itemsize
+
+    # ---------- نوشتن ----------
+    def append(self, price, ts=None, source='unknown', flags=0):
+        """یک رکورد؛ ts زمان (ns یا هر چیز قابل تبدیل به Timestamp، پیش‌فرض اکنون)"""
+        ts = time.time_ns() if ts is None else _to_ns(ts)
+        rec = np.empty(1, dtype=RECORD)
+        with self._write_lock:
+            if self._last_ts is not None and ts < self._last_ts:
+                ts = self._last_ts
+            self._last_ts = ts
+            rec[0] = (ts, price, SOURCES.get(source, source) if isinstance(source, str) else source,
+                      flags | self._flags)
+            self._flags = 0
+            os.write(self._fd, rec.tobytes())
+
+    def extend(self, ts, price, source='unknown', flags=0):
+        """چند رکورد با یک write؛ ts باید صعودی باشد"""
+        ts = np.asarray(ts, dtype=np.int64)
+        recs = np.empty(len(ts), dtype=RECORD)
+        recs['price'] = price
+        recs['source'] = SOURCES.get(source, source) if isinstance(source, str) else source
+        recs['flags'] = flags
+        if not len(recs):
+            return
+        with self._write_lock:
+            recs['ts'] = ts if self._last_ts is None else np.maximum(ts, self._last_ts)
+            recs['flags'][0] |= self._flags
+            self._flags = 0
+            self._last_ts = int(recs['ts'][-1])
+            os.write(self._fd, recs.tobytes())
+
+    # ---------- خواندن ----------
+    def records(self) -> np.ndarray:
+        """همه‌ی رکوردهای کامل به صورت آرایه‌ی ساخت‌یافته‌ی memmap (فقط خواندنی)"""
+        n = len(self)
+        with self._lock:
+            if self._map is None or len(self._map) != n:
+                self._map = (np.memmap(self.path, dtype=RECORD, mode='r', offset=HEADER_SIZE, shape=(n,))
+                             if n else np.empty(0, dtype=RECORD))
+            return self._map
+
+    def _tail(self, k):
+        recs = self.records()
+        return recs[max(len(recs) - k, 0):]
+
+    def range(self, start=None, end=None) -> np.ndarray:
+        """رکوردهای start <= ts < end با جست‌وجوی دودویی روی ستون زمان"""
+        recs = self.records()
+        ts = recs['ts']
+        lo = 0 if start is None else int(np.searchsorted(ts, _to_ns(start), 'left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, _to_ns(end), 'left'))
+        return recs[lo:hi]
+
+    def arrays(self, start=None, end=None):
+        """(ts, price) نماهای بدون کپی روی memmap"""
+        recs = self.range(start, end)
+        return recs['ts'], recs['price']
+
+    def last(self):
+        """(ts, price) آخرین رکورد یا None"""
+        rec = self._tail(1)
+        return (int(rec['ts'][0]), float(rec['price'][0])) if len(rec) else None
+
+    def series(self, start=None, end=None, name=None) -> pd.Series:
+        """سری قیمت با ایندکس UTC (کپی؛ مثلاً برای bubble_series)"""
+        ts, price = self.arrays(start, end)
+        return pd.Series(np.array(price), index=pd.DatetimeIndex(np.array(ts), tz='UTC'), name=name)
+
+    # ---------- فشرده‌سازی ----------
+    def compact(self, before=None, dedupe=False) -> int:
+        """
+        بازنویسی فایل: رکوردهای قدیمی‌تر از before حذف و (با dedupe) تکرارهای پشت سر هم
+        با قیمت/منبع یکسان به اولین مورد کاهش می‌یابند. فایل جدید با os.replace جایگزین می‌شود.
+        رکوردها با np.fromfile خوانده می‌شوند نه از memmap، و append ها تا پایان کار منتظر می‌مانند.
+        نماهایی که قبلاً از records/range/arrays گرفته شده‌اند باید پیش از compact رها شوند (del): روی ویندوز
+        فایلی که هنوز نگاشت شده جایگزین نمی‌شود (PermissionError). خروجی: تعداد رکوردهای حذف‌شده.
+        """
+        with self._write_lock:
+            n = len(self)
+            recs = np.fromfile(self.path, dtype=RECORD, count=n, offset=HEADER_SIZE)
+            if before is not None:
+                recs = recs[int(np.searchsorted(recs['ts'], _to_ns(before), 'left')):]
+            keep = np.ones(len(recs), dtype=bool)
+            if dedupe and len(recs):
+                same = (recs['price'][1:] == recs['price'][:-1]) & (recs['source'][1:] == recs['source'][:-1])
+                keep[1:] = ~same
+            data = recs[keep].tobytes()
+            removed = n - len(data) // RECORD.itemsize
+            del recs, keep
+            tmp = self.path + ".tmp"
+            with open(tmp, 'wb') as f:
+                f.write(_header())
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock:
+                self._map = None    # تنها نمای خود دفتر روی فایل قدیمی
+                os.close(self._fd)
+                os.replace(tmp, self.path)
+            self.recovered = 0
+            self._open()
+        return removed
+
+class JournalStore:
+    """یک QuoteJournal برای هر کد در پوشه‌ی root (نام فایل: کد URL-encode شده + .qj)"""
+
+    def __init__(self, root=QUOTE_JOURNAL_DIR):
+        self.root = root
+        self._journals = {}
+        self._lock = threading.Lock()
+
+    def journal(self, code) -> QuoteJournal:
+        j = self._journals.get(code)
+        if j is None:
+            with self._lock:
+                j = self._journals.get(code)
+                if j is None:
+                    j = self._journals[code] = QuoteJournal(os.path.join(self.root, quote(code, safe='') + ".qj"))
+        return j
+
+    def append(self, code, price, ts=None, source='unknown', flags=0):
+        self.journal(code).append(price, ts, source, flags)
+
+    def codes(self) -> list:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(unquote(f[:-3]) for f in os.listdir(self.root) if f.endswith(".qj"))
+
+    def last(self, codes) -> dict:
+        """{code: (ts, price) یا None} برای گرم کردن بعد از راه‌اندازی دوباره"""
+        return {code: self.journal(code).last() for code in codes}
+
+    def series(self, code, start=None, end=None) -> pd.Series:
+        return self.journal(code).series(start, end, name=code)
+
+    def close(self):
+        with self._lock:
+            for j in self._journals.values():
+                j.close()
+            self._journals.clear()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def default_store() -> JournalStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JournalStore()
+        return _store
@@ -0,0 +1,166 @@
+# analysis/kernels.py
+# TR، ATR و دو میانگین متحرک در یک گذر روی آرایه‌های خام، بدون DataFrame میانی.
+# میانگین‌ها همان الگوریتم rolling(n, min_periods=1).mean() در pandas را دارند (جمع Kahan جدا برای
+# افزودن/حذف، مثل RollingMean در streaming.py) تا خروجی بیت‌به‌بیت با مسیر pandas برابر باشد.
+# برای سری‌های بلند (NUMBA_MIN_BARS به بالا) اگر numba نصب باشد حلقه JIT می‌شود؛ وگرنه TR با NumPy و
+# میانگین‌ها با rolling خود pandas روی آرایه‌ی خام حساب می‌شوند (همان اعداد، بدون concat و max(axis=1)).
+# numba فقط در اولین سری بلند import و کامپایل می‌شود تا شروع برنامه و سری‌های کوتاه کند نشوند.
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import USE_NUMBA, NUMBA_MIN_BARS
+
+# حالت هر میانگین متحرک یک tuple است تا در مسیر JIT در رجیسترها بماند:
+# (sum, comp_add, comp_remove, nobs, neg_ct, same, prev)
+_EMPTY = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0, np.nan)
+
+
+def _add(st, val):
+    total, comp_add, comp_remove, nobs, neg, same, prev = st
+    if val != val:
+        return st
+    y = val - comp_add
+    t = total + y
+    comp_add = t - total - y
+    if np.signbit(val):
+        neg += 1
+    same = same + 1 if val == prev else 1.0
+    return (t, comp_add, comp_remove, nobs + 1, neg, same, val)
+
+
+def _remove(st, val):
+    total, comp_add, comp_remove, nobs, neg, same, prev = st
+    if val != val:
+        return st
+    y = -val - comp_remove
+    t = total + y
+    comp_remove = t - total - y
+    if np.signbit(val):
+        neg -= 1
+    return (t, comp_add, comp_remove, nobs - 1, neg, same, prev)
+
+
+def _mean(st):
+    total, comp_add, comp_remove, nobs, neg, same, prev = st
+    if nobs <= 0:
+        return np.nan
+    result = total / nobs
+    if same >= nobs:
+        result = prev
+    elif neg == 0 and result < 0:
+        result = 0.0
+    elif neg == nobs and result > 0:
+        result = 0.0
+    return result
+
+
+def _step(st, x, i, n):
+    """حالت بعد از افزودن x[i] به پنجره‌ی n تایی (و حذف x[i-n])"""
+    if n == 1:
+        st = _EMPTY
+    elif i >= n:
+        st = _remove(st, x[i - n])
+    return _add(st, x[i])
+
+
+def _nanmax3(a, b, c):
+    m = np.nan
+    for v in (a, b, c):
+        if v == v and not (v <= m):
+            m = v
+    return m
+
+
+def _fused_loop(high, low, close, fast, slow, atr_n, tr, atr, ma_fast, ma_slow):
+    """حلقه‌ی یک‌گذره؛ پنجره‌ی 0 یعنی آن خروجی حساب نشود"""
+    st_atr = st_fast = st_slow = _EMPTY
+    for i in range(len(close)):
+        if atr_n:
+            hl = high[i] - low[i]
+            if i == 0:
+                tr[i] = hl
+            else:
+                pc = close[i - 1]
+                tr[i] = _nanmax3(hl, abs(high[i] - pc), abs(low[i] - pc))
+            st_atr = _step(st_atr, tr, i, atr_n)
+            atr[i] = _mean(st_atr)
+        if fast:
+            st_fast = _step(st_fast, close, i, fast)
+            ma_fast[i] = _mean(st_fast)
+        if slow:
+            st_slow = _step(st_slow, close, i, slow)
+            ma_slow[i] = _mean(st_slow)
+
+
+_jit_lock = threading.Lock()
+_jitted = {}
+
+
+def _jit_loop():
+    """نسخه‌ی JIT شده‌ی _fused_loop (یک‌بار برای هر پروسه؛ کش کامپایل در __pycache__)؛ None اگر numba نباشد"""
+    with _jit_lock:
+        if 'loop' not in _jitted:
+            try:
+                import numba
+            except ImportError:
+                _jitted['loop'] = None
+            else:
+                jit = numba.njit(cache=True, nogil=True)
+                # توابع کمکی از globals ماژول خوانده می‌شوند؛ نسخه‌ی JIT آن‌ها جایگزین می‌شود
+                g = globals()
+                for name in ('_add', '_remove', '_mean', '_step', '_nanmax3'):
+                    g[name] = jit(g[name])
+                _jitted['loop'] = jit(_fused_loop)
+        return _jitted['loop']
+
+
+def numba_enabled(n=NUMBA_MIN_BARS):
+    """آیا سری n کندلی با مسیر JIT حساب می‌شود (بعد از اولین سری بلند، سری‌های کوتاه هم)"""
+    if not USE_NUMBA:
+        return False
+    if n < NUMBA_MIN_BARS and 'loop' not in _jitted:
+        return False
+    return _jit_loop() is not None
+
+
+def _f64(x):
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+def _rolling_mean(x, n):
+    return pd.Series(x, copy=False).rolling(n, min_periods=1).mean().to_numpy()
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """max(High-Low, |High-Close قبلی|, |Low-Close قبلی|)؛ کندل اول فقط High-Low"""
+    high, low, close = _f64(high), _f64(low), _f64(close)
+    prev_close = np.concatenate([[np.nan], close[:-1]])
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+def fused_indicators(high, low, close, fast=0, slow=0, atr_period=0) -> dict:
+    """
+    {'TR', 'ATR', 'MA_fast', 'MA_slow'} به صورت آرایه‌ی float64؛ پنجره‌ی 0 یعنی آن خروجی لازم نیست
+    (TR همراه ATR برمی‌گردد). اعداد با مسیر DataFrame در indicators.py یکسان‌اند.
+    """
+    close = _f64(close)
+    high, low = (_f64(high), _f64(low)) if atr_period else (close, close)
+    n = len(close)
+    out = {}
+    if numba_enabled(n):
+        tr, atr, ma_fast, ma_slow = (np.empty(n if w else 0) for w in (atr_period, atr_period, fast, slow))
+        _jit_loop()(high, low, close, fast, slow, atr_period, tr, atr, ma_fast, ma_slow)
+    else:
+        tr = true_range(high, low, close) if atr_period else None
+        atr = _rolling_mean(tr, atr_period) if atr_period else None
+        ma_fast = _rolling_mean(close, fast) if fast else None
+        ma_slow = _rolling_mean(close, slow) if slow else None
+    if atr_period:
+        out['TR'], out['ATR'] = tr, atr
+    if fast:
+        out['MA_fast'] = ma_fast
+    if slow:
+        out['MA_slow'] = ma_slow
+    return out
@@ -0,0 +1,288 @@
+# analysis/live.py
+import asyncio
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from config import (INTERVAL_SECONDS, MA_FAST, MA_SLOW, ATR_PERIOD, DEFAULT_LOOKBACK, DEFAULT_PERIOD,
+                    LIVE_POLL_MIN_SECONDS, LIVE_POLL_MAX_SECONDS, LIVE_IDLE_SECONDS, TGJU_CACHE_SECONDS)
+from analysis.resample import DERIVE_FROM, NATIVE_INTERVALS, resample_ohlcv
+from analysis.scenarios import generate_scenarios
+from analysis.streaming import StreamingIndicators
+from analysis.swings import SwingDetector
+
+
+def poll_seconds(interval):
+    """فاصله‌ی پرسیدن کندل جدید متناسب با interval"""
+    return min(max(INTERVAL_SECONDS.get(interval, 3600) / 60, LIVE_POLL_MIN_SECONDS), LIVE_POLL_MAX_SECONDS)
+
+
+# ---------------- منابع داده ----------------
+def yf_source(symbol, interval):
+    """چند کندل آخر از yfinance (آخرین کندل معمولاً نیمه‌کاره است)"""
+    from analysis.data_fetcher import download
+    base = interval if interval in NATIVE_INTERVALS else DERIVE_FROM[interval]
+    period = "5d" if INTERVAL_SECONDS.get(base, 86400) < 86400 else "3mo"
+    bars = download(symbol, base, period=period)
+    return bars if base == interval else resample_ohlcv(bars, interval)
+
+
+def yf_history(symbol, period, interval):
+    from analysis.data_fetcher import fetch_data
+    return fetch_data(symbol, period, interval)
+
+
+class SimulatedSource:
+    """
+    منبع کندل ساختگی برای آزمایش بدون شبکه: هر فراخوانی چند تیک به کندل جاری اضافه می‌کند
+    و بعد از ticks_per_bar فراخوانی کندل بسته و کندل بعدی باز می‌شود.
+    """
+
+    def __init__(self, seed=0, start=1900.0, vol=0.002, ticks_per_bar=6, history_bars=300):
+        self.rng = np.random.default_rng(seed)
+        self.start = start
+        self.vol = vol
+        self.ticks_per_bar = ticks_per_bar
+        self.history_bars = history_bars
+        self.frames = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _frame(self, symbol, interval):
+        key = (symbol, interval)
+        if key not in self.frames:
+            n = self.history_bars
+            close = self.start * np.exp(np.cumsum(self.rng.normal(0.0, self.vol, n)))
+            open_ = np.concatenate([[self.start], close[:-1]])
+            wick = np.abs(self.rng.normal(0.0, self.vol, (2, n))) * close
+            step = pd.Timedelta(seconds=INTERVAL_SECONDS.get(interval, 3600))
+            end = pd.Timestamp.now(tz='UTC').floor(step)
+            self.frames[key] = pd.DataFrame({
+                'Open': open_, 'High': np.maximum(open_, close) + wick[0],
+                'Low': np.minimum(open_, close) - wick[1], 'Close': close,
+                'Volume': self.rng.integers(100, 10_000, n).astype(float),
+            }, index=pd.date_range(end=end, periods=n, freq=step))
+        return self.frames[key]
+
+    def history(self, symbol, period, interval):
+        with self._lock:
+            return self._frame(symbol, interval).copy()
+
+    def __call__(self, symbol, interval):
+        with self._lock:
+            self.calls += 1
+            df = self._frame(symbol, interval)
+            last = df.iloc[-1]
+            if self.calls % self.ticks_per_bar == 0:
+                ts = df.index[-1] + (df.index[-1] - df.index[-2])
+                df.loc[ts] = [last['Close']] * 4 + [0.0]
+            price = df['Close'].iloc[-1] * float(np.exp(self.rng.normal(0.0, self.vol)))
+            ts = df.index[-1]
+            df.loc[ts, 'High'] = max(df.loc[ts, 'High'], price)
+            df.loc[ts, 'Low'] = min(df.loc[ts, 'Low'], price)
+            df.loc[ts, 'Close'] = price
+            df.loc[ts, 'Volume'] += float(self.rng.integers(10, 100))
+            if len(df) > 2 * self.history_bars:
+                self.frames[(symbol, interval)] = df = df.iloc[-self.history_bars:]
+            return df.tail(5).copy()
+
+
+# ---------------- محاسبه‌ی افزایشی ----------------
+class LiveView:
+    """
+    حالت اندیکاتورها/سطوح/ساختار برای یک مجموعه پارامتر روی یک فید.
+    کندل‌های بسته‌شده یک‌بار به StreamingIndicators و SwingDetector داده می‌شوند؛ کندل نیمه‌کاره
+    روی کپی آن‌ها اعمال می‌شود. generate_scenarios فقط وقتی ورودی‌هایش تغییر کنند دوباره اجرا می‌شود.
+    """
+
+    def __init__(self, history, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD, lookback=DEFAULT_LOOKBACK):
+        self.engine = StreamingIndicators(fast, slow, atr_period, lookback)
+        self.swings = SwingDetector()
+        self.last_closed = None
+        self.bar_time = None
+        self.inputs = None
+        self.scenarios = None
+        self.version = 0
+        self.deltas = deque(maxlen=64)     # (version, کلیدهای تغییرکرده)
+        self.evaluations = 0               # دفعات اجرای generate_scenarios
+        self._lock = threading.Lock()
+        if len(history):
+            self._close(history.iloc[:-1])
+            self.ingest(history.tail(1))
+
+    def _close(self, bars):
+        for ts, high, low, close in zip(bars.index, bars['High'].to_numpy(float).tolist(),
+                                        bars['Low'].to_numpy(float).tolist(), bars['Close'].to_numpy(float).tolist()):
+            values = self.engine.update(high, low, close)
+            self.swings.update(high, low, values['ATR'])
+            self.last_closed = ts
+
+    def ingest(self, bars) -> bool:
+        """کندل‌های اخیر منبع (آخرین کندل نیمه‌کاره)؛ خروجی True اگر سناریوها تغییر کرد"""
+        with self._lock:
+            if self.last_closed is not None:
+                bars = bars[bars.index > self.last_closed]
+            if bars.empty:
+                return False
+            self._close(bars.iloc[:-1])
+            self.bar_time = bars.index[-1]
+            high, low, close = (float(bars[c].iloc[-1]) for c in ('High', 'Low', 'Close'))
+
+            engine = self.engine.copy()
+            values = engine.update(high, low, close)
+            levels = engine.levels()
+            swings = self.swings.copy()
+            swings.update(high, low, values['ATR'])
+            struct = swings.structure()
+
+            inputs = (tuple(values.values()), tuple(levels.values()), tuple(struct.values()))
+            if inputs == self.inputs:
+                return False
+            self.inputs = inputs
+            self.evaluations += 1
+            scenarios = generate_scenarios(pd.DataFrame([values]), levels, struct)
+            old = self.scenarios or {}
+            changed = [k for k, v in scenarios.items() if old.get(k) != v]
+            self.scenarios = scenarios
+            self.version += 1
+            self.deltas.append((self.version, changed))
+            return True
+
+    def changes(self, since=0):
+        """
+        (version, scenarios, کلیدهای تغییرکرده از نسخه‌ی since)؛
+        اگر چیزی تغییر نکرده باشد کلیدها خالی است.
+        """
+        with self._lock:
+            if since >= self.version:
+                return self.version, self.scenarios, []
+            if not self.deltas or since < self.deltas[0][0] - 1:
+                return self.version, self.scenarios, list(self.scenarios or {})
+            keys = dict.fromkeys(k for v, ks in self.deltas if v > since for k in ks)
+            return self.version, self.scenarios, list(keys)
+
+
+class LiveFeed:
+    """کندل‌های یک (symbol, interval) که بین همه‌ی session ها مشترک است؛ هر مجموعه پارامتر یک LiveView"""
+
+    def __init__(self, symbol, interval, history, period=DEFAULT_PERIOD):
+        self.symbol = symbol
+        self.interval = interval
+        self.period = period
+        self.poll_seconds = poll_seconds(interval)
+        self.history = history
+        self.views = {}
+        self.polls = 0
+        self.error = None
+        self.last_seen = time.monotonic()
+        self._bars = None
+        self._lock = threading.Lock()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def view(self, fast, slow, atr_period, lookback) -> LiveView:
+        key = (fast, slow, atr_period, lookback)
+        with self._lock:
+            if key not in self.views:
+                history = self.history(self.symbol, self.period, self.interval)
+                if self._bars is not None:
+                    history = pd.concat([history.loc[history.index < self._bars.index[0]], self._bars])
+                self.views[key] = LiveView(history, *key)
+            return self.views[key]
+
+    def ingest(self, bars):
+        with self._lock:
+            self.polls += 1
+            self._bars = bars
+            views = list(self.views.values())
+        for view in views:
+            view.ingest(bars)
+
+
+class QuoteFeed:
+    """قیمت‌های TGJU مشترک بین session ها؛ version فقط با تغییر قیمت‌ها بالا می‌رود"""
+
+    def __init__(self, codes):
+        self.codes = tuple(codes)
+        self.poll_seconds = TGJU_CACHE_SECONDS
+        self.quotes = {}
+        self.version = 0
+        self.polls = 0
+        self.error = None
+        self.last_seen = time.monotonic()
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def ingest(self, quotes):
+        self.polls += 1
+        if quotes != self.quotes:
+            self.quotes = quotes
+            self.version += 1
+
+
+def _tgju_quotes(codes):
+    from utils import default_client
+    return default_client().quotes(codes)
+
+
+class LivePoller:
+    """
+    حلقه‌ی asyncio در یک نخ پس‌زمینه؛ برای هر (symbol, interval) فقط یک وظیفه‌ی پرسیدن اجرا می‌شود
+    و همه‌ی session هایی که همان نماد را می‌بینند از یک فید می‌خوانند.
+    فیدی که LIVE_IDLE_SECONDS کسی سراغش نیامده متوقف می‌شود.
+    """
+
+    def __init__(self, source=yf_source, history=yf_history, quote_source=_tgju_quotes, idle_seconds=LIVE_IDLE_SECONDS):
+        self.source = source
+        self.history = history
+        self.quote_source = quote_source
+        self.idle_seconds = idle_seconds
+        self.feeds = {}
+        self._lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="live-poller", daemon=True).start()
+
+    def subscribe(self, symbol, interval, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD,
+                  lookback=DEFAULT_LOOKBACK, period=DEFAULT_PERIOD) -> LiveView:
+        key = ('bars', symbol, interval)
+        with self._lock:
+            feed = self.feeds.get(key)
+            if feed is None:
+                feed = self.feeds[key] = LiveFeed(symbol, interval, self.history, period)
+                asyncio.run_coroutine_threadsafe(self._run(key, feed, self.source, symbol, interval), self.loop)
+            feed.touch()
+        return feed.view(fast, slow, atr_period, lookback)
+
+    def subscribe_quotes(self, codes) -> QuoteFeed:
+        key = ('quotes', tuple(codes))
+        with self._lock:
+            feed = self.feeds.get(key)
+            if feed is None:
+                feed = self.feeds[key] = QuoteFeed(codes)
+                asyncio.run_coroutine_threadsafe(self._run(key, feed, self.quote_source, list(codes)), self.loop)
+            feed.touch()
+        return feed
+
+    async def _run(self, key, feed, fetch, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            while time.monotonic() - feed.last_seen < self.idle_seconds:
+                try:
+                    result = await loop.run_in_executor(None, fetch, *args)
+                    await loop.run_in_executor(None, feed.ingest, result)
+                    feed.error = None
+                except Exception as e:
+                    feed.error = str(e)
+                await asyncio.sleep(feed.poll_seconds)
+        finally:
+            with self._lock:
+                if self.feeds.get(key) is feed:
+                    del self.feeds[key]
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
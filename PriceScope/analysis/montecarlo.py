@@ -0,0 +1,192 @@
+# analysis/montecarlo.py
+# احتمال برخورد به هدف‌ها قبل از حد ضرر با شبیه‌سازی مونت‌کارلو: مسیرهای آینده‌ی قیمت از قیمت فعلی
+# (بازنمونه‌گیری بازده‌های تاریخی یا نوسان متناسب با ATR) به صورت آرایه‌ی دوبعدی (مسیر × گام) در بلوک‌های
+# زمانی ساخته می‌شوند و مسیرهایی که تکلیف هر دو سناریویشان روشن شده از بلوک بعدی کنار می‌روند.
+# گام‌ها از جدول ۶۵۵۳۶ چندک توزیع گام با ۱۶ بیت تصادفی خوانده می‌شوند (چند برابر سریع‌تر از
+# standard_normal یا integers؛ گلوگاه حالتی که هیچ مسیری زود تمام نمی‌شود تولید اعداد تصادفی است).
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from statistics import NormalDist
+
+import numpy as np
+
+from config import MC_PATHS, MC_STEPS, MC_METHOD, MC_SEED, MC_CHUNK, MC_BLOCK
+from analysis.profiling import profiled
+
+# دامنه‌ی مورد انتظار حرکت براونی در یک گام 2*sqrt(2/pi) برابر انحراف معیار است؛ ATR ≈ این دامنه
+ATR_TO_SIGMA = 1.0 / (2.0 * np.sqrt(2.0 / np.pi))
+
+NOT_HIT = np.iinfo(np.int32).max
+TABLE_BITS = 16
+
+
+@cache
+def _normal_quantiles():
+    q = (np.arange(1 << TABLE_BITS) + 0.5) / (1 << TABLE_BITS)
+    return np.array([NormalDist().inv_cdf(p) for p in q])
+
+
+def _step_table(method, returns=None, scale=None):
+    """
+    چندک‌های (i + 0.5) / 2**TABLE_BITS توزیع گام (float32): نرمال × scale برای 'atr'، و چندک‌های تجربی
+    returns برای 'bootstrap' (هر بازده تاریخی با وزن تقریباً برابر؛ اختلاف وزن‌ها یک خانه از 2**16 / len(returns)).
+    """
+    if method == 'bootstrap':
+        ordered = np.sort(returns)
+        q = (np.arange(1 << TABLE_BITS) + 0.5) / (1 << TABLE_BITS)
+        return ordered[(q * len(ordered)).astype(np.int64)].astype(np.float32)
+    return (_normal_quantiles() * scale).astype(np.float32)
+
+
+def _levels(scenarios):
+    """
+    سطوح هر دو سناریو به صورت (نام، سطح، بالا/پایین):
+    هدف‌های صعودی و حد ضرر نزولی با عبور از بالا لمس می‌شوند، بقیه از پایین.
+    """
+    bull, bear = scenarios['bullish'], scenarios['bearish']
+    levels = [('bullish', f'target_{k}', t, True) for k, t in enumerate(bull['targets'], 1)]
+    levels.append(('bullish', 'stop_loss', bull['stop_loss'], False))
+    levels += [('bearish', f'target_{k}', t, False) for k, t in enumerate(bear['targets'], 1)]
+    levels.append(('bearish', 'stop_loss', bear['stop_loss'], True))
+    return levels
+
+
+def _simulate_chunk(n_paths, steps, log_levels, up, done_groups, table, seed, block):
+    """
+    اولین گام برخورد هر مسیر به هر سطح (int32، NOT_HIT یعنی تا steps برخوردی نبود).
+    table: جدول چندک‌های گام (_step_table)؛ هر گام یک خانه‌ی تصادفی آن است.
+    log_levels: log(سطح/قیمت فعلی)؛ up: True برای سطوحی که با بالا رفتن لمس می‌شوند.
+    done_groups: برای هر سناریو فهرست سطوحی که لمس هر کدام یعنی سناریو تمام شده است.
+    """
+    bits = np.random.default_rng(seed).bit_generator
+    log_levels = log_levels.astype(np.float32)
+    n_levels = len(log_levels)
+    hit = np.full((n_paths, n_levels), NOT_HIT, dtype=np.int32)
+    # سطوحی که همین حالا لمس شده‌اند
+    hit[:, (up & (log_levels <= 0)) | (~up & (log_levels >= 0))] = 0
+
+    alive = np.arange(n_paths)
+    x = np.zeros(n_paths, dtype=np.float32)     # log قیمت نسبت به قیمت فعلی
+    for t0 in range(0, steps, block):
+        b = min(block, steps - t0)
+        k = len(alive)
+        # چیدمان (گام، مسیر): جمع و max/min روی محور 0 برداری روی همه‌ی مسیرها اجرا می‌شوند
+        # هر عدد ۶۴ بیتی چهار اندیس ۱۶ بیتی جدول
+        index = bits.random_raw(-(-b * k // 4)).view(np.uint16)[:b * k].reshape(b, k)
+        path = np.take(table, index)
+        path[0] += x
+        # جمع تجمعی سطر به سطر (همان ترتیب جمع cumsum؛ cumsum روی محور 0 چند برابر کندتر است)
+        for i in range(1, b):
+            np.add(path[i - 1], path[i], out=path[i])
+        x = path[-1].copy()
+        # فقط مسیرهایی که بیشینه/کمینه‌ی این بلوک به سطح رسیده برای یافتن گام دقیق بررسی می‌شوند
+        bmax, bmin = path.max(axis=0), path.min(axis=0)
+        top, bottom = bmax.max(), bmin.min()
+        new_hits = False
+        for j in range(n_levels):
+            lvl = log_levels[j]
+            if (top < lvl) if up[j] else (bottom > lvl):
+                continue    # هیچ مسیری در این بلوک به این سطح نرسید
+            rows = np.flatnonzero((bmax >= lvl if up[j] else bmin <= lvl) & (hit[alive, j] == NOT_HIT))
+            if not len(rows):
+                continue
+            crossed = path[:, rows] >= lvl if up[j] else path[:, rows] <= lvl
+            hit[alive[rows], j] = t0 + 1 + crossed.argmax(axis=0)
+            new_hits = True
+        if not new_hits and t0:
+            continue        # مسیرهای زنده همان‌هایی‌اند که بودند
+
+        done = np.ones(k, dtype=bool)
+        for group in done_groups:
+            done &= (hit[alive][:, group] != NOT_HIT).any(axis=1)
+        keep = ~done
+        alive, x = alive[keep], x[keep]
+        if not len(alive):
+            break
+    return hit
+
+
+def _run_chunk(args):
+    return _simulate_chunk(*args)
+
+
+def first_hits(scenarios, atr=None, returns=None, paths=MC_PATHS, steps=MC_STEPS, method=MC_METHOD,
+               seed=MC_SEED, chunk=MC_CHUNK, block=MC_BLOCK, processes=0):
+    """
+    اولین گام برخورد همه‌ی مسیرها به سطوح _levels(scenarios): (levels, hit) با hit به شکل (paths, len(levels)).
+    method='bootstrap' بازده‌های log تاریخی (returns) را بازنمونه می‌گیرد و 'atr' گام‌های نرمال با
+    انحراف معیار ATR_TO_SIGMA * atr / price می‌سازد. هر تکه بذر مستقل خودش را از SeedSequence(seed) دارد،
+    پس نتیجه به processes بستگی ندارد. processes=0 یعنی اجرا در همین پروسه.
+    """
+    price = float(scenarios['price'])
+    levels = _levels(scenarios)
+    log_levels = np.log(np.array([lvl for _, _, lvl, _ in levels], dtype=np.float64) / price)
+    up = np.array([u for *_, u in levels])
+    done_groups = []
+    for side in ('bullish', 'bearish'):
+        idx = [i for i, (s, name, *_) in enumerate(levels) if s == side]
+        top = max(idx[:-1], key=lambda i: log_levels[i] if up[i] else -log_levels[i])
+        done_groups.append([top, idx[-1]])     # دورترین هدف یا حد ضرر
+
+    if method == 'bootstrap':
+        returns = np.asarray(returns, dtype=np.float32)
+        returns = returns[np.isfinite(returns)]
+        if not len(returns):
+            raise ValueError("بازده تاریخی برای bootstrap وجود ندارد")
+        table = _step_table(method, returns=returns)
+    elif method == 'atr':
+        atr = float(scenarios['atr'] if atr is None else atr)
+        table = _step_table(method, scale=ATR_TO_SIGMA * atr / price)
+    else:
+        raise ValueError(f"method نامعتبر: {method}")
+
+    sizes = [min(chunk, paths - i) for i in range(0, paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(n, steps, log_levels, up, done_groups, table, s, block) for n, s in zip(sizes, seeds)]
+    if processes == 0 or len(args) == 1:
+        parts = [_run_chunk(a) for a in args]
+    else:
+        with ProcessPoolExecutor(processes or os.cpu_count()) as pool:
+            parts = list(pool.map(_run_chunk, args))
+    return levels, np.concatenate(parts)
+
+
+@profiled('montecarlo.hit_probabilities')
+def hit_probabilities(scenarios, close=None, **kwargs) -> dict:
+    """
+    برای هر سناریو: احتمال لمس هر هدف قبل از حد ضرر و میانگین تعداد کندل تا آن (در مسیرهای موفق)،
+    و احتمال لمس حد ضرر قبل از اولین هدف. close (سری/آرایه‌ی Close تاریخی) برای method='bootstrap' لازم است.
+        {'bullish': {'targets': [{level, prob, expected_bars}, ...], 'stop_loss': {...}, 'unresolved': p}, ...}
+    لمس هم‌زمان هدف و حد ضرر در یک کندل به نفع حد ضرر حساب می‌شود.
+    """
+    method = kwargs.get('method', MC_METHOD)
+    if method == 'bootstrap':
+        close = np.asarray(close, dtype=np.float64)
+        close = close[np.isfinite(close)]
+        kwargs['returns'] = np.diff(np.log(close))
+    levels, hit = first_hits(scenarios, **kwargs)
+    out = {'paths': len(hit), 'steps': kwargs.get('steps', MC_STEPS), 'method': method}
+    for side in ('bullish', 'bearish'):
+        idx = [i for i, (s, *_) in enumerate(levels) if s == side]
+        stop = hit[:, idx[-1]]
+        targets = []
+        for i in idx[:-1]:
+            win = hit[:, i] < stop
+            targets.append({
+                'level': float(levels[i][2]),
+                'prob': float(win.mean()),
+                'expected_bars': float(hit[win, i].mean()) if win.any() else None,
+            })
+        first = hit[:, idx[0]]
+        lose = (stop != NOT_HIT) & (stop <= first)
+        out[side] = {
+            'targets': targets,
+            'stop_loss': {
+                'level': float(levels[idx[-1]][2]),
+                'prob': float(lose.mean()),
+                'expected_bars': float(stop[lose].mean()) if lose.any() else None,
+            },
+            'unresolved': float(((stop == NOT_HIT) & (first == NOT_HIT)).mean()),
+        }
+    return out
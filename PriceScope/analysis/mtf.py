@@ -0,0 +1,115 @@
+# analysis/mtf.py
+# تحلیل چند تایم‌فریمی: یک سری پایه دانلود می‌شود و تایم‌فریم‌های درشت‌تر با resample_ohlcv از آن
+# ساخته می‌شوند؛ زنجیره‌ی اندیکاتورها روی هر تایم‌فریم در نخ‌های جدا اجرا و نتیجه‌ها در یک امتیاز هم‌سویی ادغام می‌شوند.
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from config import (DEFAULT_LOOKBACK, MA_FAST, MA_SLOW, ATR_PERIOD, INTERVAL_SECONDS, SESSION_STARTS,
+                    MTF_BASE_INTERVAL, MTF_INTERVALS, MTF_PERIOD, MTF_THRESHOLD)
+from analysis.bars import BarSeries
+from analysis.data_fetcher import fetch_data
+from analysis.indicators import add_indicators, support_resistance_levels, market_structure
+from analysis.profiling import span
+from analysis.resample import resample_ohlcv
+from analysis.scenarios import generate_scenarios
+
+
+def timeframe_frames(base, base_interval=MTF_BASE_INTERVAL, intervals=MTF_INTERVALS, session_start=None) -> dict:
+    """{interval: DataFrame} همه از روی base؛ interval های ریزتر از base_interval خطا هستند"""
+    frames = {}
+    for interval in intervals:
+        if INTERVAL_SECONDS[interval] < INTERVAL_SECONDS[base_interval]:
+            raise ValueError(f"{interval} از تایم‌فریم پایه‌ی {base_interval} ریزتر است")
+        with span('mtf.resample', rows=len(base)):
+            frames[interval] = base if interval == base_interval else resample_ohlcv(base, interval, session_start)
+    return frames
+
+
+def timeframe_bias(scenarios) -> int:
+    """+1 صعودی، -1 نزولی، 0 خنثی: رأی قیمت/MA کند، MA تند/کند و ساختار HH/HL"""
+    bull, bear = scenarios['bullish_conditions'], scenarios['bearish_conditions']
+    struct = scenarios['market_structure']
+    votes = [
+        1 if bull['price_above_slow_ma'] else -1 if bear['price_below_slow_ma'] else 0,
+        1 if bull['ma_fast_above_slow'] else -1 if bear['ma_fast_below_slow'] else 0,
+    ]
+    if struct.get('higher_highs') is not None and struct.get('higher_lows') is not None:
+        votes.append(1 if struct['higher_highs'] and struct['higher_lows']
+                     else -1 if not struct['higher_highs'] and not struct['higher_lows'] else 0)
+    total = sum(votes)
+    return (total > 0) - (total < 0)
+
+
+def analyze_timeframe(df, lookback=DEFAULT_LOOKBACK, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD) -> dict:
+    """سناریوهای یک تایم‌فریم به‌علاوه‌ی تعداد کندل و جهت (bias)"""
+    if df.empty:
+        raise RuntimeError("دیتا برای این تایم‌فریم کافی نیست.")
+    data = add_indicators(BarSeries.from_frame(df), fast, slow, atr_period)
+    levels = support_resistance_levels(data, lookback)
+    scenarios = generate_scenarios(data, levels, market_structure(data))
+    return {'bars': len(data), 'bias': timeframe_bias(scenarios), 'scenarios': scenarios}
+
+
+def confluence(timeframes: dict, weights=None, threshold=MTF_THRESHOLD) -> dict:
+    """
+    ادغام جهت تایم‌فریم‌ها: score میانگین وزنی bias ها (بین -1 و 1)،
+    label یکی از bullish/bearish/mixed و conflicts تایم‌فریم‌هایی که خلاف جهت کلی‌اند.
+    """
+    weights = weights or {}
+    ok = {iv: tf for iv, tf in timeframes.items() if 'error' not in tf}
+    total = sum(weights.get(iv, 1.0) for iv in ok)
+    score = sum(weights.get(iv, 1.0) * tf['bias'] for iv, tf in ok.items()) / total if total else 0.0
+    label = 'bullish' if score >= threshold else 'bearish' if score <= -threshold else 'mixed'
+    side = (score > 0) - (score < 0)
+    return {
+        'score': float(score),
+        'label': label,
+        'bias': {iv: tf['bias'] for iv, tf in ok.items()},
+        'conflicts': [iv for iv, tf in ok.items() if side and tf['bias'] == -side],
+    }
+
+
+def multi_timeframe(base, base_interval=MTF_BASE_INTERVAL, intervals=MTF_INTERVALS, lookback=DEFAULT_LOOKBACK,
+                    fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD, weights=None, max_workers=None,
+                    session_start=None) -> dict:
+    """
+    تحلیل همه‌ی تایم‌فریم‌ها از روی یک سری پایه (session_start مرز روزها؛ timeframe_frames).
+    خروجی: {'timeframes': {interval: {bars, bias, scenarios} یا {error}}, 'confluence': {...}}
+    """
+    frames = timeframe_frames(base, base_interval, intervals, session_start)
+    timeframes = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(frames)) as pool:
+        futures = {iv: pool.submit(analyze_timeframe, df, lookback, fast, slow, atr_period) for iv, df in frames.items()}
+        for iv, fut in futures.items():
+            try:
+                timeframes[iv] = fut.result()
+            except Exception as e:
+                timeframes[iv] = {'error': str(e)}
+    return {'timeframes': timeframes, 'confluence': confluence(timeframes, weights)}
+
+
+def analyze_mtf(symbol, period=MTF_PERIOD, base_interval=MTF_BASE_INTERVAL, intervals=MTF_INTERVALS,
+                lookback=DEFAULT_LOOKBACK, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD, source=fetch_data) -> dict:
+    """یک دانلود برای base_interval و همه‌ی تایم‌فریم‌ها از روی آن"""
+    base = source(symbol, period, base_interval)
+    if base.empty:
+        raise RuntimeError("دیتا برای نماد مورد نظر پیدا نشد.")
+    return multi_timeframe(base, base_interval, intervals, lookback, fast, slow, atr_period,
+                           session_start=SESSION_STARTS.get(symbol))
+
+
+def confluence_table(result) -> pd.DataFrame:
+    """جدول شرایط هر تایم‌فریم (یک ردیف برای هر interval) برای نمایش"""
+    rows = []
+    for iv, tf in result['timeframes'].items():
+        row = {'interval': iv}
+        if 'error' in tf:
+            row['error'] = tf['error']
+        else:
+            s = tf['scenarios']
+            row.update(bars=tf['bars'], bias=tf['bias'], price=s['price'], ma_fast=s['ma_fast'],
+                       ma_slow=s['ma_slow'], atr=s['atr'], **s['market_structure'],
+                       **s['bullish_conditions'], **s['bearish_conditions'])
+        rows.append(row)
+    return pd.DataFrame(rows).set_index('interval')
@@ -0,0 +1,201 @@
+# analysis/optimizer.py
+import itertools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analysis.backtest import MAX_HOLD, backtest_arrays, entry_mask, first_hit, merge_sides, resolve_trades
+from analysis.kernels import true_range
+from analysis.scenarios import scenario_arrays
+from config import USE_NUMBA
+
+STAT_COLUMNS = ['trades', 'hit_rate', 'avg_r', 'total_r', 'max_drawdown_r']
+
+
+def mean_from_cumsum(cs, w):
+    """rolling(w, min_periods=1).mean() از جمع تجمعی cs (با صفر ابتدایی)"""
+    n = len(cs) - 1
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - w, 0)
+    return (cs[end] - cs[start]) / (end - start)
+
+
+class SweepData:
+    """
+    داده‌های مشترک بین همه‌ی ترکیب‌ها: جمع تجمعی Close و True Range یک‌بار محاسبه می‌شوند
+    و هر پنجره‌ی MA/ATR و سطوح هر lookback فقط یک‌بار از آن‌ها ساخته و نگه داشته می‌شود.
+    """
+
+    def __init__(self, high, low, close):
+        self.high, self.low, self.close = high, low, close
+        self.cs_close = np.concatenate([[0.0], np.cumsum(close)])
+        self.cs_tr = np.concatenate([[0.0], np.cumsum(true_range(high, low, close))])
+        self._ma = {}
+        self._atr = {}
+        self._levels = {}
+
+    def ma(self, w):
+        if w not in self._ma:
+            self._ma[w] = mean_from_cumsum(self.cs_close, w)
+        return self._ma[w]
+
+    def atr(self, n):
+        if n not in self._atr:
+            self._atr[n] = mean_from_cumsum(self.cs_tr, n)
+        return self._atr[n]
+
+    def levels(self, lookback):
+        if lookback not in self._levels:
+            self._levels[lookback] = (
+                pd.Series(self.high).rolling(lookback, min_periods=1).max().to_numpy(),
+                pd.Series(self.low).rolling(lookback, min_periods=1).min().to_numpy())
+        return self._levels[lookback]
+
+    def evaluate(self, fast, slow, atr_period, lookback, max_hold=MAX_HOLD, target=1):
+        recent_high, recent_low = self.levels(lookback)
+        arrays = scenario_arrays(self.close, self.ma(fast), self.ma(slow), self.atr(atr_period),
+                                 recent_high, recent_low)
+        stats = backtest_arrays(self.high, self.low, self.close, arrays, max_hold, target)['all']
+        return [stats[k] for k in STAT_COLUMNS]
+
+    def evaluate_group(self, pairs, atr_period, lookback, max_hold=MAX_HOLD, target=1):
+        """
+        همان evaluate برای همه‌ی (fast, slow) های pairs با یک atr_period و lookback.
+        حد ضرر و هدف هر کندل (در حالت روند) فقط به atr_period/lookback بستگی دارند، پس نتیجه‌ی ورود در هر
+        کندل (خروج، R، نوع خروج) یک‌بار برای همه‌ی کندل‌ها حساب می‌شود و هر (fast, slow) فقط زنجیره‌ی
+        معاملات بدون هم‌پوشانی را روی کندل‌های سیگنالش دنبال می‌کند.
+        """
+        high, low, close = self.high, self.low, self.close
+        n = len(close)
+        recent_high, recent_low = self.levels(lookback)
+        atr_vals = self.atr(atr_period)
+        rng = recent_high - recent_low
+        # فرمول‌های bull_stop/bear_stop و اهداف scenario_arrays در حالت روند
+        sides = (('long', np.maximum(recent_low - 0.5 * atr_vals, close - 2*atr_vals),
+                  (recent_high, recent_high + 0.5*rng)[target]),
+                 ('short', np.minimum(recent_high + 0.5*atr_vals, close + 2*atr_vals),
+                  (recent_low, recent_low - 0.5*rng)[target]))
+        outcomes = {}
+        for side, stop, tgt in sides:
+            ok = entry_mask(close, stop, tgt, side)
+            rows = np.flatnonzero(ok)
+            long = side == 'long'
+            trades = resolve_trades(close, rows, stop, tgt, first_hit(high, low, stop, rows, not long, max_hold),
+                                    first_hit(high, low, tgt, rows, long, max_hold), side, max_hold)
+            exit_idx = np.zeros(n, dtype=np.int64)
+            r = np.zeros(n)
+            outcome = np.zeros(n, dtype=np.int8)
+            exit_idx[rows], r[rows], outcome[rows] = trades['exit'], trades['r'], trades['outcome']
+            # ورود بعدی حداقل یک کندل بعد (مثل non_overlapping وقتی خروج همان کندل آخر است)
+            resume = np.maximum(exit_idx, np.arange(1, n + 1))
+            outcomes[side] = (ok, resume, exit_idx, r, outcome)
+
+        out = []
+        for fast, slow in pairs:
+            ma_fast, ma_slow = self.ma(fast), self.ma(slow)
+            signals = {'long': (close > ma_slow) & (ma_fast > ma_slow),
+                       'short': (close < ma_slow) & (ma_fast < ma_slow)}
+            trades = []
+            for side, (ok, resume, exit_idx, r, outcome) in outcomes.items():
+                idx = _chain(signals[side] & ok, resume)
+                trades.append({'entry': idx, 'exit': exit_idx[idx], 'r': r[idx], 'outcome': outcome[idx]})
+            stats = merge_sides(*trades, overlap=True)['all']
+            out.append([fast, slow, atr_period, lookback] + [stats[k] for k in STAT_COLUMNS])
+        return out
+
+
+def _chain_loop(signal, resume, keep):
+    """کندل سیگنال ورود است و جستجو از resume آن ادامه می‌یابد؛ تعداد ورودهای نوشته‌شده در keep"""
+    n = len(signal)
+    count = 0
+    k = 0
+    while k < n:
+        if signal[k]:
+            keep[count] = k
+            count += 1
+            k = resume[k]
+        else:
+            k += 1
+    return count
+
+
+_jit_lock = threading.Lock()
+_jitted = {}
+
+
+def _jit_chain():
+    """نسخه‌ی JIT شده‌ی _chain_loop (مثل kernels._jit_loop)؛ None اگر numba نباشد یا USE_NUMBA خاموش باشد"""
+    with _jit_lock:
+        if 'chain' not in _jitted:
+            try:
+                import numba
+            except ImportError:
+                _jitted['chain'] = None
+            else:
+                _jitted['chain'] = numba.njit(cache=True, nogil=True)(_chain_loop) if USE_NUMBA else None
+        return _jitted['chain']
+
+
+def _chain(signal, resume):
+    """
+    ورودهای non_overlapping: اولین کندل سیگنال، سپس هر بار اولین کندل سیگنال از resume ورود قبلی به بعد.
+    بدون numba تعداد گام‌ها به تعداد ورودهاست نه تعداد کندل‌ها.
+    """
+    n = len(signal)
+    loop = _jit_chain()
+    if loop is not None:
+        keep = np.empty(n, dtype=np.int64)
+        return keep[:loop(signal, resume, keep)]
+    # next_signal[p]: اولین کندل سیگنال در p یا بعد از آن (n یعنی هیچ)
+    next_signal = np.append(np.minimum.accumulate(np.where(signal, np.arange(n), n)[::-1])[::-1], n)
+    keep = []
+    k = int(next_signal[0])
+    while k < n:
+        keep.append(k)
+        k = int(next_signal[resume[k]])
+    return np.array(keep, dtype=np.int64)
+
+_data = None
+
+
+def _init_worker(high, low, close):
+    global _data
+    _data = SweepData(high, low, close)
+
+
+def _run_group(group, pairs, max_hold, target):
+    return _data.evaluate_group(pairs, *group, max_hold=max_hold, target=target)
+
+
+def sweep(df, fast=range(5, 45), slow=range(20, 220, 5), atr_period=range(5, 25, 2),
+          lookback=range(10, 110, 5), metric='total_r', min_trades=30,
+          max_hold=MAX_HOLD, target=1, processes=None):
+    """
+    جستجوی شبکه‌ای MA_FAST/MA_SLOW/ATR_PERIOD/lookback روی تاریخچه‌ی یک نماد.
+    خروجی DataFrame رتبه‌بندی‌شده بر اساس metric (ترکیب‌های fast >= slow حذف می‌شوند).
+    processes=0 یعنی اجرا در همین پروسه.
+    شبکه‌ی پیش‌فرض ۳۰۵ هزار ترکیب است: روی 60k کندل و یک هسته (processes=0، با numba) حدود ۲۰۰ ثانیه
+    (0.65ms برای هر ترکیب؛ بدون numba حدود ۳ برابر). range ها می‌توانند generator هم باشند.
+    """
+    fast, slow, atr_period, lookback = (list(v) for v in (fast, slow, atr_period, lookback))
+    high, low, close = (df[c].to_numpy(float) for c in ('High', 'Low', 'Close'))
+    pairs = [(f, s) for f, s in itertools.product(fast, slow) if f < s]
+    # هر کار یک (atr_period, lookback) با همه‌ی (fast, slow) ها، تا اولین برخوردها یک‌بار حساب شوند
+    groups = list(itertools.product(atr_period, lookback))
+
+    if processes == 0:
+        _init_worker(high, low, close)
+        rows = [r for g in groups for r in _run_group(g, pairs, max_hold, target)]
+    else:
+        processes = processes or os.cpu_count()
+        with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(high, low, close)) as pool:
+            rows = [r for part in pool.map(_run_group, groups, itertools.repeat(pairs), itertools.repeat(max_hold),
+                                           itertools.repeat(target)) for r in part]
+    rows.sort()     # ترتیب (fast, slow, atr_period, lookback) مستقل از گروه‌بندی کارها
+
+    result = pd.DataFrame(rows, columns=['fast', 'slow', 'atr_period', 'lookback'] + STAT_COLUMNS)
+    result = result[result['trades'] >= min_trades]
+    return result.sort_values(metric, ascending=False, ignore_index=True)
@@ -0,0 +1,239 @@
+# analysis/pipeline.py
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from config import (DEFAULT_PERIOD, DEFAULT_INTERVAL, DEFAULT_LOOKBACK, MA_FAST, MA_SLOW, ATR_PERIOD,
+                    MTF_PERIOD, MTF_BASE_INTERVAL, MTF_INTERVALS, MC_PATHS, MC_STEPS, MC_METHOD, MC_SEED,
+                    SESSION_STARTS)
+from analysis.bars import BarSeries
+from analysis.cache import LRUCache, interval_ttl
+from analysis.data_fetcher import fetch_data
+from analysis.graph import IndicatorGraph
+from analysis.indicators import add_indicators, support_resistance_levels, market_structure
+from analysis.montecarlo import hit_probabilities
+from analysis.mtf import multi_timeframe
+from analysis.scenarios import generate_scenarios, scenarios_from_values
+
+FETCH_WORKERS = 8
+
+
+def bars_version(bars_key, bars) -> tuple:
+    """
+    نسخه‌ی bars برای کلید لایه‌های بعدی: طول، زمان و بایت‌های آخرین کندل. کندل نیمه‌کاره‌ی آخر با همان
+    زمان به‌روز می‌شود (BarStore.get)، پس طول و زمان به تنهایی کافی نیستند.
+    """
+    last = tuple(v[-1:].tobytes() for v in bars.columns.values())
+    return bars_key + (len(bars), int(bars.index[-1].view('int64')), last)
+
+
+def analyze_frame(df, lookback=DEFAULT_LOOKBACK, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD):
+    """زنجیره‌ی کامل اندیکاتورها و سناریوها روی یک DataFrame (همان مراحل app.py)"""
+    return analyze_frame_timed(df, lookback, fast, slow, atr_period)[0]
+
+
+def analyze_frame_timed(df, lookback=DEFAULT_LOOKBACK, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD):
+    """analyze_frame همراه با زمان هر مرحله (ثانیه)؛ خروجی (scenarios, timings)"""
+    if df.empty:
+        raise RuntimeError("دیتا برای نماد مورد نظر پیدا نشد.")
+    t0 = time.perf_counter()
+    df = add_indicators(df, fast, slow, atr_period)
+    t1 = time.perf_counter()
+    levels = support_resistance_levels(df, lookback)
+    t2 = time.perf_counter()
+    struct = market_structure(df)
+    t3 = time.perf_counter()
+    scenarios = generate_scenarios(df, levels, struct)
+    t4 = time.perf_counter()
+    return scenarios, {'indicators': t1 - t0, 'levels': t2 - t1, 'structure': t3 - t2, 'scenarios': t4 - t3}
+
+
+def fetch_many(symbols, period=DEFAULT_PERIOD, interval=DEFAULT_INTERVAL, source=fetch_data,
+               max_workers=FETCH_WORKERS):
+    """دانلود هم‌زمان چند نماد با حداکثر max_workers نخ؛ خروجی (frames, errors)"""
+    frames, errors = {}, {}
+    for symbol, df, err, _ in _iter_fetch(list(dict.fromkeys(symbols)), period, interval, source, max_workers):
+        if err is None:
+            frames[symbol] = df
+        else:
+            errors[symbol] = err
+    return frames, errors
+
+
+def _timed_fetch(source, symbol, period, interval):
+    t0 = time.perf_counter()
+    df = source(symbol, period, interval)
+    return df, time.perf_counter() - t0
+
+
+def _iter_fetch(symbols, period, interval, source, max_workers):
+    """(symbol, df, error, seconds) به ترتیب اتمام دانلودها"""
+    if not symbols:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as pool:
+        futures = {pool.submit(_timed_fetch, source, s, period, interval): s for s in symbols}
+        for fut in as_completed(futures):
+            try:
+                df, seconds = fut.result()
+                yield futures[fut], df, None, seconds
+            except Exception as e:
+                yield futures[fut], None, str(e), None
+
+
+def iter_analyze(symbols, period=DEFAULT_PERIOD, interval=DEFAULT_INTERVAL, lookback=DEFAULT_LOOKBACK,
+                 fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD, source=fetch_data,
+                 fetch_workers=FETCH_WORKERS, processes=None):
+    """
+    اجرای موازی کل زنجیره برای یک واچ‌لیست.
+    دانلودها در نخ‌ها اجرا می‌شوند و هر نماد به محض رسیدن دیتا به process pool سپرده می‌شود،
+    پس زمان کل به کندترین دانلود محدود است نه مجموع آن‌ها.
+    خروجی: (symbol, scenarios) به ترتیب اتمام؛ برای نمادهای ناموفق {'error': ...}
+    processes=0 یعنی محاسبات در همین پروسه انجام شوند.
+    """
+    for symbol, result, _ in iter_analyze_timed(symbols, period, interval, lookback, fast, slow, atr_period,
+                                                source, fetch_workers, processes):
+        yield symbol, result
+
+
+def iter_analyze_timed(symbols, period=DEFAULT_PERIOD, interval=DEFAULT_INTERVAL, lookback=DEFAULT_LOOKBACK,
+                       fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD, source=fetch_data,
+                       fetch_workers=FETCH_WORKERS, processes=None):
+    """مثل iter_analyze با زمان مراحل: (symbol, scenarios, {'fetch': ..., 'indicators': ..., ...})"""
+    symbols = list(dict.fromkeys(symbols))
+    fetched = _iter_fetch(symbols, period, interval, source, fetch_workers)
+
+    if processes == 0:
+        for symbol, df, err, fetch_s in fetched:
+            if err is not None:
+                yield symbol, {'error': err}, {}
+                continue
+            try:
+                scenarios, timings = analyze_frame_timed(df, lookback, fast, slow, atr_period)
+                yield symbol, scenarios, {'fetch': fetch_s, **timings}
+            except Exception as e:
+                yield symbol, {'error': str(e)}, {'fetch': fetch_s}
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        pending = {}
+        for symbol, df, err, fetch_s in fetched:
+            if err is not None:
+                yield symbol, {'error': err}, {}
+                continue
+            pending[pool.submit(analyze_frame_timed, df, lookback, fast, slow, atr_period)] = (symbol, fetch_s)
+            # نتایج آماده را بدون انتظار برای بقیه‌ی دانلودها تحویل بده
+            for fut in [f for f in pending if f.done()]:
+                yield _timed_result(pending.pop(fut), fut)
+        for fut in as_completed(pending):
+            yield _timed_result(pending[fut], fut)
+
+
+def _timed_result(key, fut):
+    symbol, fetch_s = key
+    try:
+        scenarios, timings = fut.result()
+        return symbol, scenarios, {'fetch': fetch_s, **timings}
+    except Exception as e:
+        return symbol, {'error': str(e)}, {'fetch': fetch_s}
+
+
+def analyze_many(symbols, **kwargs):
+    """سناریوهای چند نماد به صورت {symbol: scenarios}"""
+    return dict(iter_analyze(symbols, **kwargs))
+
+
+class LayeredAnalysis:
+    """
+    کش لایه‌ای برای داشبورد:
+      bars       ← (symbol, period, interval) با TTL وابسته به interval
+      indicators ← bars + (fast, slow, atr_period)   (MA/ATR و ساختار بازار)
+      scenarios  ← indicators + lookback            (سطوح و سناریوها)
+    با تغییر فقط lookback تنها لایه‌ی آخر دوباره محاسبه می‌شود.
+    محاسبات دو لایه‌ی آخر از گراف اندیکاتورها (analysis/graph.py) می‌آیند که گره‌ها را جدا کش می‌کند؛
+    مثلاً تغییر fast فقط MA_fast را دوباره حساب می‌کند و ATR/ساختار از کش گراف برمی‌گردند.
+    """
+
+    def __init__(self, source=fetch_data, bars_size=16, indicators_size=32, scenarios_size=128):
+        self.source = source
+        self.bars = LRUCache(bars_size)
+        self.indicators = LRUCache(indicators_size)
+        self.scenarios = LRUCache(scenarios_size)
+        self.graph = IndicatorGraph(maxsize=16 * indicators_size)
+
+    def run(self, symbol, period=DEFAULT_PERIOD, interval=DEFAULT_INTERVAL, lookback=DEFAULT_LOOKBACK,
+            fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD, mtf=False, montecarlo=False) -> dict:
+        """
+        mtf=True: امتیاز هم‌سویی تایم‌فریم‌ها (multi_timeframe) هم به generate_scenarios داده می‌شود؛
+        اگر دیتای چند تایم‌فریمی نرسد 'mtf' فقط {'error'} دارد و سناریوها بدون confluence ساخته می‌شوند.
+        montecarlo=True: احتمال برخورد به هدف‌ها/حد ضرر (analysis/montecarlo.hit_probabilities) در کلید 'montecarlo'.
+        """
+        t0 = time.perf_counter()
+        bars_key = (symbol, period, interval)
+        bars, bars_hit = self._bars(bars_key)
+
+        # نسخه‌ی bars در کلید تا با تازه شدن کندل‌ها (یا کندل نیمه‌کاره‌ی آخر) لایه‌های بعدی هم باطل شوند
+        version = bars_version(bars_key, bars)
+        ind_key = version + (fast, slow, atr_period)
+        params = {'fast': fast, 'slow': slow, 'atr_period': atr_period, 'lookback': lookback}
+
+        def compute_indicators():
+            out = self.graph.evaluate(bars, ['MA_fast', 'MA_slow', 'ATR', 'market_structure'], params, key=version)
+            data = bars.copy()
+            for name in ('MA_fast', 'MA_slow', 'ATR'):
+                data[name] = out[name]
+            return data, dict(out['market_structure']), data.to_frame()
+
+        (data, struct, frame), ind_hit = self.indicators.get_or_compute(ind_key, compute_indicators)
+
+        mtf_result, confluence = None, None
+        if mtf:
+            try:
+                mtf_result = self.multi_timeframe(symbol, lookback, fast, slow, atr_period)
+                confluence = mtf_result['confluence']
+            except Exception as e:
+                mtf_result = {'error': str(e)}
+
+        def compute_scenarios():
+            out = self.graph.evaluate(bars, ['price', 'ma_fast', 'ma_slow', 'atr', 'levels'], params, key=version)
+            levels = dict(out['levels'])
+            return levels, scenarios_from_values(out['price'], out['ma_fast'], out['ma_slow'], out['atr'],
+                                                 levels, struct, confluence)
+
+        # سناریوها فقط از طریق جهت تایم‌فریم‌ها به نتیجه‌ی چند تایم‌فریمی وابسته‌اند
+        scn_key = ind_key + (lookback, tuple(confluence['bias'].items()) if confluence is not None else None)
+        (levels, scenarios), scn_hit = self.scenarios.get_or_compute(scn_key, compute_scenarios)
+
+        mc = None
+        if montecarlo:
+            mc, _ = self.scenarios.get_or_compute(scn_key + ('mc', MC_PATHS, MC_STEPS, MC_METHOD, MC_SEED),
+                                                  lambda: hit_probabilities(scenarios, data['Close']))
+        return {
+            'bars': data,
+            'frame': frame,
+            'levels': levels,
+            'struct': struct,
+            'scenarios': scenarios,
+            'mtf': mtf_result,
+            'montecarlo': mc,
+            'hits': {'bars': bars_hit, 'indicators': ind_hit, 'scenarios': scn_hit},
+            'seconds': time.perf_counter() - t0,
+        }
+
+    def _bars(self, bars_key):
+        symbol, period, interval = bars_key
+        bars, hit = self.bars.get_or_compute(
+            bars_key, lambda: BarSeries.from_frame(self.source(symbol, period, interval)), interval_ttl(interval))
+        if bars.empty:
+            raise RuntimeError("دیتا برای نماد مورد نظر پیدا نشد.")
+        return bars, hit
+
+    def multi_timeframe(self, symbol, lookback=DEFAULT_LOOKBACK, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD,
+                        period=MTF_PERIOD, base_interval=MTF_BASE_INTERVAL, intervals=MTF_INTERVALS) -> dict:
+        """analysis/mtf.multi_timeframe روی سری پایه از همان کش bars (یک دانلود برای همه‌ی تایم‌فریم‌ها)"""
+        bars_key = (symbol, period, base_interval)
+        bars, _ = self._bars(bars_key)
+        session = SESSION_STARTS.get(symbol)
+        key = ('mtf',) + bars_version(bars_key, bars) + (tuple(intervals), lookback, fast, slow, atr_period, session)
+        result, _ = self.scenarios.get_or_compute(
+            key, lambda: multi_timeframe(bars.to_frame(), base_interval, intervals, lookback, fast, slow, atr_period,
+                                         session_start=session))
+        return result
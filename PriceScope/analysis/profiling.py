@@ -0,0 +1,171 @@
+# analysis/profiling.py
+# اندازه‌گیری زمان، تعداد ردیف و حافظه‌ی هر مرحله؛ پیش‌فرض خاموش
+#   PRICESCOPE_PROFILE=1       زمان و تعداد ردیف
+#   PRICESCOPE_PROFILE=memory  به‌علاوه‌ی اوج حافظه با tracemalloc (کندتر)
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+KEEP = 1000   # حداکثر رکورد نگه‌داشته‌شده برای هر مرحله
+
+
+class _State:
+    enabled = False
+    memory = False
+
+
+_state = _State()
+_records = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def enable(memory=False):
+    _state.enabled = True
+    _state.memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    _state.enabled = False
+    if _state.memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state.memory = False
+
+
+def enabled():
+    return _state.enabled
+
+
+def reset():
+    with _lock:
+        _records.clear()
+
+
+def record(name, seconds, rows=None, peak_bytes=None):
+    with _lock:
+        if name not in _records:
+            _records[name] = deque(maxlen=KEEP)
+        _records[name].append((seconds, rows, peak_bytes))
+
+
+class _NullSpan:
+    """span خاموش: بدون هیچ اندازه‌گیری"""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'rows', 't0', 'mem')
+
+    def __init__(self, name, rows):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        if _state.memory:
+            # پشته‌ی span های تو در تو: اوج حافظه‌ی فرزند به والد منتقل می‌شود
+            stack = getattr(_local, 'stack', None)
+            if stack is None:
+                stack = _local.stack = []
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            self.mem = [current, current]   # [شروع، بیشترین اوج فرزندان]
+            stack.append(self.mem)
+        else:
+            self.mem = None
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.t0
+        peak = None
+        if self.mem is not None and tracemalloc.is_tracing():
+            stack = _local.stack
+            stack.pop()
+            top = max(tracemalloc.get_traced_memory()[1], self.mem[1])
+            peak = top - self.mem[0]
+            if stack:
+                stack[-1][1] = max(stack[-1][1], top)
+        record(self.name, seconds, self.rows, peak)
+        return False
+
+
+def span(name, rows=None):
+    """
+    with span('indicators.atr', rows=len(df)) as s: ...
+    تعداد ردیف را می‌توان داخل بلوک هم با s.rows = n تعیین کرد.
+    """
+    if not _state.enabled:
+        return _NULL
+    return _Span(name, rows)
+
+
+def profiled(name=None, rows=None):
+    """دکوراتور span؛ rows تابعی روی همان آرگومان‌ها (مثلاً lambda df, *a, **k: len(df))"""
+    def decorate(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _state.enabled:
+                return fn(*args, **kwargs)
+            with _Span(label, rows(*args, **kwargs) if rows else None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def summary() -> pd.DataFrame:
+    """خلاصه‌ی هر مرحله در همه‌ی اجراها: تعداد، p50/p95/max زمان، میانگین ردیف و بیشترین اوج حافظه"""
+    with _lock:
+        items = [(name, list(recs)) for name, recs in _records.items()]
+    rows = []
+    for name, recs in items:
+        ms = np.array([r[0] for r in recs]) * 1000
+        n_rows = [r[1] for r in recs if r[1] is not None]
+        peaks = [r[2] for r in recs if r[2] is not None]
+        rows.append({
+            'stage': name,
+            'calls': len(recs),
+            'total_ms': ms.sum(),
+            'p50_ms': np.percentile(ms, 50),
+            'p95_ms': np.percentile(ms, 95),
+            'max_ms': ms.max(),
+            'rows': np.mean(n_rows) if n_rows else np.nan,
+            'peak_kb': max(peaks) / 1024 if peaks else np.nan,
+        })
+    columns = ['stage', 'calls', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms', 'rows', 'peak_kb']
+    return pd.DataFrame(rows, columns=columns).sort_values('total_ms', ascending=False, ignore_index=True)
+
+
+def dump(path):
+    """خلاصه و رکوردهای خام در یک فایل JSON"""
+    with _lock:
+        raw = {name: [list(r) for r in recs] for name, recs in _records.items()}
+    data = {'summary': summary().to_dict(orient='records'), 'records': raw}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, default=float)
+
+
+_mode = os.environ.get('PRICESCOPE_PROFILE', '').strip().lower()
+if _mode not in ('', '0', 'false', 'off'):
+    enable(memory=_mode == 'memory')
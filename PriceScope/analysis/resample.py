@@ -0,0 +1,101 @@
+# analysis/resample.py
+import numpy as np
+import pandas as pd
+
+from config import INTERVAL_SECONDS
+
+# بازه‌هایی که yfinance مستقیم می‌دهد
+NATIVE_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"}
+
+# بازه‌ی درشت -> بازه‌ی ریزتری که از آن ساخته می‌شود
+DERIVE_FROM = {"2h": "1h", "4h": "1h", "1d": "1h", "1wk": "1d"}
+
+DAY_NS = 86400 * 10**9
+QUARTER_NS = 900 * 10**9
+UNIT_NS = {'s': 10**9, 'ms': 10**6, 'us': 10**3, 'ns': 1}
+# 1970-01-01 پنجشنبه بود؛ هفته‌ها مثل yfinance از دوشنبه شروع می‌شوند
+WEEK_ORIGIN_NS = 4 * DAY_NS
+
+
+def _utc_ns(index):
+    """زمان‌های index به int64 نانوثانیه‌ی UTC (بدون as_unit که روی index دارای tz کند است)"""
+    index = pd.DatetimeIndex(index)
+    return index.asi8 * UNIT_NS[index.unit]
+
+
+def _clock_ns(index):
+    """زمان ساعت دیواری (در منطقه‌ی زمانی خود index) به صورت int64 نانوثانیه"""
+    index = pd.DatetimeIndex(index)
+    utc = _utc_ns(index)
+    if index.tz is None:
+        return utc
+    # اختلاف با UTC در هر ربع ساعت ثابت است؛ فقط یک زمان از هر ربع ساعت تبدیل می‌شود
+    quarter = utc // QUARTER_NS
+    first = np.flatnonzero(np.diff(quarter, prepend=quarter[0] - 1))
+    offset = _utc_ns(index[first].tz_localize(None)) - utc[first]
+    return utc + np.repeat(offset, np.diff(np.append(first, len(utc))))
+
+
+def bucket_starts(clock, interval, session_start=None):
+    """
+    اندیس اولین کندل هر سطل و برچسب سطل‌ها؛ clock و برچسب‌ها int64 نانوثانیه‌ی ساعت دیواری‌اند.
+    سطل‌ها روی ساعت دیواری بسته می‌شوند (روز از نیمه‌شب، هفته از دوشنبه)؛
+    session_start مثل "18:00" روزها را از شروع جلسه‌ی معاملاتی می‌بندد و برچسب هر سطل
+    تاریخ روز معاملاتی (روز بعد از شروع جلسه) می‌شود.
+    """
+    width = INTERVAL_SECONDS[interval] * 10**9
+    origin = WEEK_ORIGIN_NS if interval == "1wk" else 0
+    label_shift = 0
+    if session_start is not None and width >= DAY_NS:
+        hours, minutes = map(int, session_start.split(':')[:2])
+        start = pd.Timedelta(hours=hours, minutes=minutes).value
+        origin += start - DAY_NS
+        label_shift = DAY_NS - start
+    ids = (clock - origin) // width
+    starts = np.flatnonzero(np.diff(ids, prepend=ids[0] - 1))
+    labels = ids[starts] * width + origin + label_shift
+    return starts, labels
+
+
+def _labels_index(labels, index, starts, clock_starts):
+    """برچسب‌های ساعت دیواری به منطقه‌ی زمانی index؛ ساعت ناموجود (شروع DST) جلو می‌رود و ساعت مبهم از زمان اولین کندل"""
+    tz = pd.DatetimeIndex(index).tz
+    out = pd.DatetimeIndex(labels.view('datetime64[ns]'))
+    if tz is None:
+        return out
+    local = out.tz_localize(tz, ambiguous='NaT', nonexistent='shift_forward')
+    values = local.asi8.copy()
+    bad = local.isna()
+    if bad.any():
+        first = _utc_ns(pd.DatetimeIndex(index)[starts])
+        values[bad] = (first - (clock_starts - labels))[bad]
+    return pd.DatetimeIndex(values.view('datetime64[ns]')).tz_localize('UTC').tz_convert(tz)
+
+
+def resample_ohlcv(df, interval, session_start=None) -> pd.DataFrame:
+    """
+    کندل‌های interval از کندل‌های ریزتر (Open اول، High بیشینه، Low کمینه، Close آخر، Volume جمع).
+    برداری با reduceat روی مرز سطل‌ها؛ index باید مرتب باشد.
+    """
+    if df.empty:
+        return df.copy()
+    clock = _clock_ns(df.index)
+    starts, labels = bucket_starts(clock, interval, session_start)
+    ends = np.append(starts[1:], len(df)) - 1
+    out = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if col == 'Open':
+            out[col] = values[starts]
+        elif col == 'High':
+            out[col] = np.maximum.reduceat(values, starts)
+        elif col == 'Low':
+            out[col] = np.minimum.reduceat(values, starts)
+        elif col == 'Volume':
+            out[col] = np.add.reduceat(values, starts)
+        else:
+            # Close و ستون‌های مشابه (Adj Close): آخرین مقدار سطل
+            out[col] = values[ends]
+    index = _labels_index(labels, df.index, starts, clock[starts])
+    index.name = df.index.name
+    return pd.DataFrame(out, index=index, columns=df.columns)
@@ -1,6 +1,11 @@
 ﻿# analysis/scenarios.py
+import json
+
 import numpy as np
 
+from analysis.bars import BarSeries
+from analysis.profiling import profiled, span
+
 def to_py(v):
     """تبدیل numpy types به پایتون برای نمایش"""
     if isinstance(v, np.generic):
@@ -11,69 +16,317 @@ def to_py(v):
         return {k: to_py(val) for k, val in v.items()}
     return v
 
-def generate_scenarios(df, levels, struct, ma_fast_col='MA_fast', ma_slow_col='MA_slow', atr_col='ATR'):
-    last = df.iloc[-1]
-    price = float(last['Close'])
-    ma_fast = float(last[ma_fast_col])
-    ma_slow = float(last[ma_slow_col])
-    atr_val = float(last[atr_col])
+LEVELS = ('recent_high', 'recent_low', 'resistance_2', 'support_2')
+STRUCTURE = ('higher_highs', 'higher_lows')
+VALUES = ('price', 'ma_fast', 'ma_slow', 'atr') + LEVELS + STRUCTURE
+BULLISH_CONDITIONS = ('price_above_slow_ma', 'ma_fast_above_slow', 'near_support', 'breakout_above_recent_high')
+BEARISH_CONDITIONS = ('price_below_slow_ma', 'ma_fast_below_slow', 'near_resistance', 'breakdown_below_recent_low')
+
+# متن سناریوها بر اساس وجود روند: (thesis، قالب entry_if)؛ فقط هنگام نمایش ساخته می‌شوند
+BULLISH_TEXT = {
+    True: ("روند صعودی ادامه‌دار (trend following).",
+           "پولبک یا بازگشت نزدیک {low:.2f} یا شکست بالای {high:.2f}."),
+    False: ("شرایط روند صعودی قوی نیست؛ ورود فقط پس از شکست و تثبیت مقاومت.",
+            "شکست و تثبیت بالای {high:.2f}"),
+}
+BEARISH_TEXT = {
+    True: ("روند نزولی ادامه دارد.",
+           "شکست حمایتی {low:.2f}."),
+    False: ("شرایط نزولی قوی نیست؛ ورود شورت فقط پس از شکست حمایتی.",
+            "شکست و تثبیت زیر {low:.2f}"),
+}
 
-    bullish_conditions = {
-        'price_above_slow_ma': price > ma_slow,
+@profiled('scenarios.generate')
+def generate_scenarios(df, levels, struct, ma_fast_col='MA_fast', ma_slow_col='MA_slow', atr_col='ATR', confluence=None):
+    """confluence (خروجی analysis/mtf.confluence) اختیاری است و هشدار ناهم‌سویی تایم‌فریم‌ها را اضافه می‌کند"""
+    last = df.last_row() if isinstance(df, BarSeries) else df.iloc[-1]
+    return scenarios_from_values(float(last['Close']), float(last[ma_fast_col]), float(last[ma_slow_col]),
+                                 float(last[atr_col]), levels, struct, confluence)
+
+def scenarios_from_values(price, ma_fast, ma_slow, atr_val, levels, struct, confluence=None):
+    """همان generate_scenarios از آخرین مقدار Close/MA/ATR (بدون DataFrame؛ برای analysis/graph.py)"""
+    with span('scenarios.to_dict'):
+        scenarios = ScenarioResult.from_values(price, ma_fast, ma_slow, atr_val, levels, struct).to_dict()
+    if confluence is not None:
+        scenarios['confluence'] = to_py(confluence)
+        scenarios['warnings'] = confluence_warnings(scenarios['bullish_conditions'], scenarios['bearish_conditions'],
+                                                    confluence)
+    return scenarios
+
+def confluence_warnings(bullish_conditions, bearish_conditions, confluence):
+    """هشدار وقتی روند این تایم‌فریم خلاف جهت تایم‌فریم‌های دیگر است"""
+    warnings = []
+    score = confluence['score']
+    if bullish_conditions['price_above_slow_ma'] and bullish_conditions['ma_fast_above_slow']:
+        against = [iv for iv, bias in confluence['bias'].items() if bias < 0]
+        if against:
+            warnings.append(f"روند صعودی این تایم‌فریم خلاف جهت نزولی {', '.join(against)} است (امتیاز هم‌سویی {score:+.2f}).")
+    if bearish_conditions['price_below_slow_ma'] and bearish_conditions['ma_fast_below_slow']:
+        against = [iv for iv, bias in confluence['bias'].items() if bias > 0]
+        if against:
+            warnings.append(f"روند نزولی این تایم‌فریم خلاف جهت صعودی {', '.join(against)} است (امتیاز هم‌سویی {score:+.2f}).")
+    return warnings
+
+def scenario_arrays(close, ma_fast, ma_slow, atr_vals, recent_high, recent_low):
+    """
+    نسخه‌ی برداری generate_scenarios برای همه‌ی کندل‌ها به صورت آرایه‌های NumPy
+    (شرایط صعودی/نزولی، حد ضرر و اهداف؛ همان فرمول‌های generate_scenarios)
+    """
+    close, ma_fast, ma_slow, atr_vals, recent_high, recent_low = (
+        np.asarray(a, dtype=float) for a in (close, ma_fast, ma_slow, atr_vals, recent_high, recent_low))
+    rng = recent_high - recent_low
+    resistance_2 = recent_high + 0.5*rng
+    support_2 = recent_low - 0.5*rng
+
+    out = {
+        'price_above_slow_ma': close > ma_slow,
         'ma_fast_above_slow': ma_fast > ma_slow,
-        'near_support': price <= levels['recent_low'] + 0.02 * (levels['recent_high'] - levels['recent_low']),
-        'breakout_above_recent_high': price > levels['recent_high']
-    }
-    bearish_conditions = {
-        'price_below_slow_ma': price < ma_slow,
+        'near_support': close <= recent_low + 0.02 * (recent_high - recent_low),
+        'breakout_above_recent_high': close > recent_high,
+        'price_below_slow_ma': close < ma_slow,
         'ma_fast_below_slow': ma_fast < ma_slow,
-        'near_resistance': price >= levels['recent_high'] - 0.02 * (levels['recent_high'] - levels['recent_low']),
-        'breakdown_below_recent_low': price < levels['recent_low']
+        'near_resistance': close >= recent_high - 0.02 * (recent_high - recent_low),
+        'breakdown_below_recent_low': close < recent_low,
+        'recent_high': recent_high,
+        'recent_low': recent_low,
+        'resistance_2': resistance_2,
+        'support_2': support_2,
     }
+    out['bull_trend'] = out['price_above_slow_ma'] & out['ma_fast_above_slow']
+    out['bear_trend'] = out['price_below_slow_ma'] & out['ma_fast_below_slow']
+    out['bull_stop'] = np.where(out['bull_trend'],
+                                np.maximum(recent_low - 0.5 * atr_vals, close - 2*atr_vals),
+                                recent_low - 1.0*atr_vals)
+    out['bear_stop'] = np.where(out['bear_trend'],
+                                np.minimum(recent_high + 0.5*atr_vals, close + 2*atr_vals),
+                                recent_high + 1.0*atr_vals)
+    return out
 
-    # سناریوی صعودی
-    if bullish_conditions['price_above_slow_ma'] and bullish_conditions['ma_fast_above_slow']:
-        bullish = {
-            'thesis': "روند صعودی ادامه‌دار (trend following).",
-            'entry_if': f"پولبک یا بازگشت نزدیک {levels['recent_low']:.2f} یا شکست بالای {levels['recent_high']:.2f}.",
-            'targets': [levels['recent_high'], levels['resistance_2']],
-            'stop_loss': float(max(levels['recent_low'] - 0.5 * atr_val, price - 2*atr_val))
+
+_TRISTATE = {None: -1, False: 0, True: 1}
+
+
+def _tristate(v):
+    """True/False/None به int8 با 1/0/-1"""
+    a = np.asarray(v)
+    if a.dtype == object:
+        return np.fromiter((_TRISTATE[None if x is None else bool(x)] for x in a), np.int8, len(a))
+    return a.astype(np.int8)
+
+
+class ScenarioResult:
+    """
+    نتیجه‌ی فشرده‌ی generate_scenarios: فقط اعداد ورودی (VALUES). شرایط، اهداف و حد ضررها از همین اعداد
+    با همان فرمول‌ها حساب می‌شوند و متن thesis/entry_if فقط در bullish()/bearish()/to_dict ساخته می‌شود.
+    higher_highs/higher_lows: True/False یا None (نامعلوم).
+    """
+
+    __slots__ = VALUES
+
+    def __init__(self, price, ma_fast, ma_slow, atr, recent_high, recent_low, resistance_2=None, support_2=None,
+                 higher_highs=None, higher_lows=None):
+        self.price = float(price)
+        self.ma_fast = float(ma_fast)
+        self.ma_slow = float(ma_slow)
+        self.atr = float(atr)
+        self.recent_high = float(recent_high)
+        self.recent_low = float(recent_low)
+        rng = self.recent_high - self.recent_low
+        self.resistance_2 = self.recent_high + 0.5*rng if resistance_2 is None else float(resistance_2)
+        self.support_2 = self.recent_low - 0.5*rng if support_2 is None else float(support_2)
+        self.higher_highs = None if higher_highs is None else bool(higher_highs)
+        self.higher_lows = None if higher_lows is None else bool(higher_lows)
+
+    @classmethod
+    def from_values(cls, price, ma_fast, ma_slow, atr_val, levels, struct):
+        """از ورودی‌های scenarios_from_values (dict سطوح و ساختار بازار)"""
+        return cls(price, ma_fast, ma_slow, atr_val, levels['recent_high'], levels['recent_low'],
+                   levels['resistance_2'], levels['support_2'], struct.get('higher_highs'), struct.get('higher_lows'))
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, k) for k in VALUES)
+
+    def __eq__(self, other):
+        return isinstance(other, ScenarioResult) and self.values() == other.values()
+
+    def __repr__(self):
+        return 'ScenarioResult(' + ', '.join(f'{k}={getattr(self, k)!r}' for k in VALUES) + ')'
+
+    @property
+    def bull_trend(self):
+        return self.price > self.ma_slow and self.ma_fast > self.ma_slow
+
+    @property
+    def bear_trend(self):
+        return self.price < self.ma_slow and self.ma_fast < self.ma_slow
+
+    @property
+    def bull_stop(self):
+        if self.bull_trend:
+            return max(self.recent_low - 0.5 * self.atr, self.price - 2*self.atr)
+        return self.recent_low - 1.0*self.atr
+
+    @property
+    def bear_stop(self):
+        if self.bear_trend:
+            return min(self.recent_high + 0.5*self.atr, self.price + 2*self.atr)
+        return self.recent_high + 1.0*self.atr
+
+    def bullish_conditions(self) -> dict:
+        return {
+            'price_above_slow_ma': self.price > self.ma_slow,
+            'ma_fast_above_slow': self.ma_fast > self.ma_slow,
+            'near_support': self.price <= self.recent_low + 0.02 * (self.recent_high - self.recent_low),
+            'breakout_above_recent_high': self.price > self.recent_high
         }
-    else:
-        bullish = {
-            'thesis': "شرایط روند صعودی قوی نیست؛ ورود فقط پس از شکست و تثبیت مقاومت.",
-            'entry_if': f"شکست و تثبیت بالای {levels['recent_high']:.2f}",
-            'targets': [levels['recent_high'], levels['resistance_2']],
-            'stop_loss': float(levels['recent_low'] - 1.0*atr_val)
+
+    def bearish_conditions(self) -> dict:
+        return {
+            'price_below_slow_ma': self.price < self.ma_slow,
+            'ma_fast_below_slow': self.ma_fast < self.ma_slow,
+            'near_resistance': self.price >= self.recent_high - 0.02 * (self.recent_high - self.recent_low),
+            'breakdown_below_recent_low': self.price < self.recent_low
         }
 
-    # سناریوی نزولی
-    if bearish_conditions['price_below_slow_ma'] and bearish_conditions['ma_fast_below_slow']:
-        bearish = {
-            'thesis': "روند نزولی ادامه دارد.",
-            'entry_if': f"شکست حمایتی {levels['recent_low']:.2f}.",
-            'targets': [levels['recent_low'], levels['support_2']],
-            'stop_loss': float(min(levels['recent_high'] + 0.5*atr_val, price + 2*atr_val))
+    def bullish(self) -> dict:
+        thesis, entry_if = BULLISH_TEXT[self.bull_trend]
+        return {
+            'thesis': thesis,
+            'entry_if': entry_if.format(low=self.recent_low, high=self.recent_high),
+            'targets': [self.recent_high, self.resistance_2],
+            'stop_loss': self.bull_stop
         }
-    else:
-        bearish = {
-            'thesis': "شرایط نزولی قوی نیست؛ ورود شورت فقط پس از شکست حمایتی.",
-            'entry_if': f"شکست و تثبیت زیر {levels['recent_low']:.2f}",
-            'targets': [levels['recent_low'], levels['support_2']],
-            'stop_loss': float(levels['recent_high'] + 1.0*atr_val)
+
+    def bearish(self) -> dict:
+        thesis, entry_if = BEARISH_TEXT[self.bear_trend]
+        return {
+            'thesis': thesis,
+            'entry_if': entry_if.format(low=self.recent_low, high=self.recent_high),
+            'targets': [self.recent_low, self.support_2],
+            'stop_loss': self.bear_stop
         }
 
-    scenarios = {
-        'price': price,
-        'ma_fast': ma_fast,
-        'ma_slow': ma_slow,
-        'atr': atr_val,
-        'levels': levels,
-        'market_structure': struct,
-        'bullish': bullish,
-        'bearish': bearish,
-        'bullish_conditions': bullish_conditions,
-        'bearish_conditions': bearish_conditions
-    }
+    def to_dict(self) -> dict:
+        """ساختار dict خروجی generate_scenarios (مقادیر پایتونی؛ to_py لازم نیست)"""
+        return {
+            'price': self.price,
+            'ma_fast': self.ma_fast,
+            'ma_slow': self.ma_slow,
+            'atr': self.atr,
+            'levels': {k: getattr(self, k) for k in LEVELS},
+            'market_structure': {k: getattr(self, k) for k in STRUCTURE},
+            'bullish': self.bullish(),
+            'bearish': self.bearish(),
+            'bullish_conditions': self.bullish_conditions(),
+            'bearish_conditions': self.bearish_conditions()
+        }
+
+
+class ScenarioBatch:
+    """
+    تعداد زیادی سناریو (نمادها یا کندل‌ها) به صورت ستون‌های NumPy: ستون‌های VALUES، با higher_highs/higher_lows
+    به صورت int8 (1/0 و -1 برای نامعلوم). شرایط و حد ضررها یک‌بار و برداری با scenario_arrays حساب می‌شوند و
+    خروجی Arrow/JSON مستقیم از ستون‌ها ساخته می‌شود؛ متن سناریوها فقط با text=True.
+        batch = ScenarioBatch.from_arrays(close, ma_fast, ma_slow, atr, recent_high, recent_low, index=symbols)
+        table = batch.to_arrow()        # pyarrow.Table
+        batch[i]                        # ScenarioResult
+    """
+
+    def __init__(self, columns, index=None):
+        self.columns = columns
+        self.index = index
+        self._derived = None
+
+    @classmethod
+    def from_arrays(cls, price, ma_fast, ma_slow, atr, recent_high, recent_low, resistance_2=None, support_2=None,
+                    higher_highs=None, higher_lows=None, index=None):
+        """آرایه‌های هم‌طول؛ resistance_2/support_2 پیش‌فرض از recent_high/recent_low و higher_* پیش‌فرض نامعلوم"""
+        cols = {k: np.asarray(v, dtype=np.float64)
+                for k, v in zip(VALUES, (price, ma_fast, ma_slow, atr, recent_high, recent_low))}
+        rng = cols['recent_high'] - cols['recent_low']
+        cols['resistance_2'] = (cols['recent_high'] + 0.5*rng if resistance_2 is None
+                                else np.asarray(resistance_2, dtype=np.float64))
+        cols['support_2'] = (cols['recent_low'] - 0.5*rng if support_2 is None
+                             else np.asarray(support_2, dtype=np.float64))
+        n = len(cols['price'])
+        for k, v in zip(STRUCTURE, (higher_highs, higher_lows)):
+            cols[k] = np.full(n, -1, dtype=np.int8) if v is None else _tristate(v)
+        return cls(cols, index)
+
+    @classmethod
+    def from_results(cls, results, index=None):
+        results = list(results)
+        n = len(results)
+        cols = {k: np.fromiter((getattr(r, k) for r in results), np.float64, n) for k in VALUES[:8]}
+        for k in STRUCTURE:
+            cols[k] = np.fromiter((_TRISTATE[getattr(r, k)] for r in results), np.int8, n)
+        return cls(cols, index)
+
+    def __len__(self):
+        return len(self.columns['price'])
+
+    def __getitem__(self, i) -> ScenarioResult:
+        c = self.columns
+        return ScenarioResult(*(c[k][i] for k in VALUES[:8]),
+                              *((None, False, True)[c[k][i] + 1] for k in STRUCTURE))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def derived(self) -> dict:
+        """خروجی scenario_arrays روی ستون‌ها (یک‌بار حساب و نگه داشته می‌شود)"""
+        if self._derived is None:
+            c = self.columns
+            self._derived = scenario_arrays(c['price'], c['ma_fast'], c['ma_slow'], c['atr'],
+                                            c['recent_high'], c['recent_low'])
+        return self._derived
+
+    def text(self, side):
+        """(thesis، entry_if) هر ردیف برای side='bullish' یا 'bearish'؛ رشته‌ها فقط همین‌جا ساخته می‌شوند"""
+        d = self.derived()
+        trend, texts = (d['bull_trend'], BULLISH_TEXT) if side == 'bullish' else (d['bear_trend'], BEARISH_TEXT)
+        trend = trend.tolist()
+        low, high = self.columns['recent_low'].tolist(), self.columns['recent_high'].tolist()
+        return ([texts[t][0] for t in trend],
+                [texts[t][1].format(low=lo, high=hi) for t, lo, hi in zip(trend, low, high)])
+
+    def flat(self, text=False) -> dict:
+        """ستون‌های تخت با همان نام‌های batch_cli.COLUMNS (اهداف نمای همان ستون‌های سطوح‌اند، بدون کپی)"""
+        c, d = self.columns, self.derived()
+        out = {k: c[k] for k in VALUES}
+        out.update((k, d[k]) for k in BULLISH_CONDITIONS + BEARISH_CONDITIONS)
+        sides = (('bullish', 'recent_high', 'resistance_2', 'bull_stop'),
+                 ('bearish', 'recent_low', 'support_2', 'bear_stop'))
+        for side, t1, t2, stop in sides:
+            if text:
+                out[f'{side}_thesis'], out[f'{side}_entry_if'] = self.text(side)
+            out[f'{side}_target_1'] = c[t1]
+            out[f'{side}_target_2'] = c[t2]
+            out[f'{side}_stop_loss'] = d[stop]
+        return out
+
+    def to_arrow(self, text=False):
+        """pyarrow.Table؛ ستون‌های float از بافر NumPy بدون کپی، higher_* به صورت bool با null"""
+        import pyarrow as pa
+        names, arrays = [], []
+        if self.index is not None:
+            names.append('index')
+            arrays.append(pa.array(self.index))
+        for name, col in self.flat(text).items():
+            names.append(name)
+            arrays.append(pa.array(col == 1, mask=col < 0) if name in STRUCTURE else pa.array(col))
+        return pa.Table.from_arrays(arrays, names=names)
 
-    return to_py(scenarios)
+    def to_json(self, text=False) -> str:
+        """JSON ستونی {نام: [مقادیر]} با tolist هر ستون (بدون پیمایش بازگشتی)؛ higher_* نامعلوم null است"""
+        out = {}
+        if self.index is not None:
+            index = np.asarray(self.index)
+            out['index'] = (index.astype(str) if index.dtype.kind == 'M' else index).tolist()
+        for name, col in self.flat(text).items():
+            if name in STRUCTURE:
+                obj = (col == 1).astype(object)
+                obj[col < 0] = None
+                col = obj
+            out[name] = col.tolist() if isinstance(col, np.ndarray) else col
+        return json.dumps(out, ensure_ascii=False, default=str)
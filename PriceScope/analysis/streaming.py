@@ -0,0 +1,174 @@
+# analysis/streaming.py
+import copy
+import math
+from collections import deque
+
+from config import MA_FAST, MA_SLOW, ATR_PERIOD, DEFAULT_LOOKBACK
+
+NAN = float('nan')
+
+
+class RollingMean:
+    """
+    میانگین متحرک با min_periods=1 و هزینه‌ی O(1) برای هر کندل.
+    همان الگوریتم rolling().mean() در pandas (جمع Kahan جدا برای افزودن/حذف)
+    پیاده شده تا خروجی بیت‌به‌بیت با pandas برابر باشد.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.window = deque()
+        self._reset()
+        self.value = NAN
+
+    def _reset(self):
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.comp_add = 0.0
+        self.comp_remove = 0.0
+        self.same = 0
+        self.prev = NAN
+
+    def _add(self, val):
+        if val != val:
+            return
+        self.nobs += 1
+        y = val - self.comp_add
+        t = self.sum_x + y
+        self.comp_add = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct += 1
+        self.same = self.same + 1 if val == self.prev else 1
+        self.prev = val
+
+    def _remove(self, val):
+        if val != val:
+            return
+        self.nobs -= 1
+        y = -val - self.comp_remove
+        t = self.sum_x + y
+        self.comp_remove = t - self.sum_x - y
+        self.sum_x = t
+        if math.copysign(1.0, val) < 0:
+            self.neg_ct -= 1
+
+    def update(self, val):
+        self.window.append(val)
+        if self.n == 1:
+            # pandas برای پنجره‌ی ۱ در هر قدم از صفر شروع می‌کند
+            if len(self.window) > 1:
+                self.window.popleft()
+            self._reset()
+        elif len(self.window) > self.n:
+            self._remove(self.window.popleft())
+        self._add(val)
+
+        if self.nobs > 0:
+            result = self.sum_x / self.nobs
+            if self.same >= self.nobs:
+                result = self.prev
+            elif self.neg_ct == 0 and result < 0:
+                result = 0.0
+            elif self.neg_ct == self.nobs and result > 0:
+                result = 0.0
+        else:
+            result = NAN
+        self.value = result
+        return result
+
+
+class RollingExtreme:
+    """بیشینه/کمینه‌ی n کندل اخیر با صف یکنوا (monotonic deque)؛ O(1) سرشکن"""
+
+    def __init__(self, n, mode='max'):
+        self.n = n
+        self.is_max = mode == 'max'
+        self.queue = deque()
+        self.i = -1
+
+    def update(self, val):
+        self.i += 1
+        q = self.queue
+        if val == val:
+            if self.is_max:
+                while q and q[-1][1] <= val:
+                    q.pop()
+            else:
+                while q and q[-1][1] >= val:
+                    q.pop()
+            q.append((self.i, val))
+        while q and q[0][0] <= self.i - self.n:
+            q.popleft()
+        return self.value
+
+    @property
+    def value(self):
+        return self.queue[0][1] if self.queue else NAN
+
+
+class StreamingIndicators:
+    """
+    موتور اندیکاتور حالت‌دار برای حالت زنده: MA_fast، MA_slow، ATR و سطوح حمایت/مقاومت
+    با هر کندل جدید به‌روز می‌شوند و نتایج با توابع analysis/indicators.py یکسان است.
+    """
+
+    def __init__(self, fast=MA_FAST, slow=MA_SLOW, atr_period=ATR_PERIOD, lookback=DEFAULT_LOOKBACK):
+        self.params = {'fast': fast, 'slow': slow, 'atr_period': atr_period, 'lookback': lookback}
+        self.ma_fast = RollingMean(fast)
+        self.ma_slow = RollingMean(slow)
+        self.atr = RollingMean(atr_period)
+        self.recent_high = RollingExtreme(lookback, 'max')
+        self.recent_low = RollingExtreme(lookback, 'min')
+        self.prev_close = NAN
+        self.count = 0
+        self.last = {}
+
+    @classmethod
+    def from_frame(cls, df, **params):
+        """ساخت موتور و مقداردهی اولیه از یک DataFrame موجود"""
+        return cls(**params).seed(df)
+
+    def seed(self, df):
+        for high, low, close in zip(df['High'].to_numpy(float).tolist(),
+                                    df['Low'].to_numpy(float).tolist(),
+                                    df['Close'].to_numpy(float).tolist()):
+            self.update(high, low, close)
+        return self
+
+    def update(self, high, low, close):
+        """افزودن یک کندل بسته‌شده و برگرداندن مقادیر جدید اندیکاتورها"""
+        ranges = [high - low]
+        if self.prev_close == self.prev_close:
+            ranges += [abs(high - self.prev_close), abs(low - self.prev_close)]
+        ranges = [r for r in ranges if r == r]
+        tr = max(ranges) if ranges else NAN
+        self.prev_close = close
+        self.count += 1
+
+        self.recent_high.update(high)
+        self.recent_low.update(low)
+        self.last = {
+            'Close': close,
+            'MA_fast': self.ma_fast.update(close),
+            'MA_slow': self.ma_slow.update(close),
+            'ATR': self.atr.update(tr),
+        }
+        return self.last
+
+    def levels(self) -> dict:
+        """همان خروجی support_resistance_levels برای lookback کندل اخیر"""
+        recent_high = float(self.recent_high.value)
+        recent_low = float(self.recent_low.value)
+        rng = recent_high - recent_low
+        return {
+            'recent_high': recent_high,
+            'recent_low': recent_low,
+            'resistance_2': recent_high + 0.5*rng,
+            'support_2': recent_low - 0.5*rng
+        }
+
+    def copy(self):
+        """کپی مستقل؛ برای اعمال کندل نیمه‌کاره بدون خراب کردن حالت کندل‌های بسته‌شده"""
+        return copy.deepcopy(self)
@@ -0,0 +1,159 @@
+# analysis/swings.py
+import copy
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+NAN = float('nan')
+
+
+def _window_extreme(x, order, how, side):
+    """بیشینه/کمینه‌ی order مقدار قبل (side='left') یا بعد (side='right') از هر اندیس؛ O(n)"""
+    if order == 1:
+        # همسایه‌ی مجاور؛ بدون rolling
+        if side == 'left':
+            return np.concatenate([[np.nan], x[:-1]])
+        return np.concatenate([x[1:], [np.nan]])
+    s = pd.Series(x if side == 'left' else x[::-1])
+    rolled = getattr(s.rolling(order, min_periods=order), how)().shift(1).to_numpy()
+    return rolled if side == 'left' else rolled[::-1]
+
+
+def find_swings(high, low, order=1, min_prominence=0.0, atr=None, atr_mult=0.0):
+    """
+    قله/دره‌های fractal مرتبه‌ی order: High[i] اکیداً بزرگ‌تر از order کندل دو طرف
+    (و Low[i] اکیداً کوچک‌تر). برای order=1 همان مقایسه با همسایه‌ها در market_structure است.
+    برجستگی (prominence) در همان پنجره سنجیده می‌شود و باید دست‌کم
+    max(min_prominence, atr_mult * ATR) باشد.
+    خروجی: (peaks, valleys) به صورت آرایه‌ی bool
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    left_max = _window_extreme(high, order, 'max', 'left')
+    right_max = _window_extreme(high, order, 'max', 'right')
+    left_min = _window_extreme(low, order, 'min', 'left')
+    right_min = _window_extreme(low, order, 'min', 'right')
+    peaks = (high > left_max) & (high > right_max)
+    valleys = (low < left_min) & (low < right_min)
+
+    threshold = np.full(len(high), float(min_prominence))
+    if atr is not None and atr_mult:
+        threshold = np.fmax(threshold, atr_mult * np.asarray(atr, dtype=float))
+    if threshold.any():
+        peak_base = np.fmax(_window_extreme(high, order, 'min', 'left'), _window_extreme(high, order, 'min', 'right'))
+        valley_base = np.fmin(_window_extreme(low, order, 'max', 'left'), _window_extreme(low, order, 'max', 'right'))
+        peaks &= high - peak_base >= threshold
+        valleys &= valley_base - low >= threshold
+    return peaks, valleys
+
+
+def _confirmed(values, positions, order, n):
+    """مقدار آخرین و ماقبل آخرین pivot که تا هر کندل تأیید شده (order کندل بعد از pivot)"""
+    last = np.full(n, np.nan)
+    prev = np.full(n, np.nan)
+    vals = values[positions]
+    at = positions + order
+    last[at] = vals
+    prev[at] = np.concatenate([[np.nan], vals])[:-1]
+    valid = np.zeros(n, dtype=bool)
+    valid[at] = True
+    idx = np.maximum.accumulate(np.where(valid, np.arange(n), 0))
+    seen = np.logical_or.accumulate(valid)
+    return np.where(seen, last[idx], np.nan), np.where(seen, prev[idx], np.nan)
+
+
+def swing_series(df, order=1, min_prominence=0.0, atr_mult=0.0, atr_col='ATR'):
+    """
+    سری کامل pivot ها و ساختار بازار در هر کندل (برای بک‌تست).
+    higher_highs/higher_lows در کندل t فقط از pivot های تأییدشده تا t استفاده می‌کنند.
+    """
+    high = df['High'].to_numpy(float)
+    low = df['Low'].to_numpy(float)
+    atr = df[atr_col].to_numpy(float) if atr_mult and atr_col in df else None
+    peaks, valleys = find_swings(high, low, order, min_prominence, atr, atr_mult)
+    n = len(df)
+    last_high, prev_high = _confirmed(high, np.flatnonzero(peaks), order, n)
+    last_low, prev_low = _confirmed(low, np.flatnonzero(valleys), order, n)
+
+    out = pd.DataFrame({
+        'swing_high': np.where(peaks, high, np.nan),
+        'swing_low': np.where(valleys, low, np.nan),
+        'last_high': last_high,
+        'prev_high': prev_high,
+        'last_low': last_low,
+        'prev_low': prev_low,
+    }, index=df.index)
+    out['higher_highs'] = pd.array(last_high > prev_high, dtype='boolean')
+    out.loc[np.isnan(prev_high), 'higher_highs'] = pd.NA
+    out['higher_lows'] = pd.array(last_low > prev_low, dtype='boolean')
+    out.loc[np.isnan(prev_low), 'higher_lows'] = pd.NA
+    return out
+
+
+def structure_from_pivots(peak_vals, valley_vals) -> dict:
+    """higher_highs/higher_lows از دو pivot آخر (None اگر کمتر از دو pivot باشد)"""
+    return {
+        'higher_highs': bool(peak_vals[-1] > peak_vals[-2]) if len(peak_vals) > 1 else None,
+        'higher_lows': bool(valley_vals[-1] > valley_vals[-2]) if len(valley_vals) > 1 else None
+    }
+
+
+class SwingDetector:
+    """
+    نسخه‌ی افزایشی find_swings: با هر کندل جدید فقط کندل وسط پنجره‌ی 2*order+1 بررسی می‌شود
+    و لازم نیست کل تاریخچه دوباره اسکن شود. خروجی با find_swings یکسان است.
+    """
+
+    def __init__(self, order=1, min_prominence=0.0, atr_mult=0.0, keep=1000):
+        self.order = order
+        self.min_prominence = min_prominence
+        self.atr_mult = atr_mult
+        self.bars = deque(maxlen=2*order + 1)
+        self.count = 0
+        self.peaks = deque(maxlen=keep)      # (index, value)
+        self.valleys = deque(maxlen=keep)
+
+    @classmethod
+    def from_frame(cls, df, atr_col='ATR', **params):
+        det = cls(**params)
+        atr = df[atr_col].to_numpy(float).tolist() if atr_col in df else [NAN] * len(df)
+        for high, low, a in zip(df['High'].to_numpy(float).tolist(), df['Low'].to_numpy(float).tolist(), atr):
+            det.update(high, low, a)
+        return det
+
+    def update(self, high, low, atr=NAN):
+        """افزودن یک کندل؛ خروجی pivot هایی که با این کندل تأیید شدند"""
+        self.bars.append((high, low, atr))
+        self.count += 1
+        if len(self.bars) < self.bars.maxlen:
+            return []
+        k = self.order
+        i = self.count - 1 - k
+        h, l, a = self.bars[k]
+        highs = [b[0] for b in self.bars]
+        lows = [b[1] for b in self.bars]
+        left_h, right_h = highs[:k], highs[k + 1:]
+        left_l, right_l = lows[:k], lows[k + 1:]
+
+        threshold = self.min_prominence
+        if self.atr_mult and a == a:
+            threshold = max(threshold, self.atr_mult * a)
+
+        found = []
+        if all(x == x for x in highs) and h > max(left_h) and h > max(right_h):
+            if not threshold or h - max(min(left_h), min(right_h)) >= threshold:
+                self.peaks.append((i, h))
+                found.append(('high', i, h))
+        if all(x == x for x in lows) and l < min(left_l) and l < min(right_l):
+            if not threshold or min(max(left_l), max(right_l)) - l >= threshold:
+                self.valleys.append((i, l))
+                found.append(('low', i, l))
+        return found
+
+    def structure(self) -> dict:
+        return structure_from_pivots([v for _, v in self.peaks], [v for _, v in self.valleys])
+
+    def copy(self):
+        """کپی مستقل؛ برای اعمال کندل نیمه‌کاره بدون تغییر pivot های تأییدشده"""
+        return copy.deepcopy(self)
@@ -3,13 +3,45 @@ import matplotlib.pyplot as plt
 from matplotlib.dates import DateFormatter
 
 from config import *
-from analysis.data_fetcher import fetch_data
-from analysis.indicators import atr, moving_averages, support_resistance_levels, market_structure
-from analysis.scenarios import generate_scenarios
+from analysis.pipeline import LayeredAnalysis
+from analysis.downsample import CHART_POINTS, downsample_frame
+from analysis.live import LivePoller, SimulatedSource
+from analysis.alerts import AlertEngine, MemorySink, LogSink, FileSink, WebhookSink, rules_from_scenarios, format_event
+from analysis.mtf import confluence_table
+from analysis.correlation import CorrelationTracker, fetch_closes, rolling_pairs, pair_frame
+from analysis import profiling
 
 st.set_page_config(page_title="PriceScope — Gold Dashboard", layout="wide")
 st.title("PriceScope — Market Scenarios Dashboard")
 
+@st.cache_resource
+def get_analysis():
+    # یک نمونه‌ی مشترک بین همه‌ی session ها و rerun ها
+    return LayeredAnalysis()
+
+@st.cache_data(ttl=BAR_REFRESH_SECONDS)
+def get_closes(symbols, period):
+    # Close روزانه‌ی واچ‌لیست با یک fetch هم‌زمان
+    return fetch_closes(list(symbols), period, "1d")
+
+@st.cache_resource
+def get_poller(simulated=False):
+    # یک حلقه‌ی پرسیدن مشترک؛ session هایی که یک نماد را می‌بینند یک فید را می‌خوانند
+    if simulated:
+        source = SimulatedSource()
+        return LivePoller(source=source, history=source.history, quote_source=lambda codes: {})
+    return LivePoller()
+
+@st.cache_resource
+def get_alerts():
+    # یک موتور هشدار مشترک؛ آخرین رویدادها در MemorySink برای نمایش نگه داشته می‌شوند
+    sinks = [MemorySink(ALERT_HISTORY), LogSink()]
+    if ALERT_FILE:
+        sinks.append(FileSink(ALERT_FILE))
+    if ALERT_WEBHOOK_URL:
+        sinks.append(WebhookSink(ALERT_WEBHOOK_URL))
+    return AlertEngine(sinks)
+
 # --- Sidebar ---
 with st.sidebar:
     st.header("Inputs")
@@ -17,16 +49,85 @@ with st.sidebar:
     period = st.selectbox("Period", ["1mo","3mo","6mo","1y","2y","5y"], index=2)
     interval = st.selectbox("Interval", ["1d","1h","4h","1wk"], index=0)
     lookback = st.number_input("Lookback days for levels", min_value=7, max_value=180, value=DEFAULT_LOOKBACK)
+    chart_points = st.number_input("Chart points", min_value=200, max_value=20000, value=CHART_POINTS, step=100)
+    interactive = st.checkbox("Interactive chart", value=False)
+    mtf = st.checkbox(f"Multi-timeframe ({', '.join(MTF_INTERVALS)})", value=False)
+    cross = st.checkbox("Cross-asset correlation", value=False)
+    montecarlo = st.checkbox("Hit probabilities (Monte Carlo)", value=False)
+    watchlist = st.text_input("Watchlist", ", ".join(CORR_WATCHLIST), disabled=not cross)
+    live = st.checkbox("Live mode", value=False)
+    simulated = st.checkbox("Simulated feed", value=False, disabled=not live)
+    profile = st.checkbox("Profiling", value=profiling.enabled())
+    auto_rerun = st.checkbox("Auto-rerun on input change", value=False)
     run_btn = st.button("Run Analysis")
 
-# --- Run Analysis ---
+# مشترک بین همه‌ی session ها (رکوردها در سطح پروسه نگه داشته می‌شوند)
+if profile and not profiling.enabled():
+    profiling.enable()
+elif not profile and profiling.enabled():
+    profiling.disable()
+
+# --- Live ---
+if live:
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def live_panel():
+        poller = get_poller(simulated)
+        view = poller.subscribe(symbol, interval, MA_FAST, MA_SLOW, ATR_PERIOD, int(lookback), period)
+        quotes = poller.subscribe_quotes(["price_dollar_rl", "geram18"])
+        seen_key = ('live_version', symbol, interval, simulated)
+        version, live_scen, changed = view.changes(st.session_state.get(seen_key, 0))
+        st.session_state[seen_key] = version
+        st.subheader("Live")
+        if live_scen is None:
+            st.info("در انتظار اولین کندل...")
+            return
+        st.caption(f"Bar {view.bar_time} — v{version}"
+                   + (f", changed: {', '.join(changed)}" if changed else ", no change"))
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Last Price", f"{live_scen['price']:.3f}")
+        c2.metric(f"MA{MA_FAST}", f"{live_scen['ma_fast']:.3f}")
+        c3.metric(f"MA{MA_SLOW}", f"{live_scen['ma_slow']:.3f}")
+        c4.metric(f"ATR({ATR_PERIOD})", f"{live_scen['atr']:.3f}")
+        st.write(f"Bullish: {live_scen['bullish']['thesis']}")
+        st.write(f"Bearish: {live_scen['bearish']['thesis']}")
+
+        # قانون‌ها فقط با تغییر سطوح/سناریوها بازسازی می‌شوند؛ قیمت هر بار به موتور داده می‌شود
+        alerts = get_alerts()
+        alert_key = f"{symbol} {interval}"
+        if alert_key not in alerts.books:
+            alerts.set_rules(alert_key, rules_from_scenarios(alert_key, live_scen), price=live_scen['price'])
+        elif {'levels', 'bullish', 'bearish'} & set(changed):
+            alerts.set_rules(alert_key, rules_from_scenarios(alert_key, live_scen))
+        bar_key = ('alert_bar', alert_key, simulated)
+        prev = st.session_state.get(bar_key)
+        if prev and prev[0] != view.bar_time:
+            alerts.on_close(alert_key, prev[1])     # کندل قبلی بسته شد
+        st.session_state[bar_key] = (view.bar_time, live_scen['price'])
+        alerts.on_price(alert_key, live_scen['price'])
+        events = [e for e in alerts.sinks[0].events if e['symbol'] == alert_key]
+        if events:
+            st.caption("Alerts")
+            for event in reversed(events[-5:]):
+                st.warning(format_event(event))
+        if quotes.quotes:
+            st.caption(" | ".join(f"{code}: {price:,}" for code, price in quotes.quotes.items() if price))
+
+    live_panel()
+
 if run_btn:
-    df = fetch_data(symbol, period, interval)
-    df = moving_averages(df, MA_FAST, MA_SLOW)
-    df['ATR'] = atr(df, ATR_PERIOD)
-    levels = support_resistance_levels(df, lookback)
-    struct = market_structure(df)
-    scenarios = generate_scenarios(df, levels, struct)
+    st.session_state['active'] = True
+elif not auto_rerun:
+    st.session_state['active'] = False
+
+# --- Run Analysis ---
+# فقط با کلیک Run؛ با Auto-rerun، بعد از اولین اجرا تغییر ورودی‌ها بدون کلیک دوباره (و از روی کش) محاسبه می‌شود
+if st.session_state.get('active'):
+    result = get_analysis().run(symbol, period, interval, int(lookback), MA_FAST, MA_SLOW, ATR_PERIOD, mtf=mtf,
+                                 montecarlo=montecarlo)
+    df, levels, scenarios = result['frame'], result['levels'], result['scenarios']
+    hits = result['hits']
+    st.caption("Cache — " + ", ".join(f"{name}: {'hit' if hit else 'miss'}" for name, hit in hits.items())
+               + f" ({result['seconds'] * 1000:.1f} ms)")
 
     # --- Metrics ---
     col1, col2, col3, col4 = st.columns(4)
@@ -46,6 +147,38 @@ if run_btn:
         "bearish_conditions": scenarios['bearish_conditions']
     })
 
+    # --- Multi-timeframe ---
+    if result['mtf'] is not None and 'error' in result['mtf']:
+        st.warning(f"Multi-timeframe unavailable: {result['mtf']['error']}")
+    elif result['mtf'] is not None:
+        conf = result['mtf']['confluence']
+        st.subheader("Multi-timeframe Confluence")
+        st.metric("Confluence", conf['label'], f"{conf['score']:+.2f}")
+        st.dataframe(confluence_table(result['mtf']))
+        for warning in scenarios.get('warnings', []):
+            st.warning(warning)
+
+    # --- Cross-asset ---
+    if cross:
+        symbols = tuple(dict.fromkeys(s.strip() for s in watchlist.split(',') if s.strip()))
+        closes, errors = get_closes(symbols, period)
+        st.subheader(f"Cross-asset ({CORR_WINDOW}-bar returns)")
+        if errors:
+            st.caption("Failed: " + ", ".join(errors))
+        if closes.shape[1] > 1:
+            tracker = CorrelationTracker(closes, CORR_WINDOW)
+            c1, c2 = st.columns(2)
+            c1.markdown("**Correlation**")
+            c1.dataframe(tracker.corr().round(2))
+            c2.markdown("**Relative strength (log return, row − column)**")
+            c2.dataframe(tracker.relative_strength().round(3))
+            st.markdown("**Beta (row on column)**")
+            st.dataframe(tracker.beta().round(2))
+            if "GC=F" in closes and "SI=F" in closes:
+                pairs = rolling_pairs(closes, CORR_WINDOW, pairs=[("GC=F", "SI=F")])
+                st.markdown("**Gold / Silver**")
+                st.line_chart(pair_frame(pairs, "GC=F", "SI=F")[['ratio']])
+
     # --- Scenarios ---
     st.subheader("Scenarios")
     st.markdown("**Bullish (صعودی)**")
@@ -60,21 +193,54 @@ if run_btn:
     st.write(f"Targets: {scenarios['bearish']['targets']}")
     st.write(f"Stop loss: {scenarios['bearish']['stop_loss']:.2f}")
 
+    # --- Monte Carlo ---
+    mc = result['montecarlo']
+    if mc is not None:
+        st.subheader(f"Hit probabilities ({mc['paths']:,} paths × {mc['steps']} bars, {mc['method']})")
+        rows = []
+        for side in ('bullish', 'bearish'):
+            for k, target in enumerate(mc[side]['targets'], 1):
+                rows.append({'scenario': side, 'level': f"target_{k}", 'price': target['level'],
+                             'probability': target['prob'], 'expected bars': target['expected_bars']})
+            stop = mc[side]['stop_loss']
+            rows.append({'scenario': side, 'level': "stop_loss", 'price': stop['level'],
+                         'probability': stop['prob'], 'expected bars': stop['expected_bars']})
+        st.dataframe(rows, hide_index=True)
+        st.caption("target: لمس قبل از حد ضرر — stop_loss: لمس قبل از اولین هدف")
+
     # --- Chart ---
     st.subheader("Price Chart")
-    fig, ax = plt.subplots(figsize=(10, 4))
-    ax.plot(df.index, df['Close'], label='Close')
-    ax.plot(df.index, df['MA_fast'], label=f"MA{MA_FAST}")
-    ax.plot(df.index, df['MA_slow'], label=f"MA{MA_SLOW}")
-    ax.axhline(levels['recent_high'], linestyle='--', label='Recent High')
-    ax.axhline(levels['recent_low'], linestyle='--', label='Recent Low')
-    ax.axhline(levels['resistance_2'], linestyle=':', label='Resistance2')
-    ax.axhline(levels['support_2'], linestyle=':', label='Support2')
-    ax.set_title(f"{symbol} — Close + MAs")
-    ax.legend()
-    ax.xaxis.set_major_formatter(DateFormatter("%Y-%m-%d"))
-    fig.autofmt_xdate()
-    st.pyplot(fig)
+    # فقط نقاط لازم برای نمایش رسم می‌شوند (LTTB روی Close؛ MA ها با همان ردیف‌ها)
+    plot_df = downsample_frame(df[['Close', 'MA_fast', 'MA_slow']], int(chart_points))
+    if len(plot_df) < len(df):
+        st.caption(f"{len(plot_df):,} of {len(df):,} bars shown (LTTB)")
+    with profiling.span('render.chart', rows=len(plot_df)):
+        if interactive:
+            chart_df = plot_df.rename(columns={'MA_fast': f"MA{MA_FAST}", 'MA_slow': f"MA{MA_SLOW}"})
+            for name in ('recent_high', 'recent_low', 'resistance_2', 'support_2'):
+                chart_df[name] = levels[name]
+            st.line_chart(chart_df)
+        else:
+            fig, ax = plt.subplots(figsize=(10, 4))
+            ax.plot(plot_df.index, plot_df['Close'], label='Close')
+            ax.plot(plot_df.index, plot_df['MA_fast'], label=f"MA{MA_FAST}")
+            ax.plot(plot_df.index, plot_df['MA_slow'], label=f"MA{MA_SLOW}")
+            ax.axhline(levels['recent_high'], linestyle='--', label='Recent High')
+            ax.axhline(levels['recent_low'], linestyle='--', label='Recent Low')
+            ax.axhline(levels['resistance_2'], linestyle=':', label='Resistance2')
+            ax.axhline(levels['support_2'], linestyle=':', label='Support2')
+            ax.set_title(f"{symbol} — Close + MAs")
+            ax.legend()
+            ax.xaxis.set_major_formatter(DateFormatter("%Y-%m-%d"))
+            fig.autofmt_xdate()
+            st.pyplot(fig)
+
+    # --- Profiling ---
+    if profiling.enabled():
+        with st.expander("Profiling (p50/p95 per stage)"):
+            st.dataframe(profiling.summary(), hide_index=True)
+            if st.button("Reset profiling"):
+                profiling.reset()
 
 else:
     st.info("برای شروع آنالیز، پارامترها را در سایدبار تنظیم کرده و روی 'Run Analysis' کلیک کنید.")
@@ -5,7 +5,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from datetime import datetime
 from matplotlib.dates import DateFormatter
-from utils import get_usd_price, get_gold_18_price, calculate_gold18_bubble
+from utils import USD, GOLD_18, get_prices, calculate_gold18_bubble
+from analysis import graph
 
 # Terminal ===> streamlit run app.py
 
@@ -37,49 +38,6 @@ def clean_columns(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = cols
     return df
 
-def atr(df: pd.DataFrame, n:int=14) -> pd.Series:
-    high_low = df['High'] - df['Low']
-    high_close = (df['High'] - df['Close'].shift()).abs()
-    low_close = (df['Low'] - df['Close'].shift()).abs()
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    return tr.rolling(n, min_periods=1).mean()
-
-def support_resistance_levels(df: pd.DataFrame, lookback:int=30) -> dict:
-    last = df.tail(lookback)
-    recent_high = float(last['High'].max())
-    recent_low = float(last['Low'].min())
-    rng = recent_high - recent_low
-    resistance_2 = recent_high + 0.5 * rng
-    support_2 = recent_low - 0.5 * rng
-    return {
-        'recent_high': recent_high,
-        'recent_low': recent_low,
-        'resistance_2': float(resistance_2),
-        'support_2': float(support_2)
-    }
-
-def market_structure(df: pd.DataFrame) -> dict:
-    # تشخیص قله/کف ساده با مقایسه با همسایه‌ها (1-step local)
-    peaks_mask = (df['High'] > df['High'].shift(1)) & (df['High'] > df['High'].shift(-1))
-    valleys_mask = (df['Low'] < df['Low'].shift(1)) & (df['Low'] < df['Low'].shift(-1))
-    peak_vals = df['High'][peaks_mask]
-    valley_vals = df['Low'][valleys_mask]
-
-    last_peak = float(peak_vals.iloc[-1]) if len(peak_vals) > 0 else np.nan
-    prev_peak = float(peak_vals.iloc[-2]) if len(peak_vals) > 1 else np.nan
-    last_valley = float(valley_vals.iloc[-1]) if len(valley_vals) > 0 else np.nan
-    prev_valley = float(valley_vals.iloc[-2]) if len(valley_vals) > 1 else np.nan
-
-    structure = {
-        'higher_highs': None,
-        'higher_lows': None
-    }
-    if not np.isnan(last_peak) and not np.isnan(prev_peak):
-        structure['higher_highs'] = last_peak > prev_peak
-    if not np.isnan(last_valley) and not np.isnan(prev_valley):
-        structure['higher_lows'] = last_valley > prev_valley
-    return structure
-
 def to_py(v):
     """تبدیل مقادیر numpy به نوع‌های پایتونی برای نمایش"""
     if isinstance(v, np.generic):
@@ -98,13 +56,15 @@ def analyze_symbol(symbol: str, period: str, interval: str, lookback:int):
     df = clean_columns(df)
     df.dropna(inplace=True)
 
-    # محاسبات
-    df['MA_fast'] = df['Close'].rolling(MA_FAST, min_periods=1).mean()
-    df['MA_slow'] = df['Close'].rolling(MA_SLOW, min_periods=1).mean()
-    df['ATR'] = atr(df, ATR_PERIOD)
+    # محاسبات (analysis/graph.py)
+    out = graph.evaluate(df, ['MA_fast', 'MA_slow', 'ATR', 'levels', 'market_structure'],
+                         {'fast': MA_FAST, 'slow': MA_SLOW, 'atr_period': ATR_PERIOD, 'lookback': lookback})
+    df['MA_fast'] = out['MA_fast']
+    df['MA_slow'] = out['MA_slow']
+    df['ATR'] = out['ATR']
 
-    levels = support_resistance_levels(df, lookback)
-    struct = market_structure(df)
+    levels = dict(out['levels'])
+    struct = dict(out['market_structure'])
 
     last = df.iloc[-1]
     price = float(last['Close'])
@@ -243,8 +203,9 @@ if run_btn:
         st.pyplot(fig)
 
                 # ===== قیمت‌های بازار ایران =====
-        usd_price = get_usd_price()               # تومان
-        gold18_market = get_gold_18_price()       # تومان
+        prices = get_prices([USD, GOLD_18])      # هم‌زمان و از کش
+        usd_price = prices[USD]                   # تومان
+        gold18_market = prices[GOLD_18]           # تومان
         ounce_price = scenarios['price']          # قیمت جهانی اونس از yfinance
 
         bubble_data = calculate_gold18_bubble(
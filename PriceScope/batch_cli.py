@@ -0,0 +1,170 @@
+# batch_cli.py
+# اجرای بدون رابط کاربری زنجیره‌ی تحلیل برای یک واچ‌لیست؛ خروجی NDJSON و Parquet
+#   python batch_cli.py watchlist.txt --out scenarios.ndjson --parquet scenarios.parquet
+# واچ‌لیست: هر خط یک نماد (یا چند نماد با کاما)؛ خطوط خالی و # نادیده گرفته می‌شوند.
+# streamlit / matplotlib / scipy در این مسیر import نمی‌شوند.
+import time
+
+_T0 = time.perf_counter()
+
+import argparse
+import json
+import sys
+
+from config import DEFAULT_PERIOD, DEFAULT_INTERVAL, DEFAULT_LOOKBACK, MA_FAST, MA_SLOW, ATR_PERIOD
+from analysis import profiling
+from analysis.pipeline import iter_analyze_timed
+
+STAGES = ('fetch', 'indicators', 'levels', 'structure', 'scenarios', 'write')
+PARQUET_BATCH = 64   # ردیف در هر row group
+
+
+def read_watchlist(path):
+    f = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    with f:
+        symbols = []
+        for line in f:
+            line = line.split('#', 1)[0]
+            symbols += [s.strip() for s in line.split(',') if s.strip()]
+    return list(dict.fromkeys(symbols))
+
+
+# ستون‌های فایل ستونی و نوع آن‌ها (ثابت، تا نمادهای ناموفق schema را عوض نکنند)
+COLUMNS = (
+    [('symbol', 'string'), ('period', 'string'), ('interval', 'string'), ('lookback', 'int64'),
+     ('fast', 'int64'), ('slow', 'int64'), ('atr_period', 'int64'), ('error', 'string')]
+    + [(k, 'float64') for k in ('price', 'ma_fast', 'ma_slow', 'atr',
+                                'recent_high', 'recent_low', 'resistance_2', 'support_2')]
+    + [(k, 'bool') for k in ('higher_highs', 'higher_lows',
+                             'price_above_slow_ma', 'ma_fast_above_slow', 'near_support', 'breakout_above_recent_high',
+                             'price_below_slow_ma', 'ma_fast_below_slow', 'near_resistance',
+                             'breakdown_below_recent_low')]
+    + [(f'{side}_{k}', t) for side in ('bullish', 'bearish')
+       for k, t in (('thesis', 'string'), ('entry_if', 'string'), ('target_1', 'float64'),
+                    ('target_2', 'float64'), ('stop_loss', 'float64'))]
+    + [(f'{stage}_seconds', 'float64') for stage in STAGES[:-1]]
+)
+
+
+def flat_row(symbol, scenarios, timings, params):
+    """یک ردیف تخت از خروجی generate_scenarios برای فایل ستونی"""
+    row = dict.fromkeys(name for name, _ in COLUMNS)
+    row.update(symbol=symbol, error=scenarios.get('error'), **params)
+    if row['error'] is None:
+        row.update({k: scenarios[k] for k in ('price', 'ma_fast', 'ma_slow', 'atr')})
+        row.update(scenarios['levels'])
+        row.update(scenarios['market_structure'])
+        row.update(scenarios['bullish_conditions'])
+        row.update(scenarios['bearish_conditions'])
+        for side in ('bullish', 'bearish'):
+            s = scenarios[side]
+            row[f'{side}_thesis'] = s['thesis']
+            row[f'{side}_entry_if'] = s['entry_if']
+            row[f'{side}_target_1'], row[f'{side}_target_2'] = s['targets']
+            row[f'{side}_stop_loss'] = s['stop_loss']
+    for stage in STAGES[:-1]:
+        row[f'{stage}_seconds'] = timings.get(stage)
+    return row
+
+
+class ParquetSink:
+    """نوشتن تدریجی با pyarrow.parquet.ParquetWriter؛ هر PARQUET_BATCH ردیف یک row group"""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.schema = pa.schema([(name, pa.type_for_alias(t)) for name, t in COLUMNS])
+        self.table = pa.Table.from_pylist
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= PARQUET_BATCH:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.writer.write_table(self.table(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="PriceScope batch scenarios")
+    p.add_argument('watchlist', help="فایل واچ‌لیست ('-' برای stdin)")
+    p.add_argument('--out', default='-', help="فایل NDJSON ('-' برای stdout)")
+    p.add_argument('--parquet', help="فایل Parquet (نیازمند pyarrow)")
+    p.add_argument('--period', default=DEFAULT_PERIOD)
+    p.add_argument('--interval', default=DEFAULT_INTERVAL)
+    p.add_argument('--lookback', type=int, default=DEFAULT_LOOKBACK)
+    p.add_argument('--fast', type=int, default=MA_FAST)
+    p.add_argument('--slow', type=int, default=MA_SLOW)
+    p.add_argument('--atr', type=int, default=ATR_PERIOD)
+    p.add_argument('--processes', type=int, default=None, help="0 یعنی محاسبات در همین پروسه")
+    p.add_argument('--fetch-workers', type=int, default=8)
+    p.add_argument('--quiet', action='store_true', help="بدون گزارش زمان‌ها در stderr")
+    p.add_argument('--profile', metavar='FILE', help="ثبت span های analysis/profiling.py و ذخیره‌ی JSON (فقط با --processes 0 کامل است)")
+    return p.parse_args(argv)
+
+
+def main(argv=None, source=None):
+    args = parse_args(argv)
+    import_seconds = time.perf_counter() - _T0
+    if args.profile:
+        profiling.enable()
+    symbols = read_watchlist(args.watchlist)
+    params = {'period': args.period, 'interval': args.interval, 'lookback': args.lookback,
+              'fast': args.fast, 'slow': args.slow, 'atr_period': args.atr}
+
+    out = sys.stdout if args.out == '-' else open(args.out, 'w', encoding='utf-8')
+    parquet = ParquetSink(args.parquet) if args.parquet else None
+    kwargs = {'source': source} if source is not None else {}
+    totals = dict.fromkeys(STAGES, 0.0)
+    ok = failed = 0
+    t0 = time.perf_counter()
+    try:
+        for symbol, scenarios, timings in iter_analyze_timed(
+                symbols, args.period, args.interval, args.lookback, args.fast, args.slow, args.atr,
+                fetch_workers=args.fetch_workers, processes=args.processes, **kwargs):
+            tw = time.perf_counter()
+            record = {'symbol': symbol, 'params': params}
+            if 'error' in scenarios:
+                record['error'] = scenarios['error']
+                failed += 1
+            else:
+                record['scenarios'] = scenarios
+                ok += 1
+            record['timings'] = {k: round(v, 6) for k, v in timings.items() if v is not None}
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+            if parquet is not None:
+                parquet.write(flat_row(symbol, scenarios, timings, params))
+            timings = {**timings, 'write': time.perf_counter() - tw}
+            for stage in STAGES:
+                totals[stage] += timings.get(stage) or 0.0
+            if not args.quiet:
+                print(f"{symbol:<12} {'error' if 'error' in scenarios else 'ok':<6}"
+                      + " ".join(f"{k}={v * 1000:.1f}ms" for k, v in timings.items() if v is not None),
+                      file=sys.stderr)
+    finally:
+        if parquet is not None:
+            parquet.close()
+        if out is not sys.stdout:
+            out.close()
+
+    if not args.quiet:
+        wall = time.perf_counter() - t0
+        print(f"{ok} ok, {failed} failed, {len(symbols)} symbols — startup {import_seconds * 1000:.0f}ms, "
+              f"wall {wall:.2f}s", file=sys.stderr)
+        print("stage totals: " + ", ".join(f"{k} {v * 1000:.1f}ms" for k, v in totals.items()), file=sys.stderr)
+    if args.profile:
+        profiling.dump(args.profile)
+    return 0 if ok or not symbols else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+# benchmarks/bench_bars.py
+# مقایسه‌ی حافظه و زمان زنجیره‌ی تحلیل روی DataFrame و BarSeries
+# اجرا از پوشه‌ی PriceScope:  python -m benchmarks.bench_bars [n_bars]
+#
+# نمونه‌ی اجرا (1,000,000 کندل، numpy 2.4 / pandas 3.0، یک هسته):
+#   container                      memory (MB)    chain (ms)
+#   DataFrame (pandas)                    53.4         360.1
+#   BarSeries float64                     45.8          88.8
+#   BarSeries float32                     26.7         127.8
+#   BarSeries float32 memmap               0.0         115.6
+# حافظه‌ی DataFrame بدون ستون‌های MA/ATR است که زنجیره به آن اضافه می‌کند.
+# float32 حافظه را نصف می‌کند ولی محاسبات در float64 انجام و دوباره تبدیل می‌شوند.
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from analysis.bars import BarSeries
+from analysis.indicators import atr, moving_averages, support_resistance_levels, market_structure
+from analysis.scenarios import generate_scenarios
+from benchmarks.synthetic import random_walk_ohlcv
+
+
+def run_chain(data):
+    data = moving_averages(data, 20, 50)
+    data['ATR'] = atr(data, 14)
+    levels = support_resistance_levels(data, 30)
+    struct = market_structure(data)
+    return generate_scenarios(data, levels, struct)
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = random_walk_ohlcv(n, seed=7)
+    df['Adj Close'] = df['Close']      # ستون‌هایی که yfinance برمی‌گرداند ولی استفاده نمی‌شوند
+
+    rows = []
+    rows.append(("DataFrame (pandas)", df.memory_usage(index=True, deep=True).sum(),
+                 best_of(lambda: run_chain(df.copy()))))
+    for dtype in (np.float64, np.float32):
+        bars = BarSeries.from_frame(df, dtype=dtype)
+        rows.append((f"BarSeries {np.dtype(dtype).name}", bars.nbytes,
+                     best_of(lambda: run_chain(BarSeries.from_frame(df, dtype=dtype)))))
+    with tempfile.TemporaryDirectory() as tmp:
+        BarSeries.from_frame(df, dtype=np.float32).save(tmp)
+        t0 = time.perf_counter()
+        BarSeries.load(tmp, mmap=True)
+        load_time = time.perf_counter() - t0
+        rows.append(("BarSeries float32 memmap", 0, best_of(lambda: run_chain(BarSeries.load(tmp, mmap=True)))))
+
+    print(f"{n:,} bars")
+    print(f"{'container':<28}{'memory (MB)':>14}{'chain (ms)':>14}")
+    for name, nbytes, seconds in rows:
+        print(f"{name:<28}{nbytes / 2**20:>14.1f}{seconds * 1000:>14.1f}")
+    print(f"memmap open: {load_time * 1000:.2f} ms (بدون خواندن داده؛ صفحه‌ها هنگام دسترسی بار می‌شوند)")
@@ -0,0 +1,66 @@
+# benchmarks/bench_chart.py
+# زمان رسم و حجم خروجی نمودار قیمت، با و بدون کاهش نقاط
+# اجرا از پوشه‌ی PriceScope:  python -m benchmarks.bench_chart [n_bars ...]
+#
+# نمونه‌ی اجرا (matplotlib 3.11 Agg، PNG با dpi=100، یک هسته):
+#   bars          mode        points   downsample (ms)   render (ms)   PNG (KB)   JSON (KB)
+#   10,000        full         10000               0.0         331.4       75.2       748.8
+#   10,000        lttb          2000              44.0         162.8       75.6       149.8
+#   10,000        minmax        2001               1.3         144.5       75.9       149.9
+#   100,000       full        100000               0.0        2873.5       58.8      7486.9
+#   100,000       lttb          2000              55.4         186.0       60.6       149.7
+#   100,000       minmax        2002               2.1         110.5       61.7       149.9
+#   1,000,000     full       1000000               0.0       33628.2       55.5     74870.2
+#   1,000,000     lttb          2000              90.7         168.6       64.1       149.8
+#   1,000,000     minmax        2002              13.5         144.5       63.7       149.9
+# حجم PNG تقریباً ثابت است (وابسته به ابعاد تصویر)؛ هزینه‌ی اصلی زمان رسم است.
+# JSON همان داده‌ای است که نمودار تعاملی به مرورگر می‌فرستد و با تعداد نقاط رشد می‌کند.
+import io
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from analysis.downsample import CHART_POINTS, lttb_indices, minmax_indices
+from analysis.indicators import moving_averages
+from benchmarks.synthetic import random_walk_ohlcv
+
+
+def render_png(df):
+    """همان نمودار app.py (بدون خطوط سطح) به PNG در حافظه"""
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.plot(df.index, df['Close'], label='Close')
+    ax.plot(df.index, df['MA_fast'], label='MA fast')
+    ax.plot(df.index, df['MA_slow'], label='MA slow')
+    ax.legend()
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=100)
+    plt.close(fig)
+    return buf.getbuffer().nbytes
+
+
+def measure(df, mode):
+    t0 = time.perf_counter()
+    if mode == 'lttb':
+        df = df.iloc[lttb_indices(df['Close'].to_numpy(), CHART_POINTS)]
+    elif mode == 'minmax':
+        df = df.iloc[minmax_indices(df['Close'].to_numpy(), CHART_POINTS)]
+    t1 = time.perf_counter()
+    png = render_png(df)
+    t2 = time.perf_counter()
+    payload = len(df.to_json(orient='split', date_format='iso'))
+    return len(df), t1 - t0, t2 - t1, png, payload
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'bars':<14}{'mode':<10}{'points':>8}{'downsample (ms)':>18}{'render (ms)':>14}"
+          f"{'PNG (KB)':>11}{'JSON (KB)':>12}")
+    for n in sizes:
+        df = moving_averages(random_walk_ohlcv(n, seed=3), 20, 50)[['Close', 'MA_fast', 'MA_slow']]
+        for mode in ('full', 'lttb', 'minmax'):
+            points, ds, render, png, payload = measure(df, mode)
+            print(f"{n:<14,}{mode:<10}{points:>8}{ds * 1000:>18.1f}{render * 1000:>14.1f}"
+                  f"{png / 1024:>11.1f}{payload / 1024:>12.1f}")
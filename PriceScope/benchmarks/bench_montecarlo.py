@@ -0,0 +1,47 @@
+# benchmarks/bench_montecarlo.py
+# زمان analysis/montecarlo.hit_probabilities برای paths مسیر × steps گام روی سناریوهای یک سری مصنوعی،
+# و حالت بدترین (سطوح دور؛ هیچ مسیری زودتر از افق تمام نمی‌شود).
+# اجرا از پوشه‌ی PriceScope:  python -m benchmarks.bench_montecarlo [paths] [steps] [processes]
+#
+# نمونه‌ی اجرا (یک هسته، numpy 2.4):
+#   100,000 paths x 500 steps, processes=0
+#   scenario levels  bootstrap      138.8 ms
+#   scenario levels  atr             90.6 ms
+#   far levels       bootstrap      232.6 ms
+#   far levels       atr            190.4 ms
+# در حالت سطوح دور هیچ مسیری زود کنار نمی‌رود و هر ۵۰ میلیون گام ساخته می‌شوند؛ گام‌ها از جدول چندک‌ها با
+# ۱۶ بیت تصادفی خوانده می‌شوند (با standard_normal/integers و cumsum: 823 و 1093 ms).
+# process pool فقط روی چند هسته سود دارد (processes=2 روی یک هسته: 174 ms برای سطوح سناریو).
+import sys
+import time
+
+from analysis.montecarlo import hit_probabilities
+from analysis.pipeline import analyze_frame
+from benchmarks.synthetic import random_walk_ohlcv
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+if __name__ == "__main__":
+    paths = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    processes = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    df = random_walk_ohlcv(2000, seed=3)
+    scenarios = analyze_frame(df)
+    far = {**scenarios,
+           'bullish': {'targets': [3 * scenarios['price']] * 2, 'stop_loss': scenarios['price'] / 3},
+           'bearish': {'targets': [scenarios['price'] / 3] * 2, 'stop_loss': 3 * scenarios['price']}}
+
+    print(f"{paths:,} paths x {steps} steps, processes={processes}")
+    for label, scn in (("scenario levels", scenarios), ("far levels", far)):
+        for method in ("bootstrap", "atr"):
+            seconds = best_of(lambda: hit_probabilities(scn, df['Close'], paths=paths, steps=steps,
+                                                        method=method, processes=processes))
+            print(f"{label:<16} {method:<10} {seconds * 1000:9.1f} ms")
@@ -0,0 +1,169 @@
+# benchmarks/bench_scenarios.py
+# ساخت و سریال‌سازی n سناریو: مسیر قبلی (dict تو در تو از مقادیر numpy + to_py، سپس json.dumps یا
+# pyarrow.Table.from_pylist روی ردیف‌های batch_cli.flat_row) در برابر ScenarioResult و ScenarioBatch
+# (analysis/scenarios.py)، به همراه حافظه‌ی نگه‌داشته‌شده.
+# اجرا از پوشه‌ی PriceScope:  python -m benchmarks.bench_scenarios [n]
+#
+# نمونه‌ی اجرا (یک هسته، numpy 2.4، pyarrow 25):
+#   100,000 results
+#   -- build --
+#   dict + to_py (previous)                     4810.5 ms     48105 ns/result
+#   scenarios_from_values (to_dict)             2067.1 ms     20671 ns/result
+#   ScenarioResult.from_values                   203.5 ms      2035 ns/result
+#   ScenarioBatch.from_results                   148.1 ms      1481 ns/result
+#   ScenarioBatch.from_arrays + derived           40.6 ms       406 ns/result
+#   -- serialize --
+#   json.dumps(list of dicts) (previous)        3400.8 ms     34008 ns/result
+#   ScenarioBatch.to_json                       1221.0 ms     12210 ns/result
+#   ScenarioBatch.to_json(text=True)            1842.0 ms     18420 ns/result
+#   Table.from_pylist(flat_row) (previous)      1601.3 ms     16013 ns/result
+#   ScenarioBatch.to_arrow                         2.4 ms        24 ns/result
+#   ScenarioBatch.to_arrow(text=True)            313.8 ms      3138 ns/result
+#   -- retained memory --
+#   dict + to_py (previous)                      215.1 MB      2151 B/result
+#   ScenarioResult                                31.2 MB       312 B/result
+#   ScenarioBatch (+ derived)                     10.8 MB       108 B/result
+# زمان to_json عمدتاً repr اعداد float در json است؛ to_arrow ستون‌های float را بدون کپی برمی‌دارد.
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from analysis.scenarios import VALUES, ScenarioBatch, ScenarioResult, scenarios_from_values, to_py
+from batch_cli import COLUMNS, flat_row
+
+
+def legacy_scenarios(price, ma_fast, ma_slow, atr_val, levels, struct):
+    """پیاده‌سازی پیشین scenarios_from_values (dict + f-string + to_py) برای مقایسه"""
+    bullish_conditions = {
+        'price_above_slow_ma': price > ma_slow,
+        'ma_fast_above_slow': ma_fast > ma_slow,
+        'near_support': price <= levels['recent_low'] + 0.02 * (levels['recent_high'] - levels['recent_low']),
+        'breakout_above_recent_high': price > levels['recent_high']
+    }
+    bearish_conditions = {
+        'price_below_slow_ma': price < ma_slow,
+        'ma_fast_below_slow': ma_fast < ma_slow,
+        'near_resistance': price >= levels['recent_high'] - 0.02 * (levels['recent_high'] - levels['recent_low']),
+        'breakdown_below_recent_low': price < levels['recent_low']
+    }
+    if bullish_conditions['price_above_slow_ma'] and bullish_conditions['ma_fast_above_slow']:
+        bullish = {
+            'thesis': "روند صعودی ادامه‌دار (trend following).",
+            'entry_if': f"پولبک یا بازگشت نزدیک {levels['recent_low']:.2f} یا شکست بالای {levels['recent_high']:.2f}.",
+            'targets': [levels['recent_high'], levels['resistance_2']],
+            'stop_loss': float(max(levels['recent_low'] - 0.5 * atr_val, price - 2*atr_val))
+        }
+    else:
+        bullish = {
+            'thesis': "شرایط روند صعودی قوی نیست؛ ورود فقط پس از شکست و تثبیت مقاومت.",
+            'entry_if': f"شکست و تثبیت بالای {levels['recent_high']:.2f}",
+            'targets': [levels['recent_high'], levels['resistance_2']],
+            'stop_loss': float(levels['recent_low'] - 1.0*atr_val)
+        }
+    if bearish_conditions['price_below_slow_ma'] and bearish_conditions['ma_fast_below_slow']:
+        bearish = {
+            'thesis': "روند نزولی ادامه دارد.",
+            'entry_if': f"شکست حمایتی {levels['recent_low']:.2f}.",
+            'targets': [levels['recent_low'], levels['support_2']],
+            'stop_loss': float(min(levels['recent_high'] + 0.5*atr_val, price + 2*atr_val))
+        }
+    else:
+        bearish = {
+            'thesis': "شرایط نزولی قوی نیست؛ ورود شورت فقط پس از شکست حمایتی.",
+            'entry_if': f"شکست و تثبیت زیر {levels['recent_low']:.2f}",
+            'targets': [levels['recent_low'], levels['support_2']],
+            'stop_loss': float(levels['recent_high'] + 1.0*atr_val)
+        }
+    return to_py({
+        'price': price, 'ma_fast': ma_fast, 'ma_slow': ma_slow, 'atr': atr_val,
+        'levels': levels, 'market_structure': struct,
+        'bullish': bullish, 'bearish': bearish,
+        'bullish_conditions': bullish_conditions, 'bearish_conditions': bearish_conditions
+    })
+
+
+def make_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    cols = {
+        'price': 100 + rng.normal(0, 5, n),
+        'ma_fast': 100 + rng.normal(0, 5, n),
+        'ma_slow': 100 + rng.normal(0, 5, n),
+        'atr': rng.uniform(0.5, 3.0, n),
+        'recent_high': 100 + rng.uniform(0, 10, n),
+        'recent_low': 100 - rng.uniform(0, 10, n),
+    }
+    rng_ = cols['recent_high'] - cols['recent_low']
+    cols['resistance_2'] = cols['recent_high'] + 0.5*rng_
+    cols['support_2'] = cols['recent_low'] - 0.5*rng_
+    cols['higher_highs'] = rng.choice(np.array([None, True, False]), n)
+    cols['higher_lows'] = rng.choice(np.array([None, True, False]), n)
+    return cols
+
+
+def row_args(cols, i):
+    """ورودی‌های یک ردیف به شکلی که از ستون‌های NumPy/pandas می‌رسند (np.float64)"""
+    levels = {k: cols[k][i] for k in ('recent_high', 'recent_low', 'resistance_2', 'support_2')}
+    struct = {'higher_highs': cols['higher_highs'][i], 'higher_lows': cols['higher_lows'][i]}
+    return cols['price'][i], cols['ma_fast'][i], cols['ma_slow'][i], cols['atr'][i], levels, struct
+
+
+def with_derived(batch):
+    batch.derived()
+    return batch
+
+
+def timed(label, fn, n):
+    t0 = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - t0
+    print(f"{label:<40} {seconds * 1000:9.1f} ms  {seconds / n * 1e9:8.0f} ns/result")
+    return out
+
+
+def retained(fn):
+    """حافظه‌ی نگه‌داشته‌شده توسط خروجی fn (tracemalloc)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    out = fn()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return out, size
+
+
+if __name__ == "__main__":
+    import pyarrow as pa
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    cols = make_inputs(n)
+    args = [row_args(cols, i) for i in range(n)]
+    schema = pa.schema([(name, pa.type_for_alias(t)) for name, t in COLUMNS])
+    print(f"{n:,} results")
+
+    print("-- build --")
+    dicts = timed("dict + to_py (previous)", lambda: [legacy_scenarios(*a) for a in args], n)
+    timed("scenarios_from_values (to_dict)", lambda: [scenarios_from_values(*a) for a in args], n)
+    results = timed("ScenarioResult.from_values", lambda: [ScenarioResult.from_values(*a) for a in args], n)
+    timed("ScenarioBatch.from_results", lambda: ScenarioBatch.from_results(results), n)
+    batch = timed("ScenarioBatch.from_arrays + derived",
+                  lambda: with_derived(ScenarioBatch.from_arrays(*(cols[k] for k in VALUES))), n)
+
+    print("-- serialize --")
+    timed("json.dumps(list of dicts) (previous)", lambda: json.dumps(dicts, ensure_ascii=False), n)
+    timed("ScenarioBatch.to_json", batch.to_json, n)
+    timed("ScenarioBatch.to_json(text=True)", lambda: batch.to_json(text=True), n)
+    timed("Table.from_pylist(flat_row) (previous)",
+          lambda: pa.Table.from_pylist([flat_row('X', d, {}, {}) for d in dicts], schema=schema), n)
+    timed("ScenarioBatch.to_arrow", batch.to_arrow, n)
+    timed("ScenarioBatch.to_arrow(text=True)", lambda: batch.to_arrow(text=True), n)
+
+    print("-- retained memory --")
+    del dicts, results
+    for label, fn in (("dict + to_py (previous)", lambda: [legacy_scenarios(*a) for a in args]),
+                      ("ScenarioResult", lambda: [ScenarioResult.from_values(*a) for a in args]),
+                      ("ScenarioBatch (+ derived)", lambda: with_derived(ScenarioBatch.from_results(
+                          [ScenarioResult.from_values(*a) for a in args])))):
+        _, size = retained(fn)
+        print(f"{label:<40} {size / 1e6:9.1f} MB  {size / n:8.0f} B/result")
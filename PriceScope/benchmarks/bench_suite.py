@@ -0,0 +1,262 @@
+# benchmarks/bench_suite.py
+# بنچمارک تکرارپذیر اندیکاتورها و سناریوها روی داده‌ی مصنوعی (regime_ohlcv)؛ کاملاً آفلاین
+# اجرا از پوشه‌ی PriceScope:
+#   python -m benchmarks.bench_suite                          # 1k,100k,10M و ذخیره در benchmarks/results/<commit>.json
+#   python -m benchmarks.bench_suite --sizes 1k,100k --label dev --compare benchmarks/results/baseline.json
+# با --compare نسبت زمان هر مورد به اجرای قبلی چاپ می‌شود و اگر موردی بیش از --threshold کندتر شده باشد
+# خروجی برنامه 1 است.
+#
+# نمونه‌ی اجرا (10M کندل، numpy 2.4 / pandas 3.0، numba نصب، یک هسته؛ بهترین زمان هر فراخوانی، اوج حافظه با tracemalloc):
+#   case                       container      bars        time  Mbars/s   calls/s  peak MB
+#   atr                        frame      10000000    115.8 ms    86.36     8.636    152.6
+#   moving_averages            frame      10000000    249.6 ms    40.06     4.006    305.2
+#   add_indicators             frame      10000000    289.8 ms    34.51     3.451    534.1
+#   support_resistance_levels  frame      10000000    180.5 µs        -      5542      0.0
+#   market_structure.pivots    frame      10000000    274.0 ms    36.50      3.65    400.6
+#   market_structure.shift     frame      10000000    390.4 ms    25.62     2.562    104.9
+#   generate_scenarios         frame      10000000     43.7 µs        -  2.29e+04      0.0
+#   atr                        bars       10000000     97.9 ms   102.19     10.22    152.6
+#   moving_averages            bars       10000000    135.4 ms    73.86     7.386    152.6
+#   add_indicators             bars       10000000    205.9 ms    48.57     4.857    305.2
+#   support_resistance_levels  bars       10000000     11.8 µs        - 8.472e+04      0.0
+#   market_structure.pivots    bars       10000000    278.7 ms    35.88     3.588    400.6
+#   generate_scenarios         bars       10000000     11.1 µs        - 9.014e+04      0.0
+#   to_py                      -                 -     20.2 µs        - 4.946e+04      0.0
+# benchmarks/results/baseline.json اجرای 1k/100k/10M قبل از هسته‌ی یک‌گذره‌ی analysis/kernels.py است (برای --compare)؛
+# آنجا ATR روی DataFrame با concat سه ستون و max کندترین مرحله بود (2185 ms، حالا 116 ms).
+# اکنون کندترین مراحل ساختار بازار است (market_structure.shift فقط برای DataFrame است).
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+
+# هیچ مسیری در این بنچمارک نباید به شبکه برود؛ import yfinance با خطا متوقف می‌شود
+sys.modules['yfinance'] = None
+
+import numpy as np
+import pandas as pd
+
+from analysis import profiling
+from analysis.bars import BarSeries
+from analysis.indicators import atr, moving_averages, add_indicators, support_resistance_levels, market_structure
+from analysis.scenarios import generate_scenarios, to_py
+from benchmarks.synthetic import regime_ohlcv
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+SUFFIX = {'k': 10**3, 'm': 10**6}
+
+
+def shift_market_structure(df) -> dict:
+    """نسخه‌ی قدیمی app_bak.py: قله/کف با مقایسه‌ی shift شده با همسایه‌ها (فقط DataFrame)"""
+    peaks_mask = (df['High'] > df['High'].shift(1)) & (df['High'] > df['High'].shift(-1))
+    valleys_mask = (df['Low'] < df['Low'].shift(1)) & (df['Low'] < df['Low'].shift(-1))
+    peak_vals = df['High'][peaks_mask]
+    valley_vals = df['Low'][valleys_mask]
+
+    last_peak = float(peak_vals.iloc[-1]) if len(peak_vals) > 0 else np.nan
+    prev_peak = float(peak_vals.iloc[-2]) if len(peak_vals) > 1 else np.nan
+    last_valley = float(valley_vals.iloc[-1]) if len(valley_vals) > 0 else np.nan
+    prev_valley = float(valley_vals.iloc[-2]) if len(valley_vals) > 1 else np.nan
+
+    structure = {'higher_highs': None, 'higher_lows': None}
+    if not np.isnan(last_peak) and not np.isnan(prev_peak):
+        structure['higher_highs'] = last_peak > prev_peak
+    if not np.isnan(last_valley) and not np.isnan(prev_valley):
+        structure['higher_lows'] = last_valley > prev_valley
+    return structure
+
+
+def _numpy_values(v):
+    """همان ساختار با مقادیر numpy؛ ورودی واقعی to_py"""
+    if isinstance(v, dict):
+        return {k: _numpy_values(x) for k, x in v.items()}
+    if isinstance(v, list):
+        return [_numpy_values(x) for x in v]
+    if isinstance(v, bool):
+        return np.bool_(v)
+    if isinstance(v, float):
+        return np.float64(v)
+    return v
+
+
+def prepare(df, container):
+    data = df.copy() if container == 'frame' else BarSeries.from_frame(df)
+    data = moving_averages(data, 20, 50)
+    data['ATR'] = atr(data, 14)
+    return data
+
+
+def cases(data, container):
+    """(نام، تابع، آیا به تعداد کندل وابسته است)"""
+    levels = support_resistance_levels(data, 30)
+    struct = market_structure(data)
+    out = [
+        ('atr', lambda: atr(data, 14), True),
+        ('moving_averages', lambda: moving_averages(data, 20, 50), True),
+        ('add_indicators', lambda: add_indicators(data, 20, 50, 14), True),
+        ('support_resistance_levels', lambda: support_resistance_levels(data, 30), False),
+        ('market_structure.pivots', lambda: market_structure(data), True),
+    ]
+    if container == 'frame':
+        out.append(('market_structure.shift', lambda: shift_market_structure(data), True))
+    out.append(('generate_scenarios', lambda: generate_scenarios(data, levels, struct), False))
+    return out
+
+
+def measure(fn, repeat):
+    """(بهترین زمان هر فراخوانی، تعداد فراخوانی در هر تکرار)؛ تعداد با timeit.autorange تا حدود 0.2 ثانیه"""
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat, loops)) / loops, loops
+
+
+def peak_bytes(fn):
+    """اوج حافظه‌ی تخصیص‌یافته در یک فراخوانی (tracemalloc؛ جدا از زمان‌سنجی)"""
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def result_row(case, container, bars, fn, repeat, scales):
+    seconds, loops = measure(fn, repeat)
+    return {
+        'case': case, 'container': container, 'bars': bars,
+        'seconds': seconds, 'loops': loops,
+        'bars_per_sec': bars / seconds if scales else None,
+        'calls_per_sec': 1.0 / seconds,
+        'peak_mb': peak_bytes(fn) / 2**20,
+    }
+
+
+def run(sizes, containers, repeat=3, seed=0, only=None, echo=print):
+    rows = []
+    for n in sizes:
+        df = regime_ohlcv(n, seed=seed)
+        for container in containers:
+            data = prepare(df, container)
+            for case, fn, scales in cases(data, container):
+                if only and not any(case.startswith(o) for o in only):
+                    continue
+                rows.append(result_row(case, container, n, fn, repeat, scales))
+                echo(format_row(rows[-1]))
+            del data
+        del df
+    if not only or any('to_py'.startswith(o) for o in only):
+        scenarios = generate_scenarios(prepare(regime_ohlcv(1000, seed=seed), 'frame'), {
+            'recent_high': 1.0, 'recent_low': 0.0, 'resistance_2': 1.5, 'support_2': -0.5},
+            {'higher_highs': True, 'higher_lows': False})
+        raw = _numpy_values(scenarios)
+        rows.append(result_row('to_py', '-', None, lambda: to_py(raw), repeat, False))
+        echo(format_row(rows[-1]))
+    return rows
+
+
+def _duration(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:8.1f} ms"
+    return f"{seconds * 1e6:8.1f} µs"
+
+
+HEADER = f"{'case':<26} {'container':<9} {'bars':>9} {'time':>11} {'Mbars/s':>8} {'calls/s':>9} {'peak MB':>8}"
+
+
+def format_row(r):
+    rate = f"{r['bars_per_sec'] / 1e6:8.2f}" if r['bars_per_sec'] else f"{'-':>8}"
+    bars = r['bars'] if r['bars'] is not None else '-'
+    return (f"{r['case']:<26} {r['container']:<9} {bars:>9} {_duration(r['seconds'])} {rate} "
+            f"{r['calls_per_sec']:9.4g} {r['peak_mb']:8.1f}")
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=os.path.dirname(__file__), timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadata(label, sizes, seed, repeat):
+    return {
+        'label': label, 'commit': git_commit(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+        'machine': platform.machine(), 'cpus': os.cpu_count(),
+        'sizes': sizes, 'seed': seed, 'repeat': repeat,
+    }
+
+
+def compare(rows, previous, threshold=0.10, echo=print):
+    """نسبت زمان به اجرای قبلی برای موردهای مشترک؛ خروجی فهرست موردهای کندتر از 1+threshold"""
+    old = {(r['case'], r['container'], r['bars']): r for r in previous['results']}
+    echo(f"\ncompared with {previous['meta'].get('label')} ({previous['meta'].get('commit')}):")
+    echo(f"{'case':<26} {'container':<9} {'bars':>9} {'old':>11} {'new':>11} {'ratio':>7}")
+    slower = []
+    for r in rows:
+        key = (r['case'], r['container'], r['bars'])
+        if key not in old:
+            continue
+        ratio = r['seconds'] / old[key]['seconds']
+        flag = 'slower' if ratio > 1 + threshold else ('faster' if ratio < 1 - threshold else '')
+        if flag == 'slower':
+            slower.append(key)
+        bars = r['bars'] if r['bars'] is not None else '-'
+        echo(f"{r['case']:<26} {r['container']:<9} {bars:>9} {_duration(old[key]['seconds'])} "
+             f"{_duration(r['seconds'])} {ratio:7.2f} {flag}")
+    return slower
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    return int(float(text[:-1]) * SUFFIX[text[-1]]) if text[-1] in SUFFIX else int(text)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="PriceScope offline benchmark suite")
+    p.add_argument('--sizes', default='1k,100k,10M', help="تعداد کندل‌ها، مثل 1k,100k,10M")
+    p.add_argument('--containers', default='frame,bars', help="frame (DataFrame) و/یا bars (BarSeries)")
+    p.add_argument('--cases', help="فقط موردهایی که با این پیشوندها شروع می‌شوند (با کاما)")
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--label', help="نام فایل نتایج (پیش‌فرض commit جاری)")
+    p.add_argument('--out', default=RESULTS_DIR, help="پوشه‌ی نتایج؛ '-' یعنی ذخیره نشود")
+    p.add_argument('--compare', metavar='FILE', help="فایل نتایج اجرای قبلی")
+    p.add_argument('--threshold', type=float, default=0.10, help="کندی مجاز نسبت به اجرای قبلی")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    profiling.disable()
+    sizes = [parse_size(s) for s in args.sizes.split(',')]
+    containers = [c.strip() for c in args.containers.split(',')]
+    only = [c.strip() for c in args.cases.split(',')] if args.cases else None
+    label = args.label or git_commit() or time.strftime('%Y%m%d-%H%M%S')
+
+    print(HEADER)
+    rows = run(sizes, containers, args.repeat, args.seed, only)
+    data = {'meta': metadata(label, sizes, args.seed, args.repeat), 'results': rows}
+    if args.out != '-':
+        os.makedirs(args.out, exist_ok=True)
+        path = os.path.join(args.out, f"{label}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        print(f"\nsaved {path}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            slower = compare(rows, json.load(f), args.threshold)
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
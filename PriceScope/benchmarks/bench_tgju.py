@@ -0,0 +1,83 @@
+# benchmarks/bench_tgju.py
+# مقایسه‌ی روش قبلی (requests.get تازه + BeautifulSoup، یکی‌یکی) با utils.TGJUClient
+# روی سرور محلی benchmarks/tgju_stub.py با تأخیر شبکه‌ی ساختگی
+# اجرا از پوشه‌ی PriceScope:  python -m benchmarks.bench_tgju [delay_ms]
+#
+# نمونه‌ی اجرا (تأخیر 50ms برای هر پاسخ):
+#   page 238 KB — BeautifulSoup 257.54 ms, regex 1.116 ms
+#   legacy serial                 1550.3 ms
+#   client, cold cache              62.1 ms
+#   client, warm cache               0.0 ms
+#   legacy, page 503              1050.0 ms
+#   client, page 503               157.3 ms
+#   client, page stalls 2s         556.8 ms   (API بعد از hedge_after=0.5s جواب می‌دهد)
+import sys
+import time
+
+import requests
+from bs4 import BeautifulSoup
+
+from benchmarks.tgju_stub import PRICES, StubConfig, serve
+from utils import TGJUClient, _extract_price, headers
+
+CODES = list(PRICES)
+
+
+def legacy_quotes(base_url, api_url, codes):
+    """همان منطق قبلی utils.py: صفحه، و اگر نشد API، پشت سر هم"""
+    out = {}
+    for code in codes:
+        price = None
+        try:
+            r = requests.get(f"{base_url}/profile/{code}", headers=headers, timeout=8)
+            r.raise_for_status()
+            tag = BeautifulSoup(r.text, "html.parser").select_one("span.info__price")
+            price = int(float(tag.text.replace(",", "").strip())) if tag else None
+        except requests.RequestException:
+            pass
+        if not price:
+            try:
+                j = requests.get(f"{api_url}/v1/data/detail/{code}", timeout=8).json()
+                price = int(j["data"]["p"].replace(",", ""))
+            except requests.RequestException:
+                price = 0
+        out[code] = price
+    return out
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+if __name__ == "__main__":
+    delay = (float(sys.argv[1]) if len(sys.argv) > 1 else 50.0) / 1000
+    cfg = StubConfig(delay=delay, api_delay=delay)
+    server, url = serve(cfg=cfg)
+
+    page = requests.get(f"{url}/profile/geram18").text
+    t_soup, _ = timed(lambda: BeautifulSoup(page, "html.parser").select_one("span.info__price"), 20)
+    t_re, _ = timed(lambda: _extract_price(page), 20)
+    print(f"page {len(page) / 1024:.0f} KB — BeautifulSoup {t_soup * 1000:.2f} ms, regex {t_re * 1000:.3f} ms")
+
+    rows = []
+    rows.append(("legacy serial",) + timed(lambda: legacy_quotes(url, url, CODES)))
+    client = TGJUClient(url, url, ttl=None, hedge_after=0.5)
+    rows.append(("client, cold cache",) + timed(lambda: (client.cache.clear(), client.quotes(CODES))[1]))
+    rows.append(("client, warm cache",) + timed(lambda: client.quotes(CODES)))
+
+    cfg.broken = {"geram18"}
+    rows.append(("legacy, page 503",) + timed(lambda: legacy_quotes(url, url, CODES)))
+    rows.append(("client, page 503",) + timed(lambda: (client.cache.clear(), client.quotes(CODES))[1]))
+    cfg.broken, cfg.delay = set(), 2.0
+    rows.append(("client, page stalls 2s",) + timed(lambda: (client.cache.clear(), client.quotes(CODES))[1], 1))
+
+    print(f"{len(CODES)} codes, {delay * 1000:.0f} ms server delay")
+    for name, seconds, result in rows:
+        ok = all(result[c] == PRICES[c] for c in CODES)
+        print(f"{name:<26}{seconds * 1000:>10.1f} ms   {'ok' if ok else result}")
+    server.shutdown()
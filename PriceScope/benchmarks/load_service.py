@@ -0,0 +1,178 @@
+# benchmarks/load_service.py
+# آزمون بار service.py با منبع داده‌ی مصنوعی (بدون yfinance/tgju): سرویس در یک پروسه‌ی جدا اجرا می‌شود و
+# کلاینت‌های asyncio با اتصال keep-alive درخواست می‌فرستند.
+#   cold burst: clients درخواست هم‌زمان برای یک نماد با کش خالی (باید فقط یک دانلود و یک محاسبه انجام شود)
+#   steady:     clients اتصال به مدت seconds ثانیه روی symbols نماد، lookback های مختلف و سه endpoint
+# اجرا از پوشه‌ی PriceScope:  python -m benchmarks.load_service [clients] [seconds] [symbols] [processes]
+#
+# نمونه‌ی اجرا (یک هسته؛ کلاینت و سرویس روی همان هسته، دانلود مصنوعی 200ms):
+#   200 clients, 20 symbols x 20 lookbacks, processes=1, fetch latency 200ms
+#   cold burst x200: 200 requests in 0.29s = 687 req/s
+#     latency ms  p50 237.53  p90 240.75  p99 240.92  p99.9 240.93  max 240.94
+#     status {200: 200}  x-cache {'miss': 1, 'coalesced': 199}
+#     server fetches 1  computes 1  coalesced 199  hits 0
+#   steady 200 clients: 50,941 requests in 10.04s = 5,076 req/s
+#     latency ms  p50 31.18  p90 40.71  p99 425.90  p99.9 823.05  max 1139.38
+#     status {200: 50941}  x-cache {'miss': 401, 'coalesced': 671, 'hit': 49869}
+#     server fetches 21  computes 400  coalesced 829  hits 50091
+#   با processes=0 (محاسبه در نخ): steady 5,500 req/s، p50 32.9  p99 239.8  p99.9 641.6 ms
+# ۲۰۰ درخواست هم‌زمان سرد فقط یک دانلود و یک محاسبه دارند. دم تأخیر حالت steady مربوط به درخواست‌هایی است که
+# پشت ۴۰۰ محاسبه‌ی اول (هر نماد × lookback) صف می‌کشند؛ روی یک هسته process pool هزینه‌ی pickle دیتا را
+# اضافه می‌کند و فقط با چند هسته سود دارد.
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from benchmarks.synthetic import random_walk_ohlcv
+
+FETCH_LATENCY = 0.2
+BARS = 500
+
+
+def stub_source(symbol, period, interval):
+    """دانلود مصنوعی: FETCH_LATENCY ثانیه تأخیر و BARS کندل ثابت برای هر نماد"""
+    time.sleep(FETCH_LATENCY)
+    return random_walk_ohlcv(BARS, seed=sum(symbol.encode()))
+
+
+def stub_quotes(codes):
+    time.sleep(FETCH_LATENCY)
+    return {"price_dollar_rl": 1_085_000, "geram18": 10_558_600}
+
+
+def _serve(processes, port_queue, stop):
+    """
+    سرویس تا set شدن stop؛ بعد سرور بسته و process pool سرویس با صبر تا خروج worker ها خاموش می‌شود.
+    پروسه‌ی سرویس گروه پروسه‌ی خودش را دارد (POSIX) تا worker ها هم در آن باشند و در صورت گیر کردن همه با هم متوقف شوند.
+    """
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    from service import ScenarioService
+
+    async def run():
+        service = ScenarioService(stub_source, stub_quotes, processes=processes)
+        server = await service.start('127.0.0.1', 0)
+        port_queue.put(server.sockets[0].getsockname()[1])
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+            server.close()
+            await server.wait_closed()
+        finally:
+            service.close(wait=True)
+
+    asyncio.run(run())
+
+
+async def request(reader, writer, path):
+    """(status, headers, body) روی اتصال keep-alive"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, headers, body
+
+
+async def client(port, paths, deadline, latencies, statuses, cache):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while True:
+            path = paths()
+            t0 = time.perf_counter()
+            status, headers, _ = await request(reader, writer, path)
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] += 1
+            cache[headers.get('x-cache', '-')] += 1
+            if deadline is None or time.perf_counter() >= deadline:
+                break
+    finally:
+        writer.close()
+
+
+async def phase(port, clients, paths, seconds=None):
+    latencies, statuses, cache = [], Counter(), Counter()
+    deadline = None if seconds is None else time.perf_counter() + seconds
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(port, paths, deadline, latencies, statuses, cache) for _ in range(clients)))
+    return time.perf_counter() - t0, np.array(latencies), statuses, cache
+
+
+async def stats(port):
+    import json
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    _, _, body = await request(reader, writer, '/stats')
+    writer.close()
+    return json.loads(body)
+
+
+def report(label, wall, latencies, statuses, cache, server):
+    ms = np.percentile(latencies, [50, 90, 99, 99.9]) * 1000
+    print(f"{label}: {len(latencies):,} requests in {wall:.2f}s = {len(latencies) / wall:,.0f} req/s")
+    print(f"  latency ms  p50 {ms[0]:.2f}  p90 {ms[1]:.2f}  p99 {ms[2]:.2f}  p99.9 {ms[3]:.2f}  "
+          f"max {latencies.max() * 1000:.2f}")
+    print(f"  status {dict(statuses)}  x-cache {dict(cache)}")
+    print(f"  server fetches {server['fetches']}  computes {server['computes']}  "
+          f"coalesced {server['coalesced']}  hits {server['hits']}")
+
+
+async def main(port, clients, seconds, n_symbols):
+    rng = random.Random(0)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+
+    before = await stats(port)
+    wall, lat, st, cache = await phase(port, clients, lambda: "/scenarios/SYM0")
+    after = await stats(port)
+    report(f"cold burst x{clients}", wall, lat, st, cache, {k: after[k] - before[k] for k in before})
+
+    def mixed():
+        r = rng.random()
+        if r < 0.05:
+            return "/bubble"
+        endpoint = "scenarios" if r < 0.65 else "levels"
+        return f"/{endpoint}/{rng.choice(symbols)}?interval=1h&lookback={rng.randrange(20, 40)}"
+
+    before = after
+    wall, lat, st, cache = await phase(port, clients, mixed, seconds)
+    after = await stats(port)
+    report(f"steady {clients} clients", wall, lat, st, cache, {k: after[k] - before[k] for k in before})
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    n_symbols = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    processes = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+
+    port_queue = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    server = multiprocessing.Process(target=_serve, args=(processes, port_queue, stop))
+    server.start()
+    try:
+        port = port_queue.get(timeout=30)
+        print(f"{clients} clients, {n_symbols} symbols x 20 lookbacks, processes={processes}, "
+              f"fetch latency {FETCH_LATENCY * 1000:.0f}ms")
+        asyncio.run(main(port, clients, seconds, n_symbols))
+    finally:
+        stop.set()
+        server.join(timeout=30)
+        if server.is_alive():
+            # فقط کشتن پروسه‌ی سرویس worker های process pool را یتیم می‌گذارد؛ کل گروه یا هیچ
+            if hasattr(os, 'killpg'):
+                os.killpg(server.pid, signal.SIGKILL)
+                server.join()
+                raise RuntimeError(f"service process {server.pid} did not stop within 30s; killed its process group")
+            raise RuntimeError(f"service process {server.pid} did not stop within 30s; "
+                               "it and its pool workers are still running")
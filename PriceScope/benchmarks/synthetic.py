@@ -0,0 +1,59 @@
+# benchmarks/synthetic.py
+import numpy as np
+import pandas as pd
+
+
+def random_walk_ohlcv(n, seed=0, start=1900.0, freq="1h", vol=0.002):
+    """سری OHLCV مصنوعی (گشت تصادفی لگاریتمی) برای اجرای آفلاین بدون yfinance"""
+    rng = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(rng.normal(0.0, vol, n)))
+    open_ = np.concatenate([[start], close[:-1]])
+    wick = np.abs(rng.normal(0.0, vol, (2, n))) * close
+    high = np.maximum(open_, close) + wick[0]
+    low = np.minimum(open_, close) - wick[1]
+    volume = rng.integers(100, 10_000, n).astype(float)
+    index = pd.date_range("2015-01-01", periods=n, freq=freq, tz="UTC")
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+def regime_ohlcv(n, seed=0, start=1900.0, freq="1min", vols=(0.001, 0.003, 0.008), regime_bars=500,
+                 gap_rate=0.002, gap_vol=0.01, nan_rate=0.0005):
+    """
+    سری OHLCV مصنوعی نزدیک‌تر به داده‌ی واقعی:
+    رژیم‌های نوسان (طول هر رژیم تصادفی با میانگین regime_bars و نوسان از vols)،
+    گپ قیمتی همراه با فاصله‌ی زمانی (مثل تعطیلی آخر هفته) با احتمال gap_rate،
+    و ردیف‌های NaN (مثل کندل‌های ناقص yfinance) با احتمال nan_rate. آخرین ردیف هیچ‌وقت NaN نیست.
+    freq پیش‌فرض یک دقیقه است تا ۱۰ میلیون کندل هم در بازه‌ی datetime64[ns] جا شود.
+    """
+    rng = np.random.default_rng(seed)
+    lengths = rng.geometric(1.0 / regime_bars, size=n // regime_bars + 16)
+    while lengths.sum() < n:
+        lengths = np.append(lengths, rng.geometric(1.0 / regime_bars, size=16))
+    vol = np.repeat(np.asarray(vols)[rng.integers(0, len(vols), len(lengths))], lengths)[:n]
+
+    gaps = rng.random(n) < gap_rate
+    gaps[0] = False
+    jump = np.where(gaps, rng.normal(0.0, gap_vol, n), 0.0)
+    log_close = np.cumsum(rng.normal(0.0, 1.0, n) * vol + jump)
+    close = start * np.exp(log_close)
+    open_ = np.empty(n)
+    open_[0] = start
+    open_[1:] = close[:-1] * np.exp(jump[1:])
+    wick = np.abs(rng.normal(0.0, 1.0, (2, n))) * vol * close
+    high = np.maximum(open_, close) + wick[0]
+    low = np.minimum(open_, close) - wick[1]
+    volume = rng.integers(100, 10_000, n).astype(float)
+
+    # گپ‌ها در زمان هم فاصله دارند (۲ تا ۴۸ کندل جاافتاده)
+    steps = np.where(gaps, rng.integers(2, 49, n), 1)
+    steps[0] = 0
+    step_ns = pd.Timedelta(freq).value
+    index = pd.Timestamp("2015-01-01").value + step_ns * np.cumsum(steps)
+
+    missing = rng.random(n) < nan_rate
+    missing[-1] = False
+    for values in (open_, high, low, close):
+        values[missing] = np.nan
+    volume[missing] = 0.0
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+                        index=pd.DatetimeIndex(index.view('datetime64[ns]')).tz_localize('UTC'))
@@ -0,0 +1,90 @@
+# benchmarks/tgju_stub.py
+# جایگزین محلی tgju.org و api.tgju.online برای اجرای آفلاین utils.TGJUClient
+#   /profile/<code>           صفحه‌ی ذخیره‌شده‌ی <pages>/<code>.html یا یک صفحه‌ی ساختگی
+#   /v1/data/detail/<code>    JSON مثل API اصلی
+# اجرا از پوشه‌ی PriceScope:  python -m benchmarks.tgju_stub [port] [pages_dir]
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PRICES = {"price_dollar_rl": 1_085_000, "geram18": 10_558_600, "sekee": 108_500_000, "sekeb": 101_200_000}
+
+# اسکلت صفحه‌ی profile (حجم و ساختار تقریبی صفحه‌ی واقعی برای مقایسه‌ی پارس)
+PAGE = """<!DOCTYPE html><html lang="fa"><head><meta charset="utf-8"><title>{code}</title></head><body>
+{filler}
+<div class="info"><span class="info__title">{code}</span>
+<span class="info__price">{price:,}</span></div>
+{filler}
+</body></html>"""
+FILLER = "".join(f'<div class="row"><a href="/profile/x{i}">item {i}</a><span>{i * 1000:,}</span></div>\n'
+                 for i in range(1500))
+
+
+class StubConfig:
+    def __init__(self, pages_dir=None, delay=0.0, api_delay=0.0, broken=()):
+        self.pages_dir = pages_dir
+        self.delay = delay            # تأخیر پاسخ صفحه‌ها (ثانیه)
+        self.api_delay = api_delay
+        self.broken = set(broken)     # کدهایی که صفحه‌شان 503 می‌دهد
+        self.requests = 0
+
+
+def make_handler(cfg):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            cfg.requests += 1
+            parts = self.path.strip("/").split("/")
+            code = parts[-1]
+            if parts[0] == "profile":
+                time.sleep(cfg.delay)
+                if code in cfg.broken:
+                    return self._send(503, "unavailable", "text/plain")
+                path = cfg.pages_dir and os.path.join(cfg.pages_dir, f"{code}.html")
+                if path and os.path.exists(path):
+                    with open(path, encoding="utf-8") as f:
+                        return self._send(200, f.read(), "text/html; charset=utf-8")
+                if code in PRICES:
+                    return self._send(200, PAGE.format(code=code, price=PRICES[code], filler=FILLER),
+                                      "text/html; charset=utf-8")
+            elif parts[:3] == ["v1", "data", "detail"] and code in PRICES:
+                time.sleep(cfg.api_delay)
+                return self._send(200, json.dumps({"data": {"p": f"{PRICES[code]:,}"}}), "application/json")
+            self._send(404, "not found", "text/plain")
+
+    return Handler
+
+
+def serve(port=0, cfg=None):
+    """سرور در یک نخ پس‌زمینه؛ خروجی: (server, base_url)"""
+    cfg = cfg or StubConfig()
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(cfg))
+    server.daemon_threads = True
+    server.cfg = cfg
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server, url = serve(port, StubConfig(pages_dir=sys.argv[2] if len(sys.argv) > 2 else None))
+    print(f"serving on {url}  (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,18 @@
+# benchmarks/validate_backtest.py
+# اجرا از پوشه‌ی PriceScope:  python -m benchmarks.validate_backtest
+import time
+
+from analysis.backtest import backtest, check_against_scalar
+from benchmarks.synthetic import random_walk_ohlcv
+
+if __name__ == "__main__":
+    df = random_walk_ohlcv(50_000, seed=42)
+
+    bad = check_against_scalar(df, samples=500)
+    print(f"scalar check: {500 - len(bad)}/500 bars identical", "" if not bad else f"mismatches: {bad[:10]}")
+
+    t0 = time.perf_counter()
+    res = backtest(df)
+    print(f"backtest over {len(df):,} bars: {time.perf_counter() - t0:.3f}s")
+    for side in ("long", "short", "all"):
+        print(side, res[side])
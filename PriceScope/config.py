@@ -8,3 +8,71 @@ DEFAULT_LOOKBACK = 30
 MA_FAST = 20
 MA_SLOW = 50
 ATR_PERIOD = 14
+
+# انبار محلی کندل‌ها (analysis/bar_store.py)
+BAR_STORE_DIR = ".cache/bars"
+BAR_REFRESH_SECONDS = 300
+# شروع جلسه‌ی معاملاتی هر نماد برای ساخت کندل روزانه/هفتگی از کندل ساعتی (مثلاً {"GC=F": "18:00"} برای COMEX).
+# کندل روزانه‌ی yfinance از شروع جلسه است و Close آن قیمت تسویه؛ نمادی که اینجا نیست 1d/1wk را مستقیم دانلود می‌کند
+SESSION_STARTS = {}
+
+INTERVAL_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800,
+    "60m": 3600, "90m": 5400, "1h": 3600, "2h": 7200, "4h": 14400,
+    "1d": 86400, "5d": 432000, "1wk": 604800, "1mo": 2592000, "3mo": 7776000,
+}
+
+# قیمت‌های بازار ایران (utils.py)
+TGJU_BASE_URL = "https://www.tgju.org"
+TGJU_API_URL = "https://api.tgju.online"
+TGJU_TIMEOUT = 8
+TGJU_CACHE_SECONDS = 60
+TGJU_HEDGE_SECONDS = 1.5   # اگر صفحه تا این زمان جواب نداد، API هم هم‌زمان پرسیده می‌شود
+QUOTE_JOURNAL_DIR = ".cache/quotes"   # دفتر قیمت‌های دریافت‌شده (analysis/journal.py)؛ None یعنی بدون ثبت
+
+# سری زمانی حباب طلا (analysis/bubble.py): حداکثر عمر آخرین قیمت هر منبع (ثانیه)
+BUBBLE_MAX_AGE = {"ounce": 900, "usd": 3600, "gram18": 3600}
+BUBBLE_WINDOW = 1440   # پنجره‌ی z-score/صدک (تعداد نقطه؛ یک روز دقیقه‌ای)
+
+# حالت زنده (analysis/live.py)
+LIVE_POLL_MIN_SECONDS = 5      # فاصله‌ی پرسیدن کندل جدید: interval/60 در این بازه
+LIVE_POLL_MAX_SECONDS = 60
+LIVE_REFRESH_SECONDS = 5       # فاصله‌ی به‌روزرسانی صفحه‌ی Streamlit
+LIVE_IDLE_SECONDS = 300        # فید بدون بیننده بعد از این مدت متوقف می‌شود
+
+# احتمال برخورد به هدف/حد ضرر با مونت‌کارلو (analysis/montecarlo.py)
+MC_PATHS = 100_000
+MC_STEPS = 500          # افق شبیه‌سازی (تعداد کندل)
+MC_METHOD = "bootstrap" # "bootstrap" (بازده‌های تاریخی) یا "atr" (گام نرمال با نوسان ATR)
+MC_SEED = 0
+MC_CHUNK = 25_000       # مسیرهای هر تکه (واحد کار process pool)
+MC_BLOCK = 32           # گام‌های هر بلوک؛ مسیرهای تمام‌شده بعد از هر بلوک کنار می‌روند
+
+# موتور هشدار (analysis/alerts.py)
+ALERT_HISTORY = 200            # تعداد رویدادهای نگه‌داشته برای داشبورد
+ALERT_FILE = None              # مسیر فایل NDJSON رویدادها؛ None یعنی بدون فایل
+ALERT_WEBHOOK_URL = None       # آدرس webhook؛ None یعنی بدون ارسال
+
+# هسته‌ی یک‌گذره‌ی اندیکاتورها (analysis/kernels.py): اگر numba نصب باشد سری‌های بلندتر از
+# NUMBA_MIN_BARS با مسیر JIT حساب می‌شوند (سری‌های کوتاه‌تر ارزش import و بارگذاری numba را ندارند)
+USE_NUMBA = True
+NUMBA_MIN_BARS = 50_000
+
+# تحلیل چند تایم‌فریمی (analysis/mtf.py): یک دانلود از MTF_BASE_INTERVAL و بقیه با resample
+MTF_BASE_INTERVAL = "1h"
+MTF_INTERVALS = ("1h", "4h", "1d", "1wk")
+MTF_PERIOD = "1y"          # yfinance کندل ساعتی را فقط برای ۷۳۰ روز اخیر می‌دهد
+MTF_THRESHOLD = 0.5        # |score| از این بیشتر یعنی هم‌سویی صعودی/نزولی
+
+# همبستگی بین دارایی‌ها (analysis/correlation.py)
+CORR_WINDOW = 60    # پنجره‌ی همبستگی/بتا (تعداد کندل)
+# محرک‌های طلا: دلار، بازده اسمی و اوراق تورمی (جایگزین بازده واقعی)، نقره، معدنچی‌ها
+CORR_WATCHLIST = ["GC=F", "SI=F", "DX-Y.NYB", "^TNX", "TIP", "GDX"]
+
+# سرویس HTTP سناریوها (service.py)
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8080
+SERVICE_PROCESSES = None     # process pool محاسبات (None یعنی تعداد هسته‌ها؛ 0 یعنی نخ به جای پروسه)
+SERVICE_FETCH_WORKERS = 8    # نخ‌های دانلود کندل و قیمت‌ها
+SERVICE_CACHE_SIZE = 512     # تعداد نتایج کش‌شده (کندل‌ها، سناریوها، حباب)
+BUBBLE_OUNCE = ("GC=F", "5d", "1h")   # (نماد، period، interval) قیمت اونس برای /bubble
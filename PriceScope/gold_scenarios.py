@@ -1,8 +1,7 @@
 ﻿import yfinance as yf
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-from scipy.signal import find_peaks
+
+from analysis import graph
 
 
 # ---------- پارامترها ----------
@@ -14,67 +13,6 @@ MA_FAST = 20
 MA_SLOW = 50
 ATR_PERIOD = 14
 
-# ---------- ابزار کمکی ----------
-def atr(df, n=14):
-    """محاسبه ATR ساده"""
-    high_low = df['High'] - df['Low']
-    high_close = np.abs(df['High'] - df['Close'].shift())
-    low_close = np.abs(df['Low'] - df['Close'].shift())
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    return tr.rolling(n, min_periods=1).mean()
-
-def support_resistance_levels(df, lookback=30):
-    last = df.tail(lookback)
-    recent_high = last['High'].max()
-    recent_low = last['Low'].min()
-    # سطح مقاومت دوم و حمایت دوم را با استفاده از درصد از دامنه بدست می‌آوریم
-    rng = recent_high - recent_low
-    resistance_2 = recent_high + 0.5 * rng
-    support_2 = recent_low - 0.5 * rng
-    return {
-        'recent_high': recent_high,
-        'recent_low': recent_low,
-        'resistance_2': resistance_2,
-        'support_2': support_2
-    }
-
-def market_structure(df):
-    """تشخیص ساختار ساده: higher highs / lower lows در چند هفته اخیر"""
-    closes = df['Close']
-    # ساده‌ترین روش: مقایسه آخرین قله و دره با قبلی‌ها
-    # پیدا کردن local peaks/valleys با مقایسه با همسایه‌ها
-
-
-
-    high_vals = df['High'].to_numpy().astype(float)  # تضمین یک‌بعدی بودن
-    low_vals = df['Low'].to_numpy().astype(float)
-
-    peaks, _ = find_peaks(high_vals)
-    valleys, _ = find_peaks(-low_vals)
-
-    peak_vals = df['High'].iloc[peaks]
-    valley_vals = df['Low'].iloc[valleys]
-
-
-    # آخرین قله و دره
-    last_peak = peak_vals.iloc[-1] if len(peak_vals) > 0 else np.nan
-    prev_peak = peak_vals.iloc[-2] if len(peak_vals) > 1 else np.nan
-    last_valley = valley_vals.iloc[-1] if len(valley_vals) > 0 else np.nan
-    prev_valley = valley_vals.iloc[-2] if len(valley_vals) > 1 else np.nan
-
-    structure = {}
-    if not np.isnan(last_peak) and not np.isnan(prev_peak):
-        structure['higher_highs'] = last_peak > prev_peak
-    else:
-        structure['higher_highs'] = None
-
-    if not np.isnan(last_valley) and not np.isnan(prev_valley):
-        structure['higher_lows'] = last_valley > prev_valley
-    else:
-        structure['higher_lows'] = None
-
-    return structure
-
 # ---------- هسته تحلیل ----------
 def analyze_symbol(symbol=SYMBOL, period=PERIOD, interval=INTERVAL,
                    lookback_days=LOOKBACK_DAYS):
@@ -87,18 +25,14 @@ def analyze_symbol(symbol=SYMBOL, period=PERIOD, interval=INTERVAL,
 
     df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
 
-    # میانگین متحرک
-    df['MA_fast'] = df['Close'].rolling(MA_FAST, min_periods=1).mean()
-    df['MA_slow'] = df['Close'].rolling(MA_SLOW, min_periods=1).mean()
-
-    # ATR
-    df['ATR'] = atr(df, ATR_PERIOD)
-
-    # سطوح
-    levels = support_resistance_levels(df, lookback=lookback_days)
-
-    # ساختار بازار
-    struct = market_structure(df)
+    # میانگین متحرک، ATR، سطوح و ساختار بازار از گراف اندیکاتورها (analysis/graph.py)
+    out = graph.evaluate(df, ['MA_fast', 'MA_slow', 'ATR', 'levels', 'market_structure'],
+                         {'fast': MA_FAST, 'slow': MA_SLOW, 'atr_period': ATR_PERIOD, 'lookback': lookback_days})
+    df['MA_fast'] = out['MA_fast']
+    df['MA_slow'] = out['MA_slow']
+    df['ATR'] = out['ATR']
+    levels = dict(out['levels'])
+    struct = dict(out['market_structure'])
 
     # قیمت فعلی
     last_row = df.iloc[-1]
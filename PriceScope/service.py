@@ -0,0 +1,306 @@
+# service.py
+# سرویس HTTP سبک (asyncio، بدون وابستگی اضافه) برای سناریوها:
+#   GET /scenarios/{symbol}?period=6mo&interval=1d&lookback=30&fast=20&slow=50&atr=14
+#   GET /levels/{symbol}?...      (سطوح و ساختار بازار از همان محاسبه‌ی /scenarios)
+#   GET /bubble                   (حباب گرم ۱۸ عیار از اونس و قیمت‌های tgju)
+#   GET /stats
+# درخواست‌های هم‌زمان با کلید یکسان (نماد، interval، پارامترها) به یک محاسبه وصل می‌شوند، دانلودها در نخ‌ها
+# و محاسبات در process pool اجرا می‌شوند تا event loop هیچ‌وقت بلوکه نشود، و نتیجه‌ها تا تازه شدن کندل‌ها
+# (interval_ttl) با سرآیندهای Cache-Control/Age/Last-Modified از کش برمی‌گردند.
+#   python service.py --port 8080 --processes 2
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from config import (DEFAULT_PERIOD, DEFAULT_INTERVAL, DEFAULT_LOOKBACK, MA_FAST, MA_SLOW, ATR_PERIOD,
+                    INTERVAL_SECONDS, TGJU_CACHE_SECONDS, SERVICE_HOST, SERVICE_PORT, SERVICE_PROCESSES,
+                    SERVICE_FETCH_WORKERS, SERVICE_CACHE_SIZE, BUBBLE_OUNCE)
+from analysis.bubble import intrinsic_gram18
+from analysis.cache import LRUCache, interval_ttl
+from analysis.data_fetcher import fetch_data
+from analysis.pipeline import analyze_frame
+
+USD = "price_dollar_rl"
+GOLD_18 = "geram18"
+
+# پارامترهای query و مقدار پیش‌فرض (نوع از پیش‌فرض)
+PARAMS = {'period': DEFAULT_PERIOD, 'interval': DEFAULT_INTERVAL, 'lookback': DEFAULT_LOOKBACK,
+          'fast': MA_FAST, 'slow': MA_SLOW, 'atr': ATR_PERIOD}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Entry:
+    """نتیجه‌ی کش‌شده با زمان ساخت و انقضا (time.time) و بدنه‌ی JSON هر endpoint"""
+
+    __slots__ = ('value', 'created', 'expires', 'bodies')
+
+    def __init__(self, value, ttl, expires=None):
+        self.value = value
+        self.created = time.time()
+        self.expires = self.created + ttl if expires is None else min(expires, self.created + ttl)
+        self.bodies = {}
+
+
+def _parse_params(query):
+    params = dict(PARAMS)
+    for k, v in parse_qsl(query):
+        if k not in params:
+            raise HTTPError(400, f"پارامتر ناشناخته: {k}")
+        try:
+            params[k] = type(PARAMS[k])(v)
+        except ValueError:
+            raise HTTPError(400, f"مقدار نامعتبر برای {k}: {v}")
+    if params['interval'] not in INTERVAL_SECONDS:
+        raise HTTPError(400, f"interval نامعتبر: {params['interval']}")
+    if min(params['lookback'], params['fast'], params['slow'], params['atr']) < 1:
+        raise HTTPError(400, "lookback/fast/slow/atr باید مثبت باشند")
+    return params
+
+
+def _default_quotes(codes):
+    # import دیرهنگام: utils کلاینت requests می‌سازد و برای /scenarios لازم نیست
+    from utils import get_prices
+    return get_prices(codes)
+
+
+class ScenarioService:
+    """
+    source(symbol, period, interval) -> DataFrame (پیش‌فرض analysis/data_fetcher.fetch_data)
+    quotes(codes) -> {code: قیمت ریالی} (پیش‌فرض utils.get_prices)
+    processes=0 یعنی محاسبات در نخ‌های همین پروسه (باز هم خارج از event loop).
+    """
+
+    def __init__(self, source=fetch_data, quotes=_default_quotes, processes=SERVICE_PROCESSES,
+                 fetch_workers=SERVICE_FETCH_WORKERS, cache_size=SERVICE_CACHE_SIZE):
+        self.source = source
+        self.quotes = quotes
+        self.cache = LRUCache(cache_size)
+        self.fetch_pool = ThreadPoolExecutor(fetch_workers)
+        self.compute_pool = ThreadPoolExecutor(1) if processes == 0 else ProcessPoolExecutor(processes)
+        self.stats = dict.fromkeys(('requests', 'hits', 'misses', 'coalesced', 'fetches', 'computes', 'errors'), 0)
+        self._inflight = {}
+
+    def close(self, wait=True):
+        """لغو کارهای در صف؛ wait=True تا پایان کارهای در حال اجرا و خروج پروسه‌های process pool صبر می‌کند"""
+        self.fetch_pool.shutdown(wait=wait, cancel_futures=True)
+        self.compute_pool.shutdown(wait=wait, cancel_futures=True)
+
+    # ---------- کش و یکی کردن درخواست‌ها ----------
+    async def _cached(self, key, compute):
+        """
+        (Entry, وضعیت) با وضعیت 'hit'، 'miss' یا 'coalesced'. compute یک coroutine است که (value, ttl, expires)
+        برمی‌گرداند؛ فقط یک compute برای هر کلید در جریان است و بقیه‌ی درخواست‌ها منتظر همان می‌مانند.
+        خطا کش نمی‌شود ولی به همه‌ی منتظرها می‌رسد.
+        """
+        entry = self.cache.get(key)
+        if entry is not None and entry.expires > time.time():
+            self.stats['hits'] += 1
+            return entry, 'hit'
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats['misses'] += 1
+            status = 'miss'
+            # task جدا از درخواست اول، تا قطع شدن آن درخواست محاسبه‌ی بقیه را لغو نکند
+            task = self._inflight[key] = asyncio.ensure_future(self._fill(key, compute))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats['coalesced'] += 1
+            status = 'coalesced'
+        return await asyncio.shield(task), status
+
+    async def _fill(self, key, compute):
+        value, ttl, expires = await compute()
+        entry = Entry(value, ttl, expires)
+        self.cache.put(key, entry, max(entry.expires - entry.created, 0.0))
+        return entry
+
+    async def _run(self, pool, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+    async def bars(self, symbol, period, interval) -> Entry:
+        async def compute():
+            self.stats['fetches'] += 1
+            df = await self._run(self.fetch_pool, self.source, symbol, period, interval)
+            if df is None or df.empty:
+                raise HTTPError(404, f"دیتا برای {symbol} پیدا نشد")
+            return df, interval_ttl(interval), None
+        return (await self._cached(('bars', symbol, period, interval), compute))[0]
+
+    async def scenarios(self, symbol, params):
+        """(Entry با scenarios خروجی analyze_frame، وضعیت)"""
+        async def compute():
+            bars = await self.bars(symbol, params['period'], params['interval'])
+            self.stats['computes'] += 1
+            scenarios = await self._run(self.compute_pool, analyze_frame, bars.value, params['lookback'],
+                                        params['fast'], params['slow'], params['atr'])
+            # سناریوها از کندل‌هایشان تازه‌تر نیستند
+            return scenarios, interval_ttl(params['interval']), bars.expires
+        return await self._cached(('scenarios', symbol) + tuple(params.values()), compute)
+
+    async def bubble(self):
+        async def compute():
+            symbol, period, interval = BUBBLE_OUNCE
+            bars, quotes = await asyncio.gather(self.bars(symbol, period, interval),
+                                                self._run(self.fetch_pool, self.quotes, [USD, GOLD_18]))
+            ounce, usd, gram18 = float(bars.value['Close'].iloc[-1]), quotes.get(USD), quotes.get(GOLD_18)
+            if not usd or not gram18:
+                raise HTTPError(502, "قیمت دلار یا طلای ۱۸ از tgju دریافت نشد")
+            intrinsic = float(intrinsic_gram18(ounce, usd))
+            value = {
+                'time': formatdate(usegmt=True),
+                'ounce_usd': ounce,
+                'usd': usd,
+                'gram18': gram18,
+                'intrinsic': intrinsic,
+                'bubble': gram18 - intrinsic,
+                'bubble_pct': (gram18 - intrinsic) / intrinsic * 100,
+            }
+            return value, TGJU_CACHE_SECONDS, bars.expires
+        return await self._cached(('bubble',), compute)
+
+    # ---------- مسیرها ----------
+    async def handle(self, method, target):
+        """(status, headers, body)"""
+        self.stats['requests'] += 1
+        try:
+            if method not in ('GET', 'HEAD'):
+                raise HTTPError(405, "فقط GET")
+            url = urlsplit(target)
+            parts = [unquote(p) for p in url.path.strip('/').split('/')]
+            if len(parts) == 2 and parts[0] in ('scenarios', 'levels') and parts[1]:
+                endpoint, symbol = parts
+                params = _parse_params(url.query)
+                entry, status = await self.scenarios(symbol, params)
+                body = entry.bodies.get(endpoint)
+                if body is None:
+                    body = entry.bodies[endpoint] = _json(_payload(endpoint, symbol, params, entry.value))
+                return 200, _fresh_headers(entry, status), body
+            if parts == ['bubble'] and not url.query:
+                entry, status = await self.bubble()
+                body = entry.bodies.get('bubble')
+                if body is None:
+                    body = entry.bodies['bubble'] = _json(entry.value)
+                return 200, _fresh_headers(entry, status), body
+            if parts == ['stats']:
+                return 200, {'Cache-Control': 'no-store'}, _json({**self.stats, 'cached': len(self.cache),
+                                                                  'inflight': len(self._inflight)})
+            raise HTTPError(404, f"مسیر ناشناخته: {url.path}")
+        except HTTPError as e:
+            self.stats['errors'] += 1
+            return e.status, {'Cache-Control': 'no-store'}, _json({'error': str(e)})
+        except Exception as e:
+            self.stats['errors'] += 1
+            return 502, {'Cache-Control': 'no-store'}, _json({'error': str(e)})
+
+    # ---------- HTTP/1.1 ----------
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = h.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = line.decode('latin-1').split()
+                except ValueError:
+                    writer.write(_response(400, {'Connection': 'close'}, _json({'error': "درخواست نامعتبر"})))
+                    break
+                if int(headers.get('content-length', 0) or 0):
+                    await reader.readexactly(int(headers['content-length']))
+                status, extra, body = await self.handle(method, target)
+                connection = headers.get('connection', '').lower()
+                keep = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                extra['Connection'] = 'keep-alive' if keep else 'close'
+                writer.write(_response(status, extra, body, head=method == 'HEAD'))
+                await writer.drain()
+                if not keep:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError,
+                asyncio.CancelledError):
+            # CancelledError: بسته شدن سرور با اتصال‌های keep-alive باز
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        """asyncio.Server در حال گوش دادن (port=0 یعنی پورت آزاد؛ server.sockets[0].getsockname())"""
+        return await asyncio.start_server(self._connection, host, port)
+
+    async def serve(self, host=SERVICE_HOST, port=SERVICE_PORT):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def _payload(endpoint, symbol, params, scenarios):
+    if endpoint == 'levels':
+        return {'symbol': symbol, 'params': params, 'price': scenarios['price'], 'atr': scenarios['atr'],
+                'levels': scenarios['levels'], 'market_structure': scenarios['market_structure']}
+    return {'symbol': symbol, 'params': params, 'scenarios': scenarios}
+
+
+def _json(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+def _fresh_headers(entry, status):
+    now = time.time()
+    return {
+        'Cache-Control': f"public, max-age={max(int(entry.expires - now), 0)}",
+        'Age': str(max(int(now - entry.created), 0)),
+        'Last-Modified': formatdate(entry.created, usegmt=True),
+        'Expires': formatdate(entry.expires, usegmt=True),
+        'X-Cache': status,
+    }
+
+
+def _response(status, headers, body, head=False) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+             f"Date: {formatdate(usegmt=True)}",
+             "Content-Type: application/json; charset=utf-8",
+             f"Content-Length: {len(body)}"]
+    lines += [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + (b'' if head else body)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="PriceScope scenario service")
+    p.add_argument('--host', default=SERVICE_HOST)
+    p.add_argument('--port', type=int, default=SERVICE_PORT)
+    p.add_argument('--processes', type=int, default=SERVICE_PROCESSES, help="0 یعنی محاسبات در نخ‌های همین پروسه")
+    p.add_argument('--fetch-workers', type=int, default=SERVICE_FETCH_WORKERS)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = ScenarioService(processes=args.processes, fetch_workers=args.fetch_workers)
+    print(f"PriceScope service on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+# tests/test_journal.py
+# اجرا از پوشه‌ی PriceScope:  python -m pytest -q tests
+import threading
+
+import numpy as np
+
+from analysis.journal import QuoteJournal
+
+
+def test_concurrent_appends_keep_time_order(tmp_path):
+    journal = QuoteJournal(str(tmp_path / "geram18.qj"))
+
+    def writer(offset):
+        for i in range(2000):
+            # زمان‌های درهم بین نخ‌ها؛ هر نخ زمان‌های خودش را صعودی می‌فرستد
+            journal.append(1.0, ts=1_000_000 + 4 * i + offset)
+
+    threads = [threading.Thread(target=writer, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ts = np.array(journal.records()['ts'])
+    assert len(ts) == 8000
+    assert (np.diff(ts) >= 0).all()
+    journal.close()
+
+
+def test_compact_drops_old_and_repeated_records(tmp_path):
+    journal = QuoteJournal(str(tmp_path / "usd.qj"))
+    journal.extend([10, 20, 30, 40, 50], [1.0, 2.0, 2.0, 2.0, 3.0], source='scrape')
+    ts, _ = journal.arrays()
+    assert len(ts) == 5
+    del ts      # نمای memmap قبل از compact رها می‌شود
+    assert journal.compact(before=20, dedupe=True) == 3
+    assert np.array(journal.records()['price']).tolist() == [2.0, 3.0]
+    journal.append(4.0, ts=5)   # زمان عقب‌رفته به آخرین زمان فایل فشرده گرد می‌شود
+    assert journal.last() == (50, 4.0)
+    journal.close()
@@ -0,0 +1,86 @@
+# tests/test_pipeline.py
+# اجرا از پوشه‌ی PriceScope:  python -m pytest -q tests
+import pandas as pd
+import pytest
+
+from analysis import cache
+from analysis.pipeline import LayeredAnalysis, bars_version
+from benchmarks.synthetic import random_walk_ohlcv
+
+
+class PartialBarSource:
+    """سری ثابت که Close کندل آخر (نیمه‌کاره) در هر دانلود با همان زمان عوض می‌شود"""
+
+    def __init__(self, bars=300, freq='D'):
+        self.frame = random_walk_ohlcv(bars, seed=7)
+        self.frame.index = pd.date_range('2025-01-01', periods=bars, freq=freq)
+        self.calls = 0
+
+    def __call__(self, symbol, period, interval):
+        self.calls += 1
+        df = self.frame.copy()
+        last = df.index[-1]
+        close = df.at[last, 'Close'] * (1 + 0.01 * self.calls)
+        df.loc[last, ['Close', 'High']] = close, max(df.at[last, 'High'], close)
+        return df
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """ساعت قابل جلو بردن برای TTL کش bars"""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_refreshed_partial_bar_updates_price(clock):
+    source = PartialBarSource()
+    analysis = LayeredAnalysis(source)
+    first = analysis.run('GC=F', '6mo', '1d')
+    assert analysis.run('GC=F', '6mo', '1d')['hits'] == {'bars': True, 'indicators': True, 'scenarios': True}
+
+    clock[0] += cache.interval_ttl('1d') + 1
+    second = analysis.run('GC=F', '6mo', '1d')
+    assert source.calls == 2
+    assert len(second['bars']) == len(first['bars'])
+    assert second['scenarios']['price'] != first['scenarios']['price']
+    assert second['scenarios']['price'] == pytest.approx(source.frame['Close'].iloc[-1] * 1.02)
+    assert second['bars']['MA_fast'][-1] != first['bars']['MA_fast'][-1]
+    assert second['hits']['indicators'] is False
+
+
+def test_graph_nodes_follow_partial_bar(clock):
+    """گره‌های حافظه‌شده‌ی گراف (MA_fast، ATR، levels، price) هم با کندل آخر تازه شده عوض می‌شوند"""
+    source = PartialBarSource()
+    analysis = LayeredAnalysis(source)
+    bars_key = ('GC=F', '6mo', '1d')
+    outputs = ['MA_fast', 'ATR', 'levels', 'price']
+
+    def evaluate():
+        analysis.run(*bars_key)
+        bars, _ = analysis._bars(bars_key)
+        return bars_version(bars_key, bars), analysis.graph.evaluate(bars, outputs, key=bars_version(bars_key, bars))
+
+    key_before, before = evaluate()
+    clock[0] += cache.interval_ttl('1d') + 1
+    key_after, after = evaluate()
+    assert key_after != key_before
+    assert after['price'] != before['price']
+    assert after['MA_fast'][-1] != before['MA_fast'][-1]
+    assert after['ATR'][-1] != before['ATR'][-1]
+    assert after['levels'] != before['levels']
+
+
+def test_refreshed_partial_bar_updates_confluence(clock):
+    """نتیجه‌ی چند تایم‌فریمی هم با کندل ساعتی نیمه‌کاره‌ی تازه‌شده دوباره حساب می‌شود"""
+    source = PartialBarSource(bars=3000, freq='h')
+    analysis = LayeredAnalysis(source)
+    first = analysis.multi_timeframe('GC=F')
+    assert analysis.multi_timeframe('GC=F') is first
+
+    clock[0] += cache.interval_ttl('1h') + 1
+    second = analysis.multi_timeframe('GC=F')
+    assert source.calls == 2
+    assert second is not first
+    assert (second['timeframes']['1h']['scenarios']['price']
+            == pytest.approx(source.frame['Close'].iloc[-1] * 1.02))
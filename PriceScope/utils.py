@@ -1,11 +1,151 @@
-﻿import requests
-from bs4 import BeautifulSoup
+﻿import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from analysis.cache import LRUCache
+from analysis.journal import FLAG_HEDGED, default_store
+from config import TGJU_BASE_URL, TGJU_API_URL, TGJU_TIMEOUT, TGJU_CACHE_SECONDS, TGJU_HEDGE_SECONDS, QUOTE_JOURNAL_DIR
 
 # ---------------- TLS / SSL Fix ----------------
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
 }
 
+# کدهای رایج tgju
+USD = "price_dollar_rl"
+GOLD_18 = "geram18"
+COIN_EMAMI = "sekee"
+COIN_BAHAR = "sekeb"
+
+# عدد داخل <span class="info__price"> یا المان id="info-price"، بدون ساختن کل DOM
+_PRICE_RE = re.compile(
+    r'(?:class="[^"]*\binfo__price\b[^"]*"|id="info-price")[^>]*>\s*([\d,]+(?:\.\d+)?)\s*<')
+
+
+def _extract_price(html: str):
+    m = _PRICE_RE.search(html)
+    if not m:
+        return None
+    try:
+        return int(float(m.group(1).replace(",", "")))
+    except ValueError:
+        return None
+
+
+# ---------------- کلاینت قیمت TGJU ----------------
+class TGJUClient:
+    """
+    یک Session مشترک (اتصال‌های keep-alive)، دریافت هم‌زمان چند کد،
+    پرسیدن هم‌زمان API پشتیبان اگر صفحه دیر یا خالی جواب داد، و کش TTL.
+    base_url / api_url برای اجرا روی سرور محلی (benchmarks/tgju_stub.py) قابل تغییرند.
+    هر قیمت تازه (نه از کش) در journal (analysis/journal.JournalStore) ثبت می‌شود اگر داده شده باشد.
+    """
+
+    def __init__(self, base_url=TGJU_BASE_URL, api_url=TGJU_API_URL, timeout=TGJU_TIMEOUT,
+                 ttl=TGJU_CACHE_SECONDS, hedge_after=TGJU_HEDGE_SECONDS, max_workers=8, journal=None):
+        self.base_url = base_url.rstrip("/")
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.journal = journal
+        self.cache = LRUCache(maxsize=256, ttl=ttl)
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="tgju")
+
+    def scrape(self, code: str):
+        """قیمت از صفحه‌ی tgju.org/profile/<code>"""
+        try:
+            r = self.session.get(f"{self.base_url}/profile/{code}", timeout=self.timeout)
+            r.raise_for_status()
+        except requests.RequestException:
+            return None
+        return _extract_price(r.text)
+
+    def api(self, code: str):
+        """قیمت از api.tgju.online (پشتیبان)"""
+        try:
+            r = self.session.get(f"{self.api_url}/v1/data/detail/{code}", timeout=self.timeout)
+            r.raise_for_status()
+            return int(float(str(r.json()["data"]["p"]).replace(",", "")))
+        except (requests.RequestException, ValueError, KeyError, TypeError):
+            return None
+
+    def quotes(self, codes) -> dict:
+        """
+        قیمت همه‌ی کدها در یک فراخوانی: {code: price یا None}.
+        برای هر کد اول صفحه پرسیده می‌شود؛ اگر تا hedge_after جواب نداد یا قیمت نداشت
+        API هم پرسیده می‌شود و اولین جواب معتبر برنده است.
+        """
+        out = {}
+        pending = {}   # future -> code
+        hedged = set()
+        from_api = set()   # future های API
+        for code in dict.fromkeys(codes):
+            price = self.cache.get(code)
+            if price is not None:
+                out[code] = price
+            else:
+                pending[self._pool.submit(self.scrape, code)] = code
+        hedge_at = time.monotonic() + self.hedge_after
+
+        def hedge(code):
+            hedged.add(code)
+            fut = self._pool.submit(self.api, code)
+            from_api.add(fut)
+            pending[fut] = code
+
+        while pending:
+            waiting = set(pending.values()) - hedged
+            timeout = max(hedge_at - time.monotonic(), 0) if waiting else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for fut in done:
+                code = pending.pop(fut)
+                if code in out:
+                    continue
+                price = fut.result()
+                if price:
+                    out[code] = price
+                    self.cache.put(code, price)
+                    if self.journal is not None:
+                        self.journal.append(code, price, source='api' if fut in from_api else 'scrape',
+                                            flags=FLAG_HEDGED if code in hedged else 0)
+                    # جواب دیرتر همین کد دیگر لازم نیست
+                    for other in [f for f, c in pending.items() if c == code]:
+                        other.cancel()
+                        del pending[other]
+                elif code not in hedged:
+                    hedge(code)
+                elif code not in pending.values():
+                    out[code] = None
+            if time.monotonic() >= hedge_at:
+                for code in waiting - hedged:
+                    if code not in out and code in pending.values():
+                        hedge(code)
+        return {code: out.get(code) for code in dict.fromkeys(codes)}
+
+    def quote(self, code: str):
+        return self.quotes([code])[code]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def default_client() -> TGJUClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TGJUClient(journal=default_store() if QUOTE_JOURNAL_DIR else None)
+        return _client
+
 
 # ---------------- خواندن قیمت از TGJU ----------------
 def _scrape_tgju_item(code: str) -> int:
@@ -15,56 +155,23 @@ def _scrape_tgju_item(code: str) -> int:
     دلار: price_dollar_rl
     طلای 18: geram18
     """
-    url = f"https://www.tgju.org/profile/{code}"
-
-    try:
-        r = requests.get(url, headers=headers, timeout=8)
-        r.raise_for_status()
-    except:
-        return None
-
-    soup = BeautifulSoup(r.text, "html.parser")
-    price_tag = soup.select_one("span.info__price") or soup.select_one("#info-price")
-    if not price_tag:
-        return None
+    return default_client().scrape(code)
 
-    price_text = price_tag.text.replace(",", "").strip()
 
-    try:
-        return int(float(price_text))
-    except:
-        return None
+def get_prices(codes) -> dict:
+    """چند قیمت هم‌زمان؛ قیمت ناموفق 0 برمی‌گردد"""
+    return {code: price or 0 for code, price in default_client().quotes(codes).items()}
 
 
 # ---------------- قیمت دلار بازار آزاد ----------------
 def get_usd_price() -> int:
     # کد دلار آزاد در tgju
-    price = _scrape_tgju_item("price_dollar_rl")
-    if price:
-        return price
-
-    # fallback (API)
-    try:
-        r = requests.get("https://api.tgju.online/v1/data/detail/price_dollar_rl", timeout=8)
-        j = r.json()
-        return int(j["data"]["p"])
-    except:
-        return 0
+    return get_prices([USD])[USD]
 
 
 # ---------------- قیمت طلای 18 عیار ----------------
 def get_gold_18_price() -> int:
-    price = _scrape_tgju_item("geram18")
-    if price:
-        return price
-
-    # fallback
-    try:
-        r = requests.get("https://api.tgju.online/v1/data/detail/geram18", timeout=8)
-        j = r.json()
-        return int(j["data"]["p"])
-    except:
-        return 0
+    return get_prices([GOLD_18])[GOLD_18]
 
 
 # ---------------- محاسبه حباب گرم طلا ----------------